@@ -0,0 +1,76 @@
+__author__ = 'josh'
+
+import timeit
+
+import solutions
+
+
+class AutoSolver(object):
+    """
+    Solves the grid in the game without holding up the frame loop. Each
+    frame, step does at most time_budget seconds of work: first searching
+    for the solution a slice at a time, then filling it in a few cells a
+    frame through Tile.set_value, so the values appear as they are placed
+    and each one can be undone like any other move.
+
+    The solution is found from the puzzle's givens, so values the player
+    has got wrong are put right along the way.
+    """
+    # seconds of work each frame; a frame at 60 FPS has about 16ms
+    TIME_BUDGET = 0.004
+    # cells filled in each frame
+    PLACEMENTS_PER_FRAME = 1
+
+    def __init__(self, grid, time_budget=TIME_BUDGET, placements_per_frame=PLACEMENTS_PER_FRAME):
+        """
+        Constructor
+        :param grid: the Grid to solve
+        :param time_budget: seconds of work each frame
+        :param placements_per_frame: cells filled in each frame
+        """
+        self.grid = grid
+        self.time_budget = time_budget
+        self.placements_per_frame = placements_per_frame
+        self.done = False
+        # set once done if the puzzle turned out to have no solution
+        self.failed = False
+        self._steps = self._run()
+
+    def step(self):
+        """
+        Does this frame's share of the work
+        :return Boolean: whether there's more to do
+        """
+        if not self.done:
+            try:
+                next(self._steps)
+            except StopIteration:
+                self.done = True
+        return not self.done
+
+    def _run(self):
+        """
+        Generator doing the work, yielding at the end of each frame's share
+        """
+        board_state = self.grid.board
+        search = solutions.SolutionIterator(board_state.get_givens(), board_state.layout)
+        solution = search.find_next(self.time_budget)
+        while solution is None:
+            if search.exhausted:
+                self.failed = True
+                return
+            yield
+            solution = search.find_next(self.time_budget)
+        yield
+
+        placed = 0
+        deadline = timeit.default_timer() + self.time_budget
+        for index, value in enumerate(solution):
+            if board_state.cells[index] == value:
+                continue
+            self.grid.tiles.get_by_index(index).set_value(value)
+            placed += 1
+            if placed >= self.placements_per_frame or timeit.default_timer() > deadline:
+                yield
+                placed = 0
+                deadline = timeit.default_timer() + self.time_budget
@@ -0,0 +1,320 @@
+"""
+Solves puzzles in bulk from the command line. Puzzles are streamed from the
+input and solutions streamed to the output, so files of any size are solved
+in constant memory:
+
+    python batch.py puzzles.txt -o solutions.txt
+    python batch.py quizzes.csv --engine dlx > solved.csv
+    python batch.py puzzles.txt --workers 8 --chunk-size 500
+
+With --workers, chunks of puzzles are solved in a pool of processes. Only
+the puzzle text goes to the workers and only solution text comes back, and
+solutions are still written in input order.
+
+With --cache, solutions are cached by the puzzle's canonical form, so
+puzzles which are relabelled or rearranged copies of ones already solved
+aren't solved again. Each worker keeps its own cache.
+
+A summary with throughput and latency percentiles is written to stderr when
+the run finishes.
+"""
+__author__ = 'josh'
+
+import argparse
+import collections
+import csv
+import io
+import multiprocessing
+import sys
+import timeit
+
+import engines
+import latency
+import puzzle_io
+import solution_cache
+
+
+# written in place of a solution for puzzles which have none
+NO_SOLUTION = "no solution"
+
+DEFAULT_CHUNK_SIZE = 256
+# chunks each worker may have queued up; bounds memory when the input is
+# read faster than it is solved
+CHUNKS_PER_WORKER = 2
+
+
+class BatchReport(object):
+    """
+    Running totals for a batch run
+    """
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.solved = 0
+        self.unsolvable = 0
+        self.cache_hits = 0
+        self.latency = latency.LatencyHistogram()
+        self.start = timeit.default_timer()
+        self.elapsed = 0.0
+
+    @property
+    def count(self):
+        return self.solved + self.unsolvable
+
+    def record(self, solved, seconds, cached=False):
+        """
+        Records the outcome of one puzzle
+        :param solved: whether a solution was found
+        :param seconds: how long the puzzle took
+        :param cached: whether the solution came from the solution cache
+        """
+        if solved:
+            self.solved += 1
+        else:
+            self.unsolvable += 1
+        if cached:
+            self.cache_hits += 1
+        self.latency.record(seconds)
+
+    def finish(self):
+        """
+        Stops the clock on the run
+        """
+        self.elapsed = timeit.default_timer() - self.start
+
+    def format(self):
+        """
+        Gets the report as text
+        :return str:
+        """
+        rate = self.count / self.elapsed if self.elapsed else 0.0
+        lines = [
+            "puzzles: %d (%d solved, %d without a solution)" % (self.count, self.solved, self.unsolvable),
+            "elapsed: %s, %.1f puzzles/s" % (latency.format_seconds(self.elapsed), rate),
+            "latency: p50 %s, p90 %s, p99 %s, max %s" % (
+                latency.format_seconds(self.latency.percentile(50)),
+                latency.format_seconds(self.latency.percentile(90)),
+                latency.format_seconds(self.latency.percentile(99)),
+                latency.format_seconds(self.latency.max or 0.0)),
+        ]
+        if self.cache_hits:
+            lines.append("cache: %d of %d puzzles answered from the cache" % (self.cache_hits, self.count))
+        return "\n".join(lines)
+
+
+class SolutionWriter(object):
+    """
+    Writes solutions out in the same format the puzzles came in
+    """
+
+    def __init__(self, stream, format):
+        """
+        Constructor
+        :param stream: open text stream to write to
+        :param format: one of puzzle_io.FORMATS
+        """
+        self.stream = stream
+        self.format = format
+        self._csv = None
+        if format == puzzle_io.CSV_FORMAT:
+            self._csv = csv.writer(stream, lineterminator="\n")
+            self._csv.writerow(["puzzle", "solution"])
+
+    def write(self, puzzle_text, solution_text):
+        """
+        Writes the solution of one puzzle
+        :param puzzle_text: the puzzle as it was read
+        :param solution_text: the solution, or None if there isn't one
+        """
+        if self._csv is not None:
+            self._csv.writerow([puzzle_text, solution_text or ""])
+        else:
+            self.stream.write((solution_text or NO_SOLUTION) + "\n")
+
+
+def solve_text(text, engine, cache=None):
+    """
+    Solves a puzzle given in its one-line text form
+    :param text: the puzzle text
+    :param engine: the solver Engine to use
+    :param cache: SolutionCache to look the puzzle up in first, if any
+    :return tuple: (solution text or None, seconds taken, whether it came
+        from the cache)
+    """
+    start = timeit.default_timer()
+    puzzle = puzzle_io.parse_puzzle(text)
+    cached = False
+    if cache is not None:
+        solution, cached = cache.solve(puzzle, engine)
+    else:
+        solution = engine.solve(puzzle)
+    if solution is not None:
+        solution = puzzle_io.format_puzzle(solution)
+    return solution, timeit.default_timer() - start, cached
+
+
+def solve_stream(puzzles, engine, writer, report, cache=None):
+    """
+    Solves puzzles one at a time as they are read
+    :param puzzles: iterable of (line_number, puzzle_text), as from
+        puzzle_io.read_puzzles
+    :param engine: the solver Engine to use
+    :param writer: SolutionWriter to write the solutions to
+    :param report: BatchReport to record into
+    :param cache: SolutionCache to look puzzles up in first, if any
+    """
+    for line_number, text in puzzles:
+        try:
+            solution, seconds, cached = solve_text(text, engine, cache)
+        except ValueError as e:
+            raise ValueError("line %d: %s" % (line_number, e))
+        writer.write(text, solution)
+        report.record(solution is not None, seconds, cached)
+
+
+def solve_stream_parallel(puzzles, engine_name, writer, report, workers, chunk_size=DEFAULT_CHUNK_SIZE,
+                          cache_size=0):
+    """
+    Solves puzzles in a pool of worker processes, a chunk at a time. Results
+    are written in input order. The first error stops the run: the pool is
+    terminated and the error raised.
+    :param puzzles: iterable of (line_number, puzzle_text)
+    :param engine_name: name of the solver engine the workers should use
+    :param writer: SolutionWriter to write the solutions to
+    :param report: BatchReport to record into
+    :param workers: number of worker processes
+    :param chunk_size: number of puzzles sent to a worker at once
+    :param cache_size: most solutions each worker caches; 0 for none
+    """
+    pool = multiprocessing.Pool(workers, _init_worker, (engine_name, cache_size))
+    pending = collections.deque()
+    try:
+        for chunk in _chunk(puzzles, chunk_size):
+            pending.append(pool.apply_async(_solve_chunk, (chunk,)))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                _write_results(pending.popleft().get(), writer, report)
+        while pending:
+            _write_results(pending.popleft().get(), writer, report)
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def _chunk(puzzles, chunk_size):
+    """
+    Groups puzzles into lists of at most chunk_size
+    """
+    chunk = []
+    for item in puzzles:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_results(results, writer, report):
+    for text, solution, seconds, cached in results:
+        writer.write(text, solution)
+        report.record(solution is not None, seconds, cached)
+
+
+# the engine each worker process solves with, and its solution cache; set
+# up by _init_worker
+_worker_engine = None
+_worker_cache = None
+
+
+def _init_worker(engine_name, cache_size):
+    global _worker_engine, _worker_cache
+    _worker_engine = engines.get_engine(engine_name)
+    if cache_size:
+        _worker_cache = solution_cache.SolutionCache(cache_size)
+
+
+def _solve_chunk(chunk):
+    """
+    Solves a chunk of puzzles in a worker process
+    :param chunk: list of (line_number, puzzle_text)
+    :return list: (puzzle_text, solution_text, seconds, cached) for each
+        puzzle
+    """
+    results = []
+    for line_number, text in chunk:
+        try:
+            solution, seconds, cached = solve_text(text, _worker_engine, _worker_cache)
+        except ValueError as e:
+            raise ValueError("line %d: %s" % (line_number, e))
+        results.append((text, solution, seconds, cached))
+    return results
+
+
+def main(argv=None):
+    """
+    Entry point for the command line
+    :param argv: the arguments, without the program name
+    :return int: exit status
+    """
+    parser = argparse.ArgumentParser(description="Solve sudoku puzzles in bulk.")
+    parser.add_argument("input", help="puzzle file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="file to write solutions to (default: stdout)")
+    parser.add_argument("-f", "--format", choices=puzzle_io.FORMATS,
+                        help="input format; by default guessed from the file name")
+    parser.add_argument("-e", "--engine", choices=sorted(engines.ENGINES), default=engines.DEFAULT_ENGINE,
+                        help="solver engine (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes; 0 for one per CPU (default: %(default)s)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="puzzles sent to a worker at a time (default: %(default)s)")
+    parser.add_argument("--cache", type=int, default=0, metavar="SIZE",
+                        help="cache up to SIZE solutions by canonical form (default: no cache)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't print the summary")
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error("--workers can't be negative")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.cache < 0:
+        parser.error("--cache can't be negative")
+    workers = args.workers or multiprocessing.cpu_count()
+
+    format = args.format or puzzle_io.guess_format(args.input)
+    engine = engines.get_engine(args.engine)
+
+    input_stream = output_stream = None
+    report = BatchReport()
+    status = 0
+    try:
+        input_stream = sys.stdin if args.input == "-" else io.open(args.input, "r", newline="")
+        output_stream = sys.stdout if args.output == "-" else io.open(args.output, "w", newline="")
+        writer = SolutionWriter(output_stream, format)
+        puzzles = puzzle_io.read_puzzles(input_stream, format)
+        if workers > 1:
+            solve_stream_parallel(puzzles, args.engine, writer, report, workers, args.chunk_size, args.cache)
+        else:
+            cache = solution_cache.SolutionCache(args.cache) if args.cache else None
+            solve_stream(puzzles, engine, writer, report, cache)
+    except (OSError, ValueError) as e:
+        sys.stderr.write("error: %s\n" % e)
+        status = 1
+    finally:
+        report.finish()
+        if input_stream not in (None, sys.stdin):
+            input_stream.close()
+        if output_stream not in (None, sys.stdout):
+            output_stream.close()
+
+    if not args.quiet:
+        sys.stderr.write(report.format() + "\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
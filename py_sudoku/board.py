@@ -0,0 +1,292 @@
+__author__ = 'josh'
+
+from array import array
+
+import geometry
+
+
+# symbols used to display and write values; values above 9 use letters, so
+# there are enough for the largest supported board (25x25)
+SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+
+class Board(object):
+    """
+    Headless model of a sudoku board. Knows nothing about pygame, so it can be
+    used to validate and solve boards without a display. Works for any Layout,
+    from 4x4 up to 25x25.
+
+    Cell values live in a compact byte array (0 meaning empty). Each row,
+    column, and box counts how many times each value appears in it, and keeps
+    a bitmask of the values present, where bit (value - 1) is set when value
+    appears at least once. Placing or clearing a value only touches the
+    counts and masks of the cell's three units, so conflicts and completion
+    are known at all times without rescanning the board.
+
+    The board also remembers which cells were given by the puzzle, and keeps
+    the player's notes as a bitmask of values per cell. With auto_prune_notes
+    set, placing a value removes it from the notes of the cell's peers.
+    """
+
+    def __init__(self, puzzle_definition=None, layout=None):
+        """
+        Constructor
+        :param puzzle_definition: optional list of values (None or 0 for
+            blanks) to load into the board
+        :param layout: the Layout of the board; when not given it is worked
+            out from the puzzle definition, or is the standard 9x9 one
+        """
+        if layout is None:
+            if puzzle_definition is not None:
+                layout = geometry.get_layout_for_cells(len(puzzle_definition))
+            else:
+                layout = geometry.get_layout()
+        self.layout = layout
+        self.size = layout.size
+        self.cell_count = layout.cell_count
+        self.auto_prune_notes = False
+        # counts values taken off the board, by clearing, overwriting, or
+        # reloading it; anything deduced from the values on the board holds
+        # for as long as this doesn't change
+        self.removals = 0
+        self._reset()
+
+        if puzzle_definition is not None:
+            self.load(puzzle_definition)
+
+    def _reset(self):
+        size = self.size
+        self.cells = array('B', [0] * self.cell_count)
+        # flag per cell, set for the values the puzzle gave
+        self.givens = bytearray(self.cell_count)
+        # candidate values the player has noted in each cell, as bitmasks
+        self.notes = [0] * self.cell_count
+        self.row_masks = [0] * size
+        self.column_masks = [0] * size
+        self.box_masks = [0] * size
+
+        # occurrences of each value in each unit, at [unit * size + value - 1]
+        self._row_counts = array('B', [0] * (size * size))
+        self._column_counts = array('B', [0] * (size * size))
+        self._box_counts = array('B', [0] * (size * size))
+
+        # flag per cell, set when its value appears elsewhere in one of its units
+        self.conflicts = bytearray(self.cell_count)
+        # cells filled since removals last changed, in order; with nothing
+        # taken off the board in between it never holds more than cell_count
+        self.placed = []
+        self._filled = 0
+        # values beyond the first of their kind in a unit, over all units
+        self._duplicates = 0
+
+    def load(self, puzzle_definition):
+        """
+        Resets the board and places all the values in the given definition,
+        which become the board's givens
+        :param puzzle_definition: list of cell_count values, None or 0 for blanks
+        """
+        if len(puzzle_definition) != self.cell_count:
+            raise ValueError("Puzzle definition must have %d values, got %d" %
+                             (self.cell_count, len(puzzle_definition)))
+        self.removals += 1
+        self._reset()
+        for i, value in enumerate(puzzle_definition):
+            if value:
+                self.set_value(i, value)
+                self.givens[i] = 1
+
+    def get_value(self, index):
+        """
+        Gets the value in the given cell
+        :param index: index of the cell
+        :return int: the value, or None if the cell is empty
+        """
+        return self.cells[index] or None
+
+    def set_value(self, index, value, prune=True):
+        """
+        Sets the value of a cell, replacing whatever was there. Conflicting
+        values are allowed; they are flagged in conflicts along with the
+        values they clash with.
+        :param index: index of the cell
+        :param value: the new value (1 to size), or None to clear the cell
+        :param prune: whether to prune the value from the peers' notes, if
+            auto_prune_notes is set; off when taking a move back
+        :return list: indexes of the cells whose conflicted state or notes
+            changed
+        """
+        value = value or 0
+        old = self.cells[index]
+        if value == old:
+            return []
+        if value and (value < 1 or value > self.size):
+            raise ValueError("Value must be between 1 and %d, got %s" % (self.size, value))
+
+        layout = self.layout
+        row = layout.cell_row[index]
+        column = layout.cell_column[index]
+        box = layout.cell_box[index]
+        units = ((self._row_counts, self.row_masks, row, layout.rows[row]),
+                 (self._column_counts, self.column_masks, column, layout.columns[column]),
+                 (self._box_counts, self.box_masks, box, layout.boxes[box]))
+        # cells whose conflicted state may have changed; a peer's state can
+        # only change when a count goes between one and two
+        recheck = [index]
+
+        if old:
+            bit = 1 << (old - 1)
+            for counts, masks, unit, unit_cells in units:
+                key = unit * self.size + old - 1
+                count = counts[key]
+                counts[key] = count - 1
+                if count == 1:
+                    masks[unit] &= ~bit
+                else:
+                    self._duplicates -= 1
+                    if count == 2:
+                        recheck.extend(i for i in unit_cells if self.cells[i] == old and i != index)
+            self._filled -= 1
+            self.removals += 1
+            del self.placed[:]
+
+        self.cells[index] = value
+
+        if value:
+            bit = 1 << (value - 1)
+            for counts, masks, unit, unit_cells in units:
+                key = unit * self.size + value - 1
+                count = counts[key]
+                counts[key] = count + 1
+                if count == 0:
+                    masks[unit] |= bit
+                else:
+                    self._duplicates += 1
+                    if count == 1:
+                        recheck.extend(i for i in unit_cells if self.cells[i] == value and i != index)
+            self._filled += 1
+            self.placed.append(index)
+
+        changed = []
+        for cell in recheck:
+            flag = self._get_conflict(cell)
+            if flag != self.conflicts[cell]:
+                self.conflicts[cell] = flag
+                changed.append(cell)
+        if value and prune and self.auto_prune_notes:
+            changed.extend(self.prune_notes(index, value))
+        return changed
+
+    def clear_value(self, index):
+        """
+        Removes the value from a cell
+        :param index: index of the cell
+        :return list: indexes of the cells whose conflicted state changed
+        """
+        return self.set_value(index, None)
+
+    def is_given(self, index):
+        """
+        Determines whether a cell's value was given by the puzzle
+        :param index: index of the cell
+        :return Boolean:
+        """
+        return bool(self.givens[index])
+
+    def get_givens(self):
+        """
+        Gets the puzzle the board was loaded with, without the player's values
+        :return list: in the same format as a puzzle definition
+        """
+        return [value if self.givens[i] else None for i, value in enumerate(self.cells)]
+
+    def toggle_note(self, index, value):
+        """
+        Adds a value to a cell's notes, or removes it if it's already there
+        :param index: index of the cell
+        :param value: the value (1 to size)
+        :return Boolean: whether the value is now in the notes
+        """
+        if value < 1 or value > self.size:
+            raise ValueError("Value must be between 1 and %d, got %s" % (self.size, value))
+        self.notes[index] ^= 1 << (value - 1)
+        return bool(self.notes[index] & (1 << (value - 1)))
+
+    def clear_notes(self, index):
+        """
+        Removes all the notes from a cell
+        :param index: index of the cell
+        """
+        self.notes[index] = 0
+
+    def prune_notes(self, index, value):
+        """
+        Removes a value from the notes of a cell's peers, which can't hold it
+        once the cell does
+        :param index: index of the cell
+        :param value: the value placed in it
+        :return list: indexes of the peers whose notes changed
+        """
+        bit = 1 << (value - 1)
+        notes = self.notes
+        changed = []
+        for peer in self.layout.peers[index]:
+            if notes[peer] & bit:
+                notes[peer] &= ~bit
+                changed.append(peer)
+        return changed
+
+    def is_conflicted(self, index):
+        """
+        Determines whether the value in a cell appears elsewhere in its row,
+        column, or box
+        :param index: index of the cell
+        :return Boolean:
+        """
+        return bool(self.conflicts[index])
+
+    def get_candidates(self, index):
+        """
+        Gets the values which could be placed in the given cell without a
+        conflict, as a bitmask
+        :param index: index of the cell
+        :return int:
+        """
+        layout = self.layout
+        used = (self.row_masks[layout.cell_row[index]] |
+                self.column_masks[layout.cell_column[index]] |
+                self.box_masks[layout.cell_box[index]])
+        return layout.full_mask & ~used
+
+    def can_place(self, index, value):
+        """
+        Determines whether value could go in the given cell without a conflict
+        :param index: index of the cell
+        :param value: the value (1 to size)
+        :return Boolean:
+        """
+        return bool(self.get_candidates(index) & (1 << (value - 1)))
+
+    def is_complete(self):
+        """
+        Checks to see whether every cell holds a value without conflicts
+        :return Boolean:
+        """
+        return self._filled == self.cell_count and self._duplicates == 0
+
+    def to_list(self):
+        """
+        Gets the board in the same format as a puzzle definition
+        :return list:
+        """
+        return [value or None for value in self.cells]
+
+    def _get_conflict(self, index):
+        value = self.cells[index]
+        if not value:
+            return 0
+        layout = self.layout
+        offset = value - 1
+        size = self.size
+        return int(self._row_counts[layout.cell_row[index] * size + offset] > 1 or
+                   self._column_counts[layout.cell_column[index] * size + offset] > 1 or
+                   self._box_counts[layout.cell_box[index] * size + offset] > 1)
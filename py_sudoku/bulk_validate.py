@@ -0,0 +1,317 @@
+"""
+Checks completed grids in bulk with numpy. Grids are given as an array with
+a row of cell values for each grid, or read straight from a file through a
+memory map, so a file of millions of grids is checked a chunk at a time in
+constant memory:
+
+    python bulk_validate.py solutions.txt
+    python bulk_validate.py solutions.bin --format bytes --box-size 4
+
+Each value is turned into its bit, and the bits of each row, column, and
+box are ORed together; a unit holds every value exactly once if and only if
+its bits come to the full mask, as a unit has exactly as many cells as
+values. All of it is array operations over the whole chunk at once.
+
+Files come in three formats, every grid taking the same number of bytes:
+
+    text        one grid per line in the one-line text form, "." or "0"
+                for blanks, with "\\n" line endings
+    bytes       a byte for each cell, holding its value (0 for blank)
+    packed      4 bits for each cell, the first in the low bits, each grid
+                padded to whole bytes; boards up to 15x15 only
+
+numpy is only needed for this module; nothing else in the game uses it.
+"""
+__author__ = 'josh'
+
+import argparse
+import os
+import sys
+import timeit
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+import board
+import geometry
+import latency
+
+
+TEXT_FORMAT = "text"
+BYTES_FORMAT = "bytes"
+PACKED_FORMAT = "packed"
+FORMATS = (TEXT_FORMAT, BYTES_FORMAT, PACKED_FORMAT)
+
+# grids checked at once; bounds the memory used for the unit masks
+DEFAULT_CHUNK_SIZE = 16384
+
+# written for a grid with no bad unit
+NO_UNIT = -1
+
+
+class ValidationResult(object):
+    """
+    The outcome of checking a batch of grids
+    """
+
+    def __init__(self, valid, first_bad_unit, layout):
+        """
+        Constructor
+        :param valid: bool array, whether each grid is complete and correct
+        :param first_bad_unit: int array, for each grid the index into
+            layout.units of the first unit which doesn't hold every value
+            once, or NO_UNIT
+        :param layout: board Layout of the grids
+        """
+        self.valid = valid
+        self.first_bad_unit = first_bad_unit
+        self.layout = layout
+
+    def __len__(self):
+        return len(self.valid)
+
+    @property
+    def valid_count(self):
+        return int(self.valid.sum())
+
+    def get_invalid(self):
+        """
+        Gets the indexes of the grids which aren't valid
+        :return array:
+        """
+        return numpy.flatnonzero(~self.valid)
+
+
+def validate_grids(grids, layout=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Checks that grids are complete, holding every value once in each row,
+    column, and box
+    :param grids: integer array of shape (grid count, cell count), or
+        anything numpy can make one from; a memory map is read a chunk at a
+        time
+    :param layout: board Layout; worked out from the cell count if not given
+    :param chunk_size: grids checked at once
+    :return ValidationResult:
+    """
+    _require_numpy()
+    grids = numpy.asanyarray(grids)
+    if grids.ndim != 2:
+        raise ValueError("Grids must be a 2-dimensional array, got %d dimensions" % grids.ndim)
+    if layout is None:
+        layout = geometry.get_layout_for_cells(grids.shape[1])
+    elif grids.shape[1] != layout.cell_count:
+        raise ValueError("Grids must have %d cells, got %d" % (layout.cell_count, grids.shape[1]))
+
+    count = grids.shape[0]
+    valid = numpy.empty(count, dtype=bool)
+    first_bad_unit = numpy.empty(count, dtype=numpy.int32)
+    checker = _UnitChecker(layout)
+    for start in range(0, count, chunk_size):
+        end = min(start + chunk_size, count)
+        valid[start:end], first_bad_unit[start:end] = checker.check(grids[start:end])
+    return ValidationResult(valid, first_bad_unit, layout)
+
+
+def open_grids(path, format=TEXT_FORMAT, layout=None):
+    """
+    Memory maps a file of grids, without reading it
+    :param path: path of the file
+    :param format: one of FORMATS
+    :param layout: board Layout; standard 9x9 if not given
+    :return array: of shape (grid count, cell count); cell values as they
+        are stored, to be decoded with decode_grids
+    """
+    _require_numpy()
+    if layout is None:
+        layout = geometry.get_layout()
+    record = get_record_size(format, layout)
+    size = os.path.getsize(path)
+    if size % record:
+        raise ValueError("%s is %d bytes, not a whole number of %d byte grids" % (path, size, record))
+    if not size:
+        return numpy.zeros((0, record), dtype=numpy.uint8)
+    return numpy.memmap(path, dtype=numpy.uint8, mode="r", shape=(size // record, record))
+
+
+def decode_grids(records, format=TEXT_FORMAT, layout=None):
+    """
+    Turns grids as they are stored in a file into cell values
+    :param records: uint8 array of shape (grid count, record size), as from
+        open_grids
+    :param format: one of FORMATS
+    :param layout: board Layout; standard 9x9 if not given
+    :return array: uint8 array of shape (grid count, cell count); characters
+        which aren't values come out as 0
+    """
+    _require_numpy()
+    if layout is None:
+        layout = geometry.get_layout()
+    cells = layout.cell_count
+    if format == TEXT_FORMAT:
+        return _get_text_table(layout)[records[:, :cells]]
+    if format == BYTES_FORMAT:
+        return numpy.asarray(records)
+    if format == PACKED_FORMAT:
+        records = numpy.asarray(records)
+        values = numpy.empty((len(records), records.shape[1] * 2), dtype=numpy.uint8)
+        values[:, 0::2] = records & 0x0f
+        values[:, 1::2] = records >> 4
+        return values[:, :cells]
+    raise ValueError("Unknown grid format %r" % format)
+
+
+def validate_file(path, format=TEXT_FORMAT, layout=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Checks every grid in a file, a chunk at a time
+    :param path: path of the file
+    :param format: one of FORMATS
+    :param layout: board Layout; standard 9x9 if not given
+    :param chunk_size: grids read and checked at once
+    :return ValidationResult:
+    """
+    if layout is None:
+        layout = geometry.get_layout()
+    records = open_grids(path, format, layout)
+    count = len(records)
+    valid = numpy.empty(count, dtype=bool)
+    first_bad_unit = numpy.empty(count, dtype=numpy.int32)
+    checker = _UnitChecker(layout)
+    for start in range(0, count, chunk_size):
+        end = min(start + chunk_size, count)
+        values = decode_grids(records[start:end], format, layout)
+        valid[start:end], first_bad_unit[start:end] = checker.check(values)
+    return ValidationResult(valid, first_bad_unit, layout)
+
+
+def get_record_size(format, layout):
+    """
+    Gets the number of bytes each grid takes in a file
+    :param format: one of FORMATS
+    :param layout: board Layout
+    :return int:
+    """
+    if format == TEXT_FORMAT:
+        return layout.cell_count + 1
+    if format == BYTES_FORMAT:
+        return layout.cell_count
+    if format == PACKED_FORMAT:
+        if layout.size > 15:
+            raise ValueError("The packed format holds boards up to 15x15, not %dx%d" % (layout.size, layout.size))
+        return (layout.cell_count + 1) // 2
+    raise ValueError("Unknown grid format %r" % format)
+
+
+def describe_unit(unit, layout=None):
+    """
+    Names a unit for people, e.g. "row 3" or "box 9"
+    :param unit: index into layout.units
+    :param layout: board Layout; standard 9x9 if not given
+    :return str:
+    """
+    if layout is None:
+        layout = geometry.get_layout()
+    kind, number = divmod(unit, layout.size)
+    return "%s %d" % (("row", "column", "box")[kind], number + 1)
+
+
+class _UnitChecker(object):
+    """
+    The lookup tables for checking grids of one layout
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        # the bit for each value; 0 for blanks and anything out of range
+        self.bits = numpy.zeros(256, dtype=numpy.uint32)
+        self.bits[1:layout.size + 1] = 1 << numpy.arange(layout.size, dtype=numpy.uint32)
+        self.units = numpy.array(layout.units, dtype=numpy.intp)
+        self.full_mask = numpy.uint32(layout.full_mask)
+
+    def check(self, values):
+        """
+        Checks a chunk of grids
+        :param values: integer array of shape (grid count, cell count)
+        :return tuple: (bool array of validity, int array of first bad unit)
+        """
+        values = numpy.asarray(values)
+        if values.dtype != numpy.uint8:
+            # anything which isn't a value would wrap around as a byte
+            values = numpy.where((values >= 0) & (values <= self.layout.size), values, 0).astype(numpy.uint8)
+        masks = self.bits[values]
+        unit_masks = numpy.bitwise_or.reduce(masks[:, self.units], axis=2)
+        unit_ok = unit_masks == self.full_mask
+        valid = unit_ok.all(axis=1)
+        first_bad_unit = numpy.where(valid, NO_UNIT, numpy.argmin(unit_ok, axis=1)).astype(numpy.int32)
+        return valid, first_bad_unit
+
+
+_text_tables = {}
+
+
+def _get_text_table(layout):
+    """
+    Gets the lookup table from a character's byte to its value, 0 for blanks
+    and anything else
+    """
+    table = _text_tables.get(layout.size)
+    if table is None:
+        table = numpy.zeros(256, dtype=numpy.uint8)
+        for value, symbol in enumerate(board.SYMBOLS[:layout.size], 1):
+            table[ord(symbol)] = value
+            table[ord(symbol.lower())] = value
+        _text_tables[layout.size] = table
+    return table
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("Bulk validation needs numpy, which is not installed")
+
+
+def main(argv=None):
+    """
+    Entry point for the command line
+    :param argv: the arguments, without the program name
+    :return int: exit status; 1 if any grid is invalid
+    """
+    parser = argparse.ArgumentParser(description="Check completed sudoku grids in bulk.")
+    parser.add_argument("input", help="file of grids")
+    parser.add_argument("-f", "--format", choices=FORMATS, default=TEXT_FORMAT,
+                        help="how the grids are stored (default: %(default)s)")
+    parser.add_argument("-b", "--box-size", type=int, default=geometry.BOX_WIDTH,
+                        help="width and height of a box (default: %(default)s)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="grids checked at once (default: %(default)s)")
+    parser.add_argument("-l", "--list", type=int, default=10, metavar="COUNT",
+                        help="invalid grids to list (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if numpy is None:
+        sys.stderr.write("error: bulk validation needs numpy, which is not installed\n")
+        return 2
+
+    try:
+        layout = geometry.get_layout(args.box_size, args.box_size)
+        start = timeit.default_timer()
+        result = validate_file(args.input, args.format, layout, args.chunk_size)
+        elapsed = timeit.default_timer() - start
+    except (OSError, ValueError) as e:
+        sys.stderr.write("error: %s\n" % e)
+        return 2
+
+    invalid = result.get_invalid()
+    for index in invalid[:args.list]:
+        print("grid %d: bad %s" % (index + 1, describe_unit(int(result.first_bad_unit[index]), layout)))
+    if len(invalid) > args.list:
+        print("... and %d more" % (len(invalid) - args.list))
+    rate = len(result) / elapsed if elapsed else 0.0
+    sys.stderr.write("grids: %d (%d valid, %d invalid)\n" % (len(result), result.valid_count, len(invalid)))
+    sys.stderr.write("elapsed: %s, %.0f grids/s\n" % (latency.format_seconds(elapsed), rate))
+    return 1 if len(invalid) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
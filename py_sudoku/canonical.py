@@ -0,0 +1,235 @@
+"""
+Canonical forms of puzzles. Relabelling the values, swapping bands or
+stacks, swapping rows within a band or columns within a stack, and (for
+square boxes) transposing all turn a puzzle into one which is really the
+same puzzle, with the same solution moved along with it. canonicalize maps
+every puzzle in such a family to one representative, and gives back the
+Transform which takes the puzzle there, so that a solution worked out for
+the representative can be moved back onto the puzzle.
+
+Trying every arrangement to find the smallest is millions of tries on a
+9x9 board, far more than solving takes. Instead the rows, columns, bands,
+and stacks are first put in order by how many clues they have, which no
+rearrangement changes, and only arrangements which keep that order are
+tried. Almost every real puzzle has few enough ties that this finds the
+same representative from any arrangement of it. A puzzle with too many
+ties to try them all (an almost empty one, say) is left in the order it
+came in for the tied lines, so it may get a different representative than
+an arrangement of it would; it is never given one it isn't equivalent to.
+"""
+__author__ = 'josh'
+
+import itertools
+import math
+
+import geometry
+import puzzle_io
+
+
+# most arrangements tried for one puzzle before settling for the order the
+# tied lines came in
+MAX_ORDERINGS = 512
+
+
+class Transform(object):
+    """
+    A rearrangement and relabelling of a board, taking a puzzle to its
+    canonical form
+    """
+
+    def __init__(self, cell_order, relabel):
+        """
+        Constructor
+        :param cell_order: for each cell of the canonical form, the index of
+            the cell it came from
+        :param relabel: for each value (0 for blank), the value it becomes
+        """
+        self.cell_order = cell_order
+        self.relabel = relabel
+        self.unlabel = [0] * len(relabel)
+        for value, label in enumerate(relabel):
+            self.unlabel[label] = value
+
+    def apply(self, puzzle):
+        """
+        Rearranges a puzzle or solution the way this transform does
+        :param puzzle: list of values, None or 0 for blanks
+        :return list: the rearranged values, None for blanks
+        """
+        relabel = self.relabel
+        return [relabel[puzzle[index] or 0] or None for index in self.cell_order]
+
+    def invert(self, puzzle):
+        """
+        Puts a rearranged puzzle or solution back the way it was
+        :param puzzle: list of values in canonical form, None or 0 for blanks
+        :return list: the values in the original arrangement, None for blanks
+        """
+        unlabel = self.unlabel
+        original = [None] * len(puzzle)
+        for index, value in zip(self.cell_order, puzzle):
+            original[index] = unlabel[value or 0] or None
+        return original
+
+
+def canonicalize(puzzle, layout=None):
+    """
+    Gets the canonical form of a puzzle
+    :param puzzle: list of values, None or 0 for blanks
+    :param layout: board Layout; worked out from the puzzle if not given
+    :return tuple: (canonical form as puzzle text, Transform taking the
+        puzzle to it)
+    """
+    if layout is None:
+        layout = geometry.get_layout_for_cells(len(puzzle))
+    values = [value or 0 for value in puzzle]
+    size = layout.size
+
+    orientations = [False]
+    if layout.box_width == layout.box_height:
+        orientations.append(True)
+    best = None
+    for transposed in orientations:
+        if transposed:
+            cells = [column * size + row for row in range(size) for column in range(size)]
+            grid = [values[index] for index in cells]
+        else:
+            cells = list(range(layout.cell_count))
+            grid = values
+        for row_order, column_order in _get_orderings(grid, layout, transposed):
+            form, relabel = _relabel(grid, row_order, column_order, size, best and best[0])
+            if form is not None:
+                best = form, relabel, cells, row_order, column_order
+
+    form, relabel, cells, row_order, column_order = best
+    cell_order = [cells[row * size + column] for row in row_order for column in column_order]
+    return puzzle_io.format_puzzle(form), Transform(cell_order, relabel)
+
+
+def _get_orderings(grid, layout, transposed):
+    """
+    Gets the orders of rows and columns to try: every way of putting them in
+    order by their clues, or just one if there are too many
+    :return iterable: of (row_order, column_order)
+    """
+    size = layout.size
+    # a transposed board has its boxes turned round too
+    band_height = layout.box_width if transposed else layout.box_height
+    stack_width = layout.box_height if transposed else layout.box_width
+
+    rows = [grid[row * size:(row + 1) * size] for row in range(size)]
+    row_counts = [sum(1 for value in row if value) for row in rows]
+    column_counts = [sum(1 for row in rows if row[column]) for column in range(size)]
+    # a line's clue count, then the counts of the lines crossing it at its
+    # clues; neither changes when the board is rearranged
+    row_keys = [(row_counts[r], sorted(column_counts[c] for c in range(size) if rows[r][c]))
+                for r in range(size)]
+    column_keys = [(column_counts[c], sorted(row_counts[r] for r in range(size) if rows[r][c]))
+                   for c in range(size)]
+
+    row_orders, row_count = _get_axis_orders(row_keys, band_height)
+    column_orders, column_count = _get_axis_orders(column_keys, stack_width)
+    if row_count * column_count > MAX_ORDERINGS:
+        return [(next(iter(row_orders)), next(iter(column_orders)))]
+    return itertools.product(row_orders, column_orders)
+
+
+def _get_axis_orders(line_keys, block_length):
+    """
+    Gets the orders of the rows (or columns) to try: blocks sorted by their
+    lines' keys, lines within each block sorted by key, and any tied blocks
+    or lines in every order
+    :param line_keys: key of each line
+    :param block_length: lines in a band (or stack)
+    :return tuple: (iterable of line orders, how many there are)
+    """
+    blocks = [list(range(start, start + block_length)) for start in range(0, len(line_keys), block_length)]
+    block_keys = [sorted(line_keys[line] for line in block) for block in blocks]
+
+    block_choices, count = _get_tied_orders(list(range(len(blocks))), block_keys)
+    line_choices = []
+    for block in blocks:
+        choices, block_count = _get_tied_orders(block, line_keys)
+        line_choices.append(choices)
+        count *= block_count
+
+    def orders():
+        for block_order in block_choices:
+            for lines in itertools.product(*[line_choices[block] for block in block_order]):
+                yield [line for block_lines in lines for line in block_lines]
+    return orders(), count
+
+
+def _get_tied_orders(items, keys):
+    """
+    Sorts items by key, and gets every order of them which is still sorted
+    :param items: list of indexes into keys
+    :param keys: sort key of each item
+    :return tuple: (list of orders, how many there are)
+    """
+    items = sorted(items, key=lambda item: keys[item])
+    runs = [list(run) for key, run in itertools.groupby(items, key=lambda item: keys[item])]
+    count = 1
+    for run in runs:
+        count *= math.factorial(len(run))
+    if count == 1:
+        return [items], 1
+    # build them lazily; only the first is wanted when there are too many
+    orders = (list(itertools.chain.from_iterable(runs))
+              for runs in itertools.product(*[itertools.permutations(run) for run in runs]))
+    return _LazyList(orders), count
+
+
+class _LazyList(object):
+    """
+    Iterable which can be gone over more than once, built from a generator
+    only as far as it is needed
+    """
+
+    def __init__(self, iterator):
+        self._iterator = iterator
+        self._items = []
+
+    def __iter__(self):
+        for item in self._items:
+            yield item
+        for item in self._iterator:
+            self._items.append(item)
+            yield item
+
+
+def _relabel(grid, row_order, column_order, size, bound):
+    """
+    Rearranges the grid and relabels its values in the order they first
+    appear, giving up as soon as it is certain to be greater than bound
+    :return tuple: (form, relabel), or (None, None) if it isn't smaller
+        than bound
+    """
+    relabel = [0] * (size + 1)
+    next_label = 1
+    form = []
+    for row in row_order:
+        start = row * size
+        for column in column_order:
+            value = grid[start + column]
+            if value:
+                label = relabel[value]
+                if not label:
+                    label = relabel[value] = next_label
+                    next_label += 1
+                value = label
+            if bound is not None:
+                other = bound[len(form)]
+                if value > other:
+                    return None, None
+                if value < other:
+                    bound = None
+            form.append(value)
+    if bound is not None:
+        # equal to the best so far
+        return None, None
+    for value in range(1, size + 1):
+        if not relabel[value]:
+            relabel[value] = next_label
+            next_label += 1
+    return form, relabel
@@ -7,4 +7,5 @@ WHITE = (255,255,255)
 RED = (255,0,0)
 YELLOW = (255,255,0)
 BLUE = (0,0,255)
-GREEN = (32,255,32)
\ No newline at end of file
+GREEN = (32,255,32)
+PURPLE = (160,32,240)
\ No newline at end of file
@@ -0,0 +1,213 @@
+__author__ = 'josh'
+
+import timeit
+
+import geometry
+from solver import SolveStats
+
+
+# Sudoku as an exact cover problem: each (cell, value) pair is a row which
+# satisfies four constraint columns - the cell is filled, and the value
+# appears in the cell's row, column, and box. A 9x9 board has 324 columns
+# and 729 rows.
+ROOT = 0
+
+# the empty matrix for each layout is built once and copied for every solve;
+# see _get_template
+_templates = {}
+
+
+def solve(puzzle, stats=None, layout=None):
+    """
+    Solves a puzzle using Dancing Links
+    :param puzzle: list of values, None or 0 for blanks
+    :param stats: optional SolveStats to record the cost of the solve into
+    :param layout: board Layout; worked out from the puzzle's length if not given
+    :return list: the solved puzzle, or None if it has no solution
+    """
+    solutions = _run(puzzle, 1, stats, layout)
+    return solutions[0] if solutions else None
+
+
+def count_solutions(puzzle, limit=2, layout=None):
+    """
+    Counts the solutions of a puzzle, stopping as soon as limit is reached
+    :param puzzle: list of values, None or 0 for blanks
+    :param limit: the most solutions to look for
+    :param layout: board Layout; worked out from the puzzle's length if not given
+    :return int: number of solutions found, at most limit
+    """
+    return len(_run(puzzle, limit, None, layout))
+
+
+def _get_template(layout):
+    """
+    Builds the links for the empty puzzle. Nodes are plain indexes into a set
+    of parallel lists rather than objects: node 0 is the root, nodes
+    1..column_count are the column headers, and the rest are the four nodes
+    of each matrix row, in row order.
+    :param layout: board Layout
+    :return tuple: (left, right, up, down, column, row, size) lists
+    """
+    template = _templates.get(layout)
+    if template is not None:
+        return template
+
+    values = layout.size
+    cell_count = layout.cell_count
+    column_count = 4 * cell_count
+    row_count = cell_count * values
+    node_count = 1 + column_count + 4 * row_count
+    left = [0] * node_count
+    right = [0] * node_count
+    up = list(range(node_count))
+    down = list(range(node_count))
+    column = [0] * node_count
+    row = [-1] * node_count
+    size = [0] * (column_count + 1)
+
+    # header list, including the root
+    for header in range(column_count + 1):
+        left[header] = header - 1 if header > 0 else column_count
+        right[header] = header + 1 if header < column_count else ROOT
+
+    node = column_count + 1
+    for r in range(row_count):
+        index, value = divmod(r, values)
+        headers = (1 + index,
+                   1 + cell_count + layout.cell_row[index] * values + value,
+                   1 + 2 * cell_count + layout.cell_column[index] * values + value,
+                   1 + 3 * cell_count + layout.cell_box[index] * values + value)
+        first = node
+        for header in headers:
+            # append to the bottom of the column
+            bottom = up[header]
+            up[node] = bottom
+            down[node] = header
+            down[bottom] = node
+            up[header] = node
+            column[node] = header
+            row[node] = r
+            size[header] += 1
+
+            # and to the end of the row
+            left[node] = node - 1 if node > first else first + 3
+            right[node] = node + 1 if node < first + 3 else first
+            node += 1
+
+    template = _templates[layout] = (left, right, up, down, column, row, size)
+    return template
+
+
+def _run(puzzle, limit, stats, layout):
+    """
+    Sets up the matrix for a puzzle and runs Algorithm X over it
+    :return list: the solutions found, at most limit of them
+    """
+    if layout is None:
+        layout = geometry.get_layout_for_cells(len(puzzle))
+    values = layout.size
+    cell_count = layout.cell_count
+    if len(puzzle) != cell_count:
+        raise ValueError("Puzzle must have %d values, got %d" % (cell_count, len(puzzle)))
+    if stats is None:
+        stats = SolveStats()
+    start = timeit.default_timer()
+
+    template = _get_template(layout)
+    left, right, up, down, column, row, size = [links[:] for links in template]
+
+    def cover(header):
+        stats.propagations += 1
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(header):
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+
+    solutions = []
+    cells = [0] * cell_count
+
+    def search():
+        stats.nodes += 1
+        header = right[ROOT]
+        if header == ROOT:
+            solutions.append(list(cells))
+            return len(solutions) >= limit
+
+        # branch on the column with the fewest rows left
+        best = header
+        best_size = size[header]
+        while header != ROOT and best_size > 1:
+            if size[header] < best_size:
+                best = header
+                best_size = size[header]
+            header = right[header]
+        if best_size == 0:
+            return False
+
+        cover(best)
+        node = down[best]
+        while node != best:
+            index, value = divmod(row[node], values)
+            cells[index] = value + 1
+            j = right[node]
+            while j != node:
+                cover(column[j])
+                j = right[j]
+            if search():
+                return True
+            j = left[node]
+            while j != node:
+                uncover(column[j])
+                j = left[j]
+            cells[index] = 0
+            node = down[node]
+        uncover(best)
+        return False
+
+    # select the rows for the givens up front; a given whose columns are
+    # already gone conflicts with an earlier one
+    consistent = True
+    covered = bytearray(4 * cell_count + 1)
+    for index, value in enumerate(puzzle):
+        if not value:
+            continue
+        if value < 1 or value > values:
+            raise ValueError("Value at index %d must be between 1 and %d, got %s" % (index, values, value))
+        cells[index] = value
+        first = 1 + 4 * cell_count + 4 * (index * values + value - 1)
+        for node in range(first, first + 4):
+            header = column[node]
+            if covered[header]:
+                consistent = False
+                break
+            covered[header] = 1
+            cover(header)
+        if not consistent:
+            break
+
+    if consistent:
+        search()
+
+    stats.elapsed += timeit.default_timer() - start
+    return solutions
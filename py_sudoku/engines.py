@@ -0,0 +1,77 @@
+__author__ = 'josh'
+
+import solver
+import dlx
+
+
+class Engine(object):
+    """
+    Common interface for the solver engines. Each engine takes puzzles in the
+    same list format used by Grid.create_grid, and keeps the counters of its
+    most recent call in stats.
+    """
+    name = None
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self.stats = solver.SolveStats()
+
+    def solve(self, puzzle, layout=None):
+        """
+        Solves a puzzle
+        :param puzzle: list of values, None or 0 for blanks
+        :param layout: board Layout; worked out from the puzzle if not given
+        :return list: the solved puzzle, or None if it has no solution
+        """
+        self.stats = solver.SolveStats()
+        return self._module.solve(puzzle, self.stats, layout)
+
+    def count_solutions(self, puzzle, limit=2, layout=None):
+        """
+        Counts the solutions of a puzzle, stopping as soon as limit is reached
+        :param puzzle: list of values, None or 0 for blanks
+        :param limit: the most solutions to look for
+        :param layout: board Layout; worked out from the puzzle if not given
+        :return int:
+        """
+        return self._module.count_solutions(puzzle, limit, layout)
+
+    def __repr__(self):
+        return "<%s engine>" % self.name
+
+
+class PropagationEngine(Engine):
+    """
+    Backtracking search with naked/hidden single propagation; fastest on the
+    puzzles people actually play
+    """
+    name = "propagation"
+    _module = solver
+
+
+class DancingLinksEngine(Engine):
+    """
+    Algorithm X over the exact cover matrix; steadier on hard and adversarial
+    puzzles
+    """
+    name = "dlx"
+    _module = dlx
+
+
+ENGINES = dict((engine.name, engine) for engine in (PropagationEngine, DancingLinksEngine))
+DEFAULT_ENGINE = PropagationEngine.name
+
+
+def get_engine(name=DEFAULT_ENGINE):
+    """
+    Creates an engine by name
+    :param name: one of the keys of ENGINES
+    :return Engine:
+    """
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ValueError("Unknown solver engine %r; choose from %s" %
+                         (name, ", ".join(sorted(ENGINES))))
@@ -1,36 +1,90 @@
 __author__ = 'josh'
 
+from array import array
+
 import pygame
 import colors
-import itertools
+import board
+import geometry
+import hints
+import journal
+import renderer
 
 class Grid(object):
     """
     Class which handles the grid
     """
 
-    # constants for various settings
+    # constants for various settings; the box and tile counts are those of the
+    # standard 9x9 grid, and can be overridden per instance
     GRID_X_BOX_COUNT = 3
     GRID_Y_BOX_COUNT = 3
     BOX_X_TILE_COUNT = 3
     BOX_Y_TILE_COUNT = 3
     BOX_BORDER_WIDTH = 3
     BOX_BORDER_COLOR = colors.BLACK
+    # whether placing a value removes it from the notes of its peers
+    AUTO_PRUNE_NOTES = True
 
-    def __init__(self):
+    def __init__(self, box_x_tile_count=None, box_y_tile_count=None, board_state=None):
         """
         Constructor
-        """
+        :param box_x_tile_count: number of tiles across a box
+        :param box_y_tile_count: number of tiles down a box
+        :param board_state: Board to show, e.g. a saved game; a new empty
+            one is made if not given
+        """
+        if box_x_tile_count is None:
+            box_x_tile_count = Grid.BOX_X_TILE_COUNT
+        if box_y_tile_count is None:
+            box_y_tile_count = Grid.BOX_Y_TILE_COUNT
+        self.box_x_tile_count = box_x_tile_count
+        self.box_y_tile_count = box_y_tile_count
+        # every row and column holds one of each value, so there are as many
+        # boxes across the grid as there are tiles down a box, and vice versa
+        self.grid_x_box_count = box_y_tile_count
+        self.grid_y_box_count = box_x_tile_count
+
         self.boxes = []
         self.columns = []
         self.rows = []
-        self._init_group_list(self.boxes, Grid.GRID_X_BOX_COUNT * Grid.GRID_Y_BOX_COUNT)
-        self._init_group_list(self.columns, Grid.GRID_Y_BOX_COUNT * Grid.BOX_Y_TILE_COUNT)
-        self._init_group_list(self.rows, Grid.GRID_X_BOX_COUNT * Grid.BOX_X_TILE_COUNT)
+        self._init_group_list(self.boxes, self._get_num_boxes())
+        self._init_group_list(self.columns, self._get_num_columns())
+        self._init_group_list(self.rows, self._get_num_rows())
         self.tiles = TileContainer()
-         # background is gonna get resized anyway, so don't worry about the size
-        self.background = pygame.Surface((1,1)).convert()
-        self.background.fill(colors.BLACK)
+        # pixel to column and row lookups, filled in by create_grid
+        self._column_at_x = array('h')
+        self._row_at_y = array('h')
+        if board_state is None:
+            board_state = board.Board(layout=geometry.get_layout(box_x_tile_count, box_y_tile_count))
+        self.board = board_state
+        self.board.auto_prune_notes = Grid.AUTO_PRUNE_NOTES
+        self.hints = hints.HintEngine(self.board)
+        self.journal = journal.Journal(self.board)
+        self._hinted_tiles = []
+        # draws the board; made by create_grid once the tiles are laid out
+        self.renderer = None
+        self.background = None
+
+    @classmethod
+    def for_puzzle(cls, puzzle_definition):
+        """
+        Creates a grid whose size matches the given puzzle definition
+        :param puzzle_definition: list of values, None for blanks
+        :return Grid:
+        """
+        layout = geometry.get_layout_for_cells(len(puzzle_definition))
+        return cls(layout.box_width, layout.box_height)
+
+    @classmethod
+    def for_board(cls, board_state):
+        """
+        Creates a grid showing an existing board, such as a saved game
+        :param board_state: Board
+        :return Grid:
+        """
+        layout = board_state.layout
+        return cls(layout.box_width, layout.box_height, board_state)
 
     @property
     def width(self):
@@ -45,24 +99,36 @@ class Grid(object):
         Get the rectangle which contains the surface
         :return Rectangle:
         """
+        if self.background is None:
+            return pygame.Rect(0, 0, 0, 0)
         return self.background.get_rect()
 
-    def create_grid(self, screen, puzzle_definition):
+    def create_grid(self, screen, puzzle_definition=None):
         """
         Create the grid
+        :param screen: Surface the grid will be drawn on
+        :param puzzle_definition: list of values to load into the board; if
+            not given, the board is shown as it is
         """
         # create all the tiles we need
         tile_x_count = self._get_num_columns()
         tile_y_count = self._get_num_rows()
 
-        tile_position = (0,0)
-        max_size = (0,0)
+        # the board holds the values; tiles only read from it
+        if puzzle_definition is not None:
+            self.board.load(puzzle_definition)
+        # the board as it is now is the start of the undo history
+        self.journal.reset()
+
+        # bigger grids get smaller tiles so they still fit on the screen
+        self._fit_tiles(screen)
+
         for i in range(tile_x_count * tile_y_count):
             # get the indexes for column, row, and box
             c_index, r_index, b_index = self._get_col_row_box(i)
 
             # we need a tile before anything else
-            t = self._create_tile(i, puzzle_definition[i])
+            t = self._create_tile(i)
 
             # pop it into the total group of tiles
             self.tiles.add(t)
@@ -77,23 +143,28 @@ class Grid(object):
                               self.columns[c_index])
 
             # make sure the tiles are in their correct locations
-            self._update_position(t, tile_position)
+            self._update_position(t)
 
         # reposition the boxes
         for i in range(len(self.boxes)):
-            x_offset = Grid.BOX_BORDER_WIDTH * (1 + (i % Grid.GRID_X_BOX_COUNT))
-            y_offset = Grid.BOX_BORDER_WIDTH * (1 + (i / Grid.GRID_Y_BOX_COUNT))
+            x_offset = Grid.BOX_BORDER_WIDTH * (1 + (i % self.grid_x_box_count))
+            y_offset = Grid.BOX_BORDER_WIDTH * (1 + (i // self.grid_x_box_count))
             self.boxes[i].move((x_offset, y_offset))
 
         # the last added tile will be the bottom-right corner; fetch that
-        # so we can resize the background
+        # so we know how big the board is
         max_tile = self.tiles.get_by_index(len(self.tiles) - 1)
         max_x, max_y = max_tile.rect.bottomright
         max_x += Grid.BOX_BORDER_WIDTH
         max_y += Grid.BOX_BORDER_WIDTH
-        self.background = pygame.transform.scale(self.background, (max_x, max_y))
+        # the tiles only hold their state; everything is drawn onto the one
+        # board surface, the cells as they change
+        self.renderer = renderer.BoardRenderer(self.board.layout, Tile.TILE_SIZE, (max_x, max_y),
+                                               [tile.rect for tile in self.tiles],
+                                               Grid.BOX_BORDER_COLOR)
+        self.background = self.renderer.surface
+        self._build_position_index()
 
-        self.tiles.draw(self.background)
         screen.blit(self.background, (0,0))
 
     def move_sel_in_direction(self, tile, direction):
@@ -105,21 +176,22 @@ class Grid(object):
         :return Tile:
         """
         new_tile = tile
-        row = tile.id / self._get_num_rows()
-        column = tile.id % self._get_num_columns()
+        layout = self.board.layout
+        row = layout.cell_row[tile.id]
+        column = layout.cell_column[tile.id]
 
         if direction == pygame.K_RIGHT:
-            if column < self._get_num_columns() - 1:
+            if column < layout.size - 1:
                 new_tile = self.tiles.get_by_index(tile.id + 1)
         elif direction == pygame.K_LEFT:
             if column > 0:
                 new_tile = self.tiles.get_by_index(tile.id - 1)
         elif direction == pygame.K_UP:
             if row > 0:
-                new_tile = self.tiles.get_by_index(tile.id - self._get_num_columns())
+                new_tile = self.tiles.get_by_index(tile.id - layout.size)
         elif direction == pygame.K_DOWN:
-            if row < self._get_num_rows() - 1:
-                new_tile = self.tiles.get_by_index(tile.id + self._get_num_columns())
+            if row < layout.size - 1:
+                new_tile = self.tiles.get_by_index(tile.id + layout.size)
 
         return new_tile
 
@@ -128,22 +200,69 @@ class Grid(object):
         Checks to see whether the entire grid is is_complete
         :return Boolean:
         """
-        for tile_group in itertools.chain(self.boxes, self.rows, self.columns):
-            if not tile_group.is_complete():
-                return False
-        return True
+        return self.board.is_complete()
+
+    def undo(self):
+        """
+        Takes back the last move
+        :return Boolean: whether there was a move to take back
+        """
+        return self._mark_dirty(self.journal.undo())
+
+    def redo(self):
+        """
+        Makes the last move taken back again
+        :return Boolean: whether there was a move to make
+        """
+        return self._mark_dirty(self.journal.redo())
+
+    def _mark_dirty(self, indexes):
+        """
+        Marks the tiles at the given indexes for redrawing
+        :param indexes: list of tile indexes
+        :return Boolean: whether there were any
+        """
+        for index in indexes:
+            self.tiles.get_by_index(index).dirty = 1
+        return len(indexes) > 0
+
+    def show_hint(self):
+        """
+        Finds the next logical step and highlights the cells involved in it
+        :return Hint: None if there's no step to show
+        """
+        self.clear_hint()
+        hint = self.hints.next_hint()
+        if hint is not None:
+            for index in sorted(set(hint.cells) | set(hint.affected_cells)):
+                tile = self.tiles.get_by_index(index)
+                tile.set_state("hinted", True)
+                self._hinted_tiles.append(tile)
+        return hint
+
+    def clear_hint(self):
+        """
+        Removes the highlight from the cells of the last hint shown
+        """
+        for tile in self._hinted_tiles:
+            tile.set_state("hinted", False)
+        self._hinted_tiles = []
 
     def get_tile_at_pos(self, position):
         """
         Gets the Tile which is at the given position (in real-world coordinates)
+        in constant time, whatever the size of the grid
         :param position: tuple of real-world coordinates (x, y)
-        :return Tile:
+        :return Tile: None if the position is on a border or off the grid
         """
         x_coord, y_coord = position
-        column = x_coord / Tile.TILE_WIDTH
-        row = y_coord / Tile.TILE_HEIGHT
-        index = (row * self._get_num_rows()) + column
-        return self.tiles.get_by_index(index)
+        if not (0 <= x_coord < len(self._column_at_x) and 0 <= y_coord < len(self._row_at_y)):
+            return None
+        column = self._column_at_x[x_coord]
+        row = self._row_at_y[y_coord]
+        if column < 0 or row < 0:
+            return None
+        return self.tiles.get_by_index((row * self._get_num_columns()) + column)
 
     def _init_group_list(self, group_list, count):
         """
@@ -152,175 +271,153 @@ class Grid(object):
         for i in range(count):
             group_list.append(TileContainer())
 
+    def _build_position_index(self):
+        """
+        Builds the lookups from pixel coordinates to column and row from where
+        the tiles actually ended up, so the box borders are accounted for.
+        Pixels on a border map to -1.
+        """
+        width, height = self.background.get_size()
+        num_columns = self._get_num_columns()
+        self._column_at_x = array('h', [-1] * width)
+        self._row_at_y = array('h', [-1] * height)
+        for column in range(num_columns):
+            rect = self.tiles.get_by_index(column).rect
+            for x in range(rect.left, rect.right):
+                self._column_at_x[x] = column
+        for row in range(self._get_num_rows()):
+            rect = self.tiles.get_by_index(row * num_columns).rect
+            for y in range(rect.top, rect.bottom):
+                self._row_at_y[y] = row
+
     def _get_col_row_box(self, tile_index):
         """
         Returns the column, row, and box index for the given tile index
         :param tile_index: index for the tile
         :return int:
         """
-        grid_width = Grid.BOX_X_TILE_COUNT * Grid.GRID_X_BOX_COUNT
-        col = tile_index % grid_width
-        row = tile_index / grid_width
-        box_x = col / Grid.GRID_X_BOX_COUNT
-        box_y = row / Grid.GRID_Y_BOX_COUNT
-        box = box_x + (box_y * Grid.GRID_X_BOX_COUNT)
+        layout = self.board.layout
+        return layout.cell_column[tile_index], layout.cell_row[tile_index], layout.cell_box[tile_index]
 
-        return col, row, box
+    def _update_position(self, tile):
+        layout = self.board.layout
+        tile.move_to((layout.cell_column[tile.id], layout.cell_row[tile.id]))
 
-    def _update_position(self, tile, position):
-        x, y = position
-        x = tile.id % (Grid.BOX_X_TILE_COUNT * Grid.GRID_X_BOX_COUNT)
-        y = tile.id / (Grid.BOX_Y_TILE_COUNT * Grid.GRID_Y_BOX_COUNT)
-        tile.move_to((x, y))
+    def _fit_tiles(self, screen):
+        """
+        Sizes the tiles so the whole grid, borders included, fits on the
+        screen, without growing them past their maximum size
+        :param screen: Surface the grid will be drawn on
+        """
+        screen_width, screen_height = screen.get_size()
+        border_x = Grid.BOX_BORDER_WIDTH * (self.grid_x_box_count + 1)
+        border_y = Grid.BOX_BORDER_WIDTH * (self.grid_y_box_count + 1)
+        width = min(Tile.MAX_TILE_WIDTH, (screen_width - border_x) // self._get_num_columns())
+        height = min(Tile.MAX_TILE_HEIGHT, (screen_height - border_y) // self._get_num_rows())
+        Tile.set_tile_size(min(width, height), min(width, height))
 
-    def _create_tile(self, id, puzzle_value):
+    def _create_tile(self, id):
         """
-        Return an individual tile
+        Return an individual tile, backed by this grid's board
 
-        :param color: A tuple describing the color of the tile
-        :return Surface:
+        :param id: index of the tile
+        :return Tile:
         """
-        t = Tile(id, puzzle_value)
+        t = Tile(id, self.board, self.tiles, self.journal)
         return t
 
     def _get_num_rows(self):
-        return Grid.BOX_Y_TILE_COUNT * Grid.GRID_Y_BOX_COUNT
+        return self.box_y_tile_count * self.grid_y_box_count
 
     def _get_num_columns(self):
-        return Grid.BOX_X_TILE_COUNT * Grid.GRID_X_BOX_COUNT
+        return self.box_x_tile_count * self.grid_x_box_count
 
     def _get_num_boxes(self):
-        return Grid.GRID_X_BOX_COUNT * Grid.GRID_Y_BOX_COUNT
+        return self.grid_x_box_count * self.grid_y_box_count
 
 
 class TileContainer(object):
-    def __init__(self, *sprites):
+    def __init__(self, *tiles):
         """
         constructor
-        :param *sprites: list, group, or single sprite
-        """
-        self.group = pygame.sprite.Group()
-        self.tile_list = []
-        self.complete = False
-        self.complete_flags = [False for i in range(9)]
-        for sprite in sprites:
-            self.group.add(sprite)
-            self.tile_list.append(sprite)
-
-    def __getattr__(self, name):
-        """
-        Allows all methods, except for the ones specified here, to go through
-        to the underlying group
-        :param name: name of the attribute to get
-        :return function:
+        :param *tiles: the tiles to start with
         """
-        return getattr(self.group, name)
+        self.tile_list = list(tiles)
 
-    def __add__(self, other):
+    def add(self, *tiles):
         """
-        How to handle adding an instance of TileContainer to something else
-        using the addition operator.
-        :param other: the item which we're adding to this instance
+        Adds tiles to this container
+        :param *tiles: the tiles to add
         """
-        if type(other) != TileContainer:
-            raise TypeError("Cannot add object of type %s to object of type TileContainer" % type(other))
-
-        both = []
-        for list in [self.tile_list, other.tile_list]:
-            for tile in list:
-                both.append(tile)
-        return TileContainer(both)
-
-    def add(self, *sprites):
-        """
-        Adds a sprite, group of sprites, or list of sprites to this container
-        and to the underlying group
-        :param *sprites: list, group, or single sprite
-        """
-        self.group.add(sprites)
-        for sprite in sprites:
-            self.tile_list.append(sprite)
+        self.tile_list.extend(tiles)
 
     def move(self, distance):
         """
-        Moves all sprites in this group by distance
+        Moves all tiles in this container by distance
         :param distance: tuple of (width, height)
         """
-        for tile in self.group:
+        for tile in self.tile_list:
             tile.move_relative(distance, False)
 
     def get_by_index(self, index):
         """
-        Fetches a single sprite by its index in the list
-        :param index: int the sprite's index
-        :return Sprite:
+        Fetches a single tile by its index in the list
+        :param index: int the tile's index
+        :return Tile:
         """
         return self.tile_list[index]
 
-    def add_value(self, value):
-        """
-        Adds a value to the list of values which are represented in this group.
-        Will not do any checking to see if this value is conflicted; therefore,
-        perform that check before calling this function
-        :param value: the new value (1-9) to add
-        """
-        self.complete_flags[value - 1] = True
-
-    def remove_value(self, value):
-        """
-        Removes a value from the list of values which are represented in this
-        group. Will not do any checking to see if this value is conflicted;
-        therefore, perform that check before calling this function
-        :param value: the new value (1-9) to remove
-        """
-        self.complete_flags[value - 1] = False
-
-    def is_complete(self):
-        """
-        Determines whether this group is complete
-        :return Boolean:
-        """
-        for flag in self.complete_flags:
-            if not flag:
-                return False
-
-        return True
-
     def update_all(self, grid):
         """
-        Updates all tiles in this group, checking for conflicts. Blits them onto
-        the provided grid
-        :param grid: Surface object
+        Redraws the tiles in this container which have changed since the
+        last call onto the provided grid's board
+        :param grid: Grid whose board the tiles are drawn on
+        :return list: the Rects which were redrawn; empty if nothing changed
         """
-        for tile in self.group:
-            tile.update()
-        self.group.draw(grid.background)
+        rects = []
+        draw_tile = grid.renderer.draw_tile
+        for tile in self.tile_list:
+            if not tile.dirty:
+                continue
+            tile.dirty = 0
+            rects.append(draw_tile(tile).copy())
+        return rects
 
     def __iter__(self):
-        return self.group.__iter__()
+        return iter(self.tile_list)
 
     def __len__(self):
         return len(self.tile_list)
 
 
-class Tile(pygame.sprite.DirtySprite):
-    TILE_WIDTH = 80
-    TILE_HEIGHT = 80
+class Tile(object):
+    """
+    The state of one cell as shown in the game: where it is on the board and
+    how it should look. Tiles have no surfaces of their own; the grid's
+    BoardRenderer draws them onto the board.
+    """
+    MAX_TILE_WIDTH = 80
+    MAX_TILE_HEIGHT = 80
+    TILE_WIDTH = MAX_TILE_WIDTH
+    TILE_HEIGHT = MAX_TILE_HEIGHT
     TILE_SIZE = TILE_WIDTH, TILE_HEIGHT
 
-    background = None
-    yellow_tint = None
-    light_grey_tint = None
-
-    DEFAULT_FONT = "Courier New Regular"
-    BOLD_FONT = "Courier New Bold"
+    __slots__ = ("id", "board", "tiles", "journal", "box", "row", "column", "group_completed",
+                 "selected", "group_selected", "hinted", "immutable", "dirty", "rect")
 
-    def __init__(self, id, init_value = None, *args, **kwargs):
+    def __init__(self, id, board, tiles=None, journal=None):
         """
-        Constructor for this object; builds the Surface as well
+        Constructor for this object
+        :param id: index of the tile, which is also its cell index in the board
+        :param board: the Board holding this tile's value
+        :param tiles: TileContainer of all the grid's tiles, by index; used to
+            redraw other tiles whose conflicts change because of this one
+        :param journal: Journal to record this tile's edits in, for undo
         """
-        super(Tile, self).__init__()
         self.id = id
+        self.board = board
+        self.tiles = tiles
+        self.journal = journal
         self.box = None
         self.row = None
         self.column = None
@@ -328,22 +425,26 @@ class Tile(pygame.sprite.DirtySprite):
         self.group_completed = False
         self.selected = False
         self.group_selected = False
+        self.hinted = False
 
-        self._divisions = None
-        self.value = init_value
-        self.immutable = False
-        self._conflicted = False
+        self.immutable = self.board.is_given(self.id)
+        # set when the tile needs drawing again
         self.dirty = 1
-        self.tint_surface = None
-
-        self._set_up_prototypes()
-        img = Tile.background.subsurface(Tile.background.get_rect())
-        self.image = img.convert()
-        self.rect = self.image.get_rect()
+        self.rect = pygame.Rect((0, 0), Tile.TILE_SIZE)
 
-        if self.value is not None:
-            self.immutable = True
 
+    @staticmethod
+    def set_tile_size(width, height):
+        """
+        Changes the size of all tiles created from now on
+        :param width: tile width, in pixels
+        :param height: tile height, in pixels
+        """
+        if (width, height) == Tile.TILE_SIZE:
+            return
+        Tile.TILE_WIDTH = width
+        Tile.TILE_HEIGHT = height
+        Tile.TILE_SIZE = width, height
 
     def set_tile_groups(self, box, row, column):
         """
@@ -356,26 +457,13 @@ class Tile(pygame.sprite.DirtySprite):
         self.row = row
         self.column = column
 
-        if self.value is not None:
-            self.row.add_value(self.value)
-            self.box.add_value(self.value)
-            self.column.add_value(self.value)
-
     @property
-    def divisions(self):
-        if self._divisions is None:
-            self._divisions = self.box + self.row + self.column
-        return self._divisions
+    def value(self):
+        return self.board.get_value(self.id)
 
     @property
     def conflicted(self):
-        return self._conflicted
-
-    @conflicted.setter
-    def conflicted(self, flag):
-        if flag != self._conflicted:
-            self.dirty = True
-        self._conflicted = flag
+        return self.board.is_conflicted(self.id)
 
     def move_relative(self, distance, use_tile_coords = True):
         """
@@ -413,53 +501,16 @@ class Tile(pygame.sprite.DirtySprite):
         if self.immutable:
             return
 
-        if self.value is not None:
-            self.box.remove_value(self.value)
-            self.column.remove_value(self.value)
-            self.row.remove_value(self.value)
-
-        self.value = value
+        # the board tracks conflicts as values change, and tells us which
+        # cells' conflicted state flipped; only those need redrawing
+        if self.journal is not None:
+            changed = self.journal.set_value(self.id, value)
+        else:
+            changed = self.board.set_value(self.id, value)
         self.dirty = 1
-
-        self._update_conflicts()
-
-        if not self.conflicted and self.value is not None:
-            self.box.add_value(self.value)
-            self.column.add_value(self.value)
-            self.row.add_value(self.value)
-
-    def _update_conflicts(self):
-        """
-        Checks all other tiles in this tile's groups for conflicting values.
-        Will perform resetting conflicted state of all tiles, suppressing the
-        setting again of a conflict state if the value is None
-        """
-        has_conflicts = False
-        for tile in self.divisions:
-            if tile is self:
-                continue
-            if self.value is not None and tile.value == self.value:
-                has_conflicts = True
-                tile.conflicted = True
-            else:
-                tile.conflicted = False
-
-        self.conflicted = has_conflicts
-
-
-    def get_font(self, bold = False):
-        """
-        Get the name of the font to use
-        :param bold: Whether the font should be bold
-        :return str:
-        """
-        return Tile.BOLD_FONT if bold else Tile.DEFAULT_FONT
-
-    def get_text_color(self):
-        """
-        Get the color for the font
-        """
-        return colors.BLACK
+        if self.tiles is not None:
+            for index in changed:
+                self.tiles.get_by_index(index).dirty = 1
 
     def on_click(self):
         """
@@ -471,88 +522,64 @@ class Tile(pygame.sprite.DirtySprite):
         """
         How to handle this tile being selected
         """
-        self.selected = True
-        for tile in self.divisions:
-            if tile is not self:
-                tile.group_selected = True
+        self.set_state("selected", True)
+        for tile in self.get_peers():
+            tile.set_state("group_selected", True)
 
     def on_deselect(self):
         """
         How to handle this tile being deselected
         """
-        for tile in self.divisions:
-            tile.group_selected = False
-            tile.selected = False
+        self.set_state("selected", False)
+        for tile in self.get_peers():
+            tile.set_state("group_selected", False)
 
-    def on_edit(self, key):
+    def get_peers(self):
         """
-        Performs some edit operation on this tile
-        :param key: pygame constant for the value of the key
+        Gets the tiles sharing a row, column, or box with this one, from the
+        board's shared peer table
+        :return generator: of Tile
         """
-        if key == pygame.K_BACKSPACE or key == pygame.K_DELETE:
-            self.set_value(None)
-
-
-    def _set_up_prototypes(self):
-        if Tile.background is None:
-            img = pygame.image.load("assets/tile.png").convert()
-            Tile.background = pygame.transform.scale(img, Tile.TILE_SIZE)
-
+        get_by_index = self.tiles.get_by_index
+        return (get_by_index(index) for index in self.board.layout.peers[self.id])
 
-    #
-    #
-    # Visual update methods
-    #
-    #
-    def update(self):
+    def set_state(self, name, flag):
         """
-        Updates the display for this tile
+        Sets one of the tile's display flags, such as selected, marking the
+        tile for redrawing only if the flag actually changed
+        :param name: name of the flag attribute
+        :param flag: Boolean
         """
-        if self.dirty < 1:
-            # let's just try updating all of them
-            pass
-            #return
-        self._update_background()
-        self._update_text()
-        self.dirty = 2 if self.dirty == 2 else 0
+        if getattr(self, name) != flag:
+            setattr(self, name, flag)
+            self.dirty = 1
 
-    def _update_background(self):
+    def on_edit(self, key):
         """
-        Updates the background imagery based on the tile's current state
+        Performs some edit operation on this tile
+        :param key: pygame constant for the value of the key
         """
-        self.image.blit(self.background, (0,0))
-
-        alpha = 64
-        color = None
-        if self.conflicted:
-            color = colors.RED
-        elif self.selected:
-            color = colors.YELLOW
-            alpha = 128
-        elif self.group_selected:
-            color = colors.BLUE
-        elif self.group_completed:
-            color = colors.GREEN
-
-        if color is not None:
-            tint = pygame.Surface(Tile.TILE_SIZE)
-            tint.set_alpha(alpha)
-            tint.fill(color)
-            self.image.blit(tint, (0,0))
+        if key == pygame.K_BACKSPACE or key == pygame.K_DELETE:
+            if self.value is None:
+                self.clear_notes()
+            else:
+                self.set_value(None)
 
-    def _update_text(self, *args):
+    def toggle_note(self, value):
         """
-        Updates the text display for this tile
+        Adds a value to this tile's notes, or removes it if it's there. Tiles
+        holding a value don't take notes.
+        :param value: the value to note
         """
-        if self.value is None:
+        if self.immutable or self.value is not None:
             return
-        bold = self.immutable or self.conflicted
-        color = colors.MEDIUM_GREY if not self.immutable else colors.BLACK
-        color = color if not self.conflicted else colors.RED
-        label_font = pygame.font.SysFont(self.get_font(bold), 32)
-        label = label_font.render(str(self.value), 1, color)
-
-        label_rect = label.get_rect()
-        label_rect.centerx = Tile.TILE_WIDTH / 2
-        label_rect.centery = Tile.TILE_HEIGHT / 2
-        self.image.blit(label, label_rect)
\ No newline at end of file
+        self.board.toggle_note(self.id, value)
+        self.dirty = 1
+
+    def clear_notes(self):
+        """
+        Removes all of this tile's notes
+        """
+        if self.board.notes[self.id]:
+            self.board.clear_notes(self.id)
+            self.dirty = 1
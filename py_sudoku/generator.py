@@ -0,0 +1,280 @@
+"""
+Generates puzzles with a unique solution at a requested difficulty:
+
+    python generator.py -n 1000 -d hard --seed 20240101 --workers 4 > daily.txt
+
+Generation is reproducible: the same seed, count, and difficulty always give
+the same puzzles, however many workers are used.
+"""
+__author__ = 'josh'
+
+import argparse
+import multiprocessing
+import random
+import sys
+
+import geometry
+import puzzle_io
+import solver
+
+
+EASY = "easy"
+MEDIUM = "medium"
+HARD = "hard"
+EXPERT = "expert"
+DIFFICULTIES = (EASY, MEDIUM, HARD, EXPERT)
+
+# puzzles that need search are hard if the solver gets through them in at
+# most this many nodes, and expert otherwise
+HARD_MAX_NODES = 3
+
+# full grids to try before giving up on reaching the difficulty
+DEFAULT_ATTEMPTS = 50
+
+
+class GenerationError(Exception):
+    pass
+
+
+def grade(puzzle, layout=None):
+    """
+    Grades a puzzle by the techniques needed to solve it:
+
+    easy - hidden singles alone
+    medium - naked singles as well
+    hard - a little trial and error
+    expert - a lot of trial and error
+    :param puzzle: list of values, None or 0 for blanks
+    :param layout: board Layout; worked out from the puzzle's length if not given
+    :return str: one of DIFFICULTIES
+    """
+    if layout is None:
+        layout = geometry.get_layout_for_cells(len(puzzle))
+    tables = solver.get_tables(layout)
+    cells = [value or 0 for value in puzzle]
+    candidates = _get_candidates(cells, tables)
+
+    difficulty = EASY
+    while 0 in cells:
+        if _place_hidden_singles(cells, candidates, tables):
+            continue
+        if _place_naked_singles(cells, candidates, tables):
+            difficulty = MEDIUM
+            continue
+        stats = solver.SolveStats()
+        solver.solve(puzzle, stats, layout)
+        return HARD if stats.nodes <= HARD_MAX_NODES else EXPERT
+    return difficulty
+
+
+def generate_one(difficulty=None, rng=None, layout=None, symmetric=True, attempts=DEFAULT_ATTEMPTS):
+    """
+    Generates a puzzle: builds a random full grid, then removes clues in a
+    random order for as long as the solution stays unique and the puzzle
+    doesn't get harder than asked for. Grids which end up too easy are
+    thrown away and another is tried.
+    :param difficulty: one of DIFFICULTIES; None for any
+    :param rng: random.Random to draw from
+    :param layout: board Layout; the standard 9x9 one if not given
+    :param symmetric: remove clues in pairs, keeping the puzzle symmetric
+        under a half turn
+    :param attempts: full grids to try before giving up
+    :return list: the puzzle, in the list format used by Grid.create_grid
+    """
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise ValueError("Unknown difficulty %r; choose from %s" % (difficulty, ", ".join(DIFFICULTIES)))
+    if rng is None:
+        rng = random.Random()
+    if layout is None:
+        layout = geometry.get_layout()
+    limit = DIFFICULTIES.index(difficulty) if difficulty is not None else len(DIFFICULTIES) - 1
+
+    for attempt in range(attempts):
+        puzzle = _random_solution(layout, rng)
+        order = list(range(layout.cell_count))
+        rng.shuffle(order)
+        for index in order:
+            if puzzle[index] is None:
+                continue
+            removed = set([index])
+            if symmetric:
+                removed.add(layout.cell_count - 1 - index)
+            saved = [(i, puzzle[i]) for i in removed]
+            for i in removed:
+                puzzle[i] = None
+            if (solver.count_solutions(puzzle, 2, layout) != 1 or
+                    DIFFICULTIES.index(grade(puzzle, layout)) > limit):
+                for i, value in saved:
+                    puzzle[i] = value
+
+        if difficulty is None or grade(puzzle, layout) == difficulty:
+            return puzzle
+    raise GenerationError("No %s puzzle found in %d attempts" % (difficulty, attempts))
+
+
+def generate(n, difficulty=None, seed=None, workers=1, layout=None, symmetric=True):
+    """
+    Generates puzzles in bulk. Each puzzle gets its own random generator
+    seeded from seed and its position, so results don't depend on workers.
+    :param n: number of puzzles
+    :param difficulty: one of DIFFICULTIES; None for any
+    :param seed: integer seed; a random one if not given
+    :param workers: number of processes to generate in
+    :param layout: board Layout; the standard 9x9 one if not given
+    :param symmetric: keep the puzzles symmetric under a half turn
+    :return list: the puzzles
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(32)
+    if layout is None:
+        layout = geometry.get_layout()
+    jobs = [(difficulty, seed, i, layout.box_width, layout.box_height, symmetric) for i in range(n)]
+    if workers <= 1:
+        return [_generate_job(job) for job in jobs]
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        puzzles = pool.map(_generate_job, jobs, chunksize=max(1, n // (workers * 4)))
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+    return puzzles
+
+
+def _generate_job(job):
+    difficulty, seed, index, box_width, box_height, symmetric = job
+    rng = random.Random(seed * 1000003 + index)
+    return generate_one(difficulty, rng, geometry.get_layout(box_width, box_height), symmetric)
+
+
+def _random_solution(layout, rng):
+    """
+    Builds a random full grid by solving the empty puzzle, trying candidates
+    in a random order
+    :return list:
+    """
+    tables = solver.get_tables(layout)
+    stats = solver.SolveStats()
+    cells, candidates = solver.initial_state([None] * layout.cell_count, tables, stats)
+    result = _random_search(cells, candidates, tables, rng, stats)
+    return list(result)
+
+
+def _random_search(cells, candidates, tables, rng, stats):
+    best = -1
+    best_count = tables.size + 1
+    for i in range(tables.cell_count):
+        mask = candidates[i]
+        if mask:
+            count = tables.bit_count[mask]
+            if count < best_count:
+                best = i
+                best_count = count
+    if best < 0:
+        return cells
+
+    values = [value for value in range(1, tables.size + 1) if candidates[best] & (1 << (value - 1))]
+    rng.shuffle(values)
+    for value in values:
+        next_cells = cells[:]
+        next_candidates = candidates[:]
+        if solver.propagate(next_cells, next_candidates, [(best, value)], tables, stats):
+            result = _random_search(next_cells, next_candidates, tables, rng, stats)
+            if result is not None:
+                return result
+    return None
+
+
+def _get_candidates(cells, tables):
+    candidates = []
+    for index, value in enumerate(cells):
+        if value:
+            candidates.append(0)
+            continue
+        used = 0
+        for peer in tables.peers[index]:
+            if cells[peer]:
+                used |= 1 << (cells[peer] - 1)
+        candidates.append(tables.full_mask & ~used)
+    return candidates
+
+
+def _place(cells, candidates, tables, index, value):
+    cells[index] = value
+    candidates[index] = 0
+    bit = ~(1 << (value - 1))
+    for peer in tables.peers[index]:
+        candidates[peer] &= bit
+
+
+def _place_hidden_singles(cells, candidates, tables):
+    """
+    Places every value which has only one possible cell in some unit
+    :return Boolean: whether anything was placed
+    """
+    placed = False
+    for unit in tables.units:
+        once = twice = 0
+        for index in unit:
+            mask = candidates[index]
+            twice |= once & mask
+            once |= mask
+        hidden = once & ~twice
+        while hidden:
+            bit = hidden & -hidden
+            hidden ^= bit
+            for index in unit:
+                if candidates[index] & bit:
+                    _place(cells, candidates, tables, index, bit.bit_length())
+                    placed = True
+                    break
+    return placed
+
+
+def _place_naked_singles(cells, candidates, tables):
+    """
+    Places every cell which has only one candidate left
+    :return Boolean: whether anything was placed
+    """
+    placed = False
+    for index, mask in enumerate(candidates):
+        if mask and not mask & (mask - 1):
+            _place(cells, candidates, tables, index, mask.bit_length())
+            placed = True
+    return placed
+
+
+def main(argv=None):
+    """
+    Entry point for the command line
+    :param argv: the arguments, without the program name
+    :return int: exit status
+    """
+    parser = argparse.ArgumentParser(description="Generate sudoku puzzles with unique solutions.")
+    parser.add_argument("-n", "--count", type=int, default=1, help="number of puzzles (default: %(default)s)")
+    parser.add_argument("-d", "--difficulty", choices=DIFFICULTIES, help="difficulty band (default: any)")
+    parser.add_argument("-s", "--seed", type=int, help="seed, for reproducible output")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="number of worker processes; 0 for one per CPU (default: %(default)s)")
+    parser.add_argument("-b", "--box-size", type=int, default=geometry.BOX_WIDTH,
+                        help="width and height of the boxes; 3 gives 9x9 puzzles (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    workers = args.workers or multiprocessing.cpu_count()
+    layout = geometry.get_layout(args.box_size, args.box_size)
+    try:
+        puzzles = generate(args.count, args.difficulty, args.seed, workers, layout)
+    except GenerationError as e:
+        sys.stderr.write("error: %s\n" % e)
+        return 1
+    for puzzle in puzzles:
+        sys.stdout.write(puzzle_io.format_puzzle(puzzle) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
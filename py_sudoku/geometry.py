@@ -0,0 +1,98 @@
+"""
+Geometry of the board: which row, column, and box each cell is in, the
+cells of each unit, and the peers of each cell. The tables are built once
+per board shape and shared by everything which needs them, from the game
+to the solvers, so none of them has to work out positions as it goes.
+"""
+__author__ = 'josh'
+
+
+# the standard board is 9x9, made of 3x3 boxes
+BOX_WIDTH = 3
+BOX_HEIGHT = 3
+
+# largest supported board is 25x25; every value needs a symbol in
+# board.SYMBOLS
+MAX_SIZE = 25
+
+
+class Layout(object):
+    """
+    Lookup tables for one shape of board. A board of boxes box_width wide and
+    box_height tall has box_width * box_height rows, columns, boxes, and
+    values. Layouts are immutable and shared; use get_layout to fetch one.
+
+    A unit is a row, column, or box, and units lists the cells of all of
+    them: rows first, then columns, then boxes. The peers of a cell are the
+    other cells sharing a unit with it.
+    """
+
+    def __init__(self, box_width, box_height):
+        """
+        Constructor
+        :param box_width: number of columns in a box
+        :param box_height: number of rows in a box
+        """
+        size = box_width * box_height
+        if box_width < 1 or box_height < 1 or size > MAX_SIZE:
+            raise ValueError("Unsupported box size %dx%d" % (box_width, box_height))
+        self.box_width = box_width
+        self.box_height = box_height
+        self.size = size
+        self.cell_count = size * size
+        self.full_mask = (1 << size) - 1
+
+        # boxes across the board is the number of rows in a box, and vice versa
+        self.boxes_across = box_height
+        self.boxes_down = box_width
+
+        self.cell_row = tuple(i // size for i in range(self.cell_count))
+        self.cell_column = tuple(i % size for i in range(self.cell_count))
+        self.cell_box = tuple((self.cell_row[i] // box_height) * self.boxes_across +
+                              self.cell_column[i] // box_width
+                              for i in range(self.cell_count))
+
+        # the cells in each row, column, and box
+        cells = range(self.cell_count)
+        self.rows = tuple(tuple(i for i in cells if self.cell_row[i] == r) for r in range(size))
+        self.columns = tuple(tuple(i for i in cells if self.cell_column[i] == c) for c in range(size))
+        self.boxes = tuple(tuple(i for i in cells if self.cell_box[i] == b) for b in range(size))
+        self.units = self.rows + self.columns + self.boxes
+        # the other cells sharing a row, column, or box with each cell
+        self.peers = tuple(tuple(sorted(set(self.rows[self.cell_row[i]] +
+                                            self.columns[self.cell_column[i]] +
+                                            self.boxes[self.cell_box[i]]) - set([i])))
+                           for i in cells)
+
+    def __repr__(self):
+        return "Layout(%d, %d)" % (self.box_width, self.box_height)
+
+
+_layouts = {}
+
+
+def get_layout(box_width=BOX_WIDTH, box_height=BOX_HEIGHT):
+    """
+    Gets the shared Layout for boxes of the given size
+    :param box_width: number of columns in a box
+    :param box_height: number of rows in a box
+    :return Layout:
+    """
+    key = (box_width, box_height)
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = _layouts[key] = Layout(box_width, box_height)
+    return layout
+
+
+def get_layout_for_cells(cell_count):
+    """
+    Gets the Layout for a board with square boxes and the given number of
+    cells; e.g. 81 gives the standard 9x9 board and 256 gives 16x16
+    :param cell_count: total number of cells
+    :return Layout:
+    """
+    box = int(round(cell_count ** 0.25))
+    if box ** 4 != cell_count:
+        raise ValueError("%d cells does not make a square board of square boxes" % cell_count)
+    return get_layout(box, box)
@@ -0,0 +1,369 @@
+__author__ = 'josh'
+
+import itertools
+
+import board
+import solver
+
+
+CONFLICT = "conflict"
+HIDDEN_SINGLE = "hidden single"
+NAKED_SINGLE = "naked single"
+POINTING = "pointing"
+CLAIMING = "claiming"
+NAKED_PAIR = "naked pair"
+HIDDEN_PAIR = "hidden pair"
+NAKED_TRIPLE = "naked triple"
+HIDDEN_TRIPLE = "hidden triple"
+X_WING = "x-wing"
+
+# cheapest first; a hint comes from the first of these which applies
+TECHNIQUES = (HIDDEN_SINGLE, NAKED_SINGLE, POINTING, CLAIMING, NAKED_PAIR,
+              HIDDEN_PAIR, NAKED_TRIPLE, HIDDEN_TRIPLE, X_WING)
+
+
+class Hint(object):
+    """
+    One logical step: the technique used, the cells which make up the
+    pattern, and the values it places or rules out
+    """
+
+    def __init__(self, technique, cells, placements=(), eliminations=(), description=""):
+        """
+        Constructor
+        :param technique: one of TECHNIQUES, or CONFLICT
+        :param cells: indexes of the cells making up the pattern
+        :param placements: list of (index, value) the step fills in
+        :param eliminations: list of (index, value) the step rules out
+        :param description: the step in words
+        """
+        self.technique = technique
+        self.cells = tuple(cells)
+        self.placements = list(placements)
+        self.eliminations = list(eliminations)
+        self.description = description
+
+    @property
+    def affected_cells(self):
+        """
+        Indexes of the cells the step changes, in order
+        """
+        return sorted(set(index for index, value in self.placements + self.eliminations))
+
+    def to_dict(self):
+        """
+        Gets the hint in a form which can be serialized
+        :return dict:
+        """
+        return {
+            "technique": self.technique,
+            "cells": list(self.cells),
+            "placements": [list(placement) for placement in self.placements],
+            "eliminations": [list(elimination) for elimination in self.eliminations],
+            "description": self.description,
+        }
+
+    def __repr__(self):
+        return "<Hint %s: %s>" % (self.technique, self.description)
+
+
+class HintEngine(object):
+    """
+    Finds the next logical step on a Board, trying the cheapest techniques
+    first.
+
+    Candidates come from the board's row, column, and box masks, less the
+    values which earlier hints ruled out. They are worked out in full once,
+    then kept up to date from the cells the board has filled since, so a
+    hint only touches the peers of the values placed since the last one.
+    Eliminations are remembered so each hint moves the solve forward; when a
+    value is taken off the board the candidates are worked out again and
+    the eliminations forgotten, since they may have depended on it.
+    """
+
+    def __init__(self, board):
+        """
+        Constructor
+        :param board: the Board to give hints for
+        """
+        self.board = board
+        self.tables = solver.get_tables(board.layout)
+        self._candidates = None
+        self._removals = board.removals
+        # how much of the board's placed list the candidates take in
+        self._placed = 0
+        self._finders = {
+            HIDDEN_SINGLE: self._find_hidden_single,
+            NAKED_SINGLE: self._find_naked_single,
+            POINTING: self._find_pointing,
+            CLAIMING: self._find_claiming,
+            NAKED_PAIR: lambda candidates: self._find_naked_subset(candidates, 2, NAKED_PAIR),
+            HIDDEN_PAIR: lambda candidates: self._find_hidden_subset(candidates, 2, HIDDEN_PAIR),
+            NAKED_TRIPLE: lambda candidates: self._find_naked_subset(candidates, 3, NAKED_TRIPLE),
+            HIDDEN_TRIPLE: lambda candidates: self._find_hidden_subset(candidates, 3, HIDDEN_TRIPLE),
+            X_WING: self._find_x_wing,
+        }
+
+    def get_candidates(self):
+        """
+        Gets the values each cell could still hold, as bitmasks
+        :return list: a mask per cell; 0 for filled cells. It is kept for
+            the next call, so mustn't be changed.
+        """
+        b = self.board
+        if self._candidates is None or b.removals != self._removals:
+            self._removals = b.removals
+            self._candidates = self._compute_candidates()
+        else:
+            candidates = self._candidates
+            cells = b.cells
+            peers = b.layout.peers
+            for index in b.placed[self._placed:]:
+                candidates[index] = 0
+                clear = ~(1 << (cells[index] - 1))
+                for peer in peers[index]:
+                    candidates[peer] &= clear
+        self._placed = len(b.placed)
+        return self._candidates
+
+    def _compute_candidates(self):
+        """
+        Works out every cell's candidates from the board's masks
+        """
+        b = self.board
+        layout = b.layout
+        cells = b.cells
+        row_masks = b.row_masks
+        column_masks = b.column_masks
+        box_masks = b.box_masks
+        full_mask = layout.full_mask
+        candidates = [0] * b.cell_count
+        for index in range(b.cell_count):
+            if not cells[index]:
+                used = (row_masks[layout.cell_row[index]] | column_masks[layout.cell_column[index]] |
+                        box_masks[layout.cell_box[index]])
+                candidates[index] = full_mask & ~used
+        return candidates
+
+    def next_hint(self, techniques=TECHNIQUES):
+        """
+        Finds the next logical step. Values which the step rules out are
+        remembered, so asking again gives the step after.
+        :param techniques: the techniques to try, cheapest first
+        :return Hint: None if the board is solved or none of the techniques
+            apply
+        """
+        if any(self.board.conflicts):
+            cells = [i for i, flag in enumerate(self.board.conflicts) if flag]
+            return Hint(CONFLICT, cells, description="%s clash; fix them first" % self._cell_list(cells))
+
+        candidates = self.get_candidates()
+        for technique in techniques:
+            hint = self._finders[technique](candidates)
+            if hint is not None:
+                for index, value in hint.eliminations:
+                    candidates[index] &= ~(1 << (value - 1))
+                return hint
+        return None
+
+    def _find_hidden_single(self, candidates):
+        for unit_index, unit in enumerate(self.tables.units):
+            once = twice = 0
+            for index in unit:
+                mask = candidates[index]
+                twice |= once & mask
+                once |= mask
+            hidden = once & ~twice
+            if not hidden:
+                continue
+            bit = hidden & -hidden
+            for index in unit:
+                if candidates[index] & bit:
+                    value = bit.bit_length()
+                    return Hint(HIDDEN_SINGLE, (index,), placements=[(index, value)],
+                                description="%s can only go in %s in %s" % (
+                                    _symbol(value), self._cell_name(index), self._unit_name(unit_index)))
+
+    def _find_naked_single(self, candidates):
+        for index, mask in enumerate(candidates):
+            if mask and not mask & (mask - 1):
+                value = mask.bit_length()
+                return Hint(NAKED_SINGLE, (index,), placements=[(index, value)],
+                            description="%s can only be %s" % (self._cell_name(index), _symbol(value)))
+
+    def _find_pointing(self, candidates):
+        """
+        A value which can only go in one row or column of a box can't go
+        anywhere else in that row or column
+        """
+        layout = self.board.layout
+        for box, box_cells in enumerate(layout.boxes):
+            for value in range(1, layout.size + 1):
+                bit = 1 << (value - 1)
+                cells = [i for i in box_cells if candidates[i] & bit]
+                if len(cells) < 2:
+                    continue
+                for cell_line, lines, name in ((layout.cell_row, layout.rows, "row"),
+                                               (layout.cell_column, layout.columns, "column")):
+                    line = cell_line[cells[0]]
+                    if any(cell_line[i] != line for i in cells):
+                        continue
+                    eliminations = [(i, value) for i in lines[line]
+                                    if layout.cell_box[i] != box and candidates[i] & bit]
+                    if eliminations:
+                        return Hint(POINTING, cells, eliminations=eliminations,
+                                    description="in box %d, %s can only go in %s %d, so not elsewhere in it" % (
+                                        box + 1, _symbol(value), name, line + 1))
+
+    def _find_claiming(self, candidates):
+        """
+        A value which can only go in one box along a row or column can't go
+        anywhere else in that box
+        """
+        layout = self.board.layout
+        for lines, name in ((layout.rows, "row"), (layout.columns, "column")):
+            for line, line_cells in enumerate(lines):
+                for value in range(1, layout.size + 1):
+                    bit = 1 << (value - 1)
+                    cells = [i for i in line_cells if candidates[i] & bit]
+                    if len(cells) < 2:
+                        continue
+                    box = layout.cell_box[cells[0]]
+                    if any(layout.cell_box[i] != box for i in cells):
+                        continue
+                    eliminations = [(i, value) for i in layout.boxes[box]
+                                    if i not in line_cells and candidates[i] & bit]
+                    if eliminations:
+                        return Hint(CLAIMING, cells, eliminations=eliminations,
+                                    description="in %s %d, %s can only go in box %d, so not elsewhere in it" % (
+                                        name, line + 1, _symbol(value), box + 1))
+
+    def _find_naked_subset(self, candidates, size, technique):
+        """
+        When size cells of a unit can only hold the same size values between
+        them, those values can't go anywhere else in the unit
+        """
+        bit_count = self.tables.bit_count
+        for unit_index, unit in enumerate(self.tables.units):
+            open_cells = [i for i in unit if candidates[i] and bit_count[candidates[i]] <= size]
+            if len(open_cells) < size:
+                continue
+            for group in itertools.combinations(open_cells, size):
+                mask = 0
+                for index in group:
+                    mask |= candidates[index]
+                if bit_count[mask] != size:
+                    continue
+                eliminations = [(i, value) for i in unit if i not in group
+                                for value in _values(candidates[i] & mask)]
+                if eliminations:
+                    return Hint(technique, group, eliminations=eliminations,
+                                description="%s in %s can only be %s" % (
+                                    self._cell_list(group), self._unit_name(unit_index),
+                                    _value_list(_values(mask))))
+
+    def _find_hidden_subset(self, candidates, size, technique):
+        """
+        When size values can only go in the same size cells of a unit, those
+        cells can't hold anything else
+        """
+        bit_count = self.tables.bit_count
+        for unit_index, unit in enumerate(self.tables.units):
+            # where in the unit each value can go, as a mask of positions
+            places = []
+            for value in range(1, self.tables.size + 1):
+                bit = 1 << (value - 1)
+                positions = 0
+                for position, index in enumerate(unit):
+                    if candidates[index] & bit:
+                        positions |= 1 << position
+                if 2 <= bit_count[positions] <= size:
+                    places.append((value, positions))
+            if len(places) < size:
+                continue
+            for group in itertools.combinations(places, size):
+                positions = 0
+                mask = 0
+                for value, value_positions in group:
+                    positions |= value_positions
+                    mask |= 1 << (value - 1)
+                if bit_count[positions] != size:
+                    continue
+                cells = [unit[position] for position in _positions(positions)]
+                eliminations = [(i, value) for i in cells for value in _values(candidates[i] & ~mask)]
+                if eliminations:
+                    return Hint(technique, cells, eliminations=eliminations,
+                                description="%s can only go in %s in %s" % (
+                                    _value_list(_values(mask)), self._cell_list(cells), self._unit_name(unit_index)))
+
+    def _find_x_wing(self, candidates):
+        """
+        When a value can only go in the same two places along two rows, it
+        must take one of those places in each of the two columns crossing
+        them, so it can't go elsewhere in those columns; and the same with
+        rows and columns swapped
+        """
+        layout = self.board.layout
+        for lines, crossing, names in ((layout.rows, layout.columns, ("rows", "columns")),
+                                       (layout.columns, layout.rows, ("columns", "rows"))):
+            for value in range(1, layout.size + 1):
+                bit = 1 << (value - 1)
+                # lines where the value has exactly two places, by those places
+                pairs = {}
+                for line, line_cells in enumerate(lines):
+                    positions = [p for p, i in enumerate(line_cells) if candidates[i] & bit]
+                    if len(positions) == 2:
+                        pairs.setdefault(tuple(positions), []).append(line)
+                for positions, wing_lines in sorted(pairs.items()):
+                    for first, second in itertools.combinations(wing_lines, 2):
+                        eliminations = [(i, value) for p in positions
+                                        for line, i in enumerate(crossing[p])
+                                        if line not in (first, second) and candidates[i] & bit]
+                        if eliminations:
+                            cells = sorted(lines[line][p] for line in (first, second) for p in positions)
+                            return Hint(X_WING, cells, eliminations=eliminations,
+                                        description="%s in %s %d and %d can only go in %s %d and %d" % (
+                                            _symbol(value), names[0], first + 1, second + 1,
+                                            names[1], positions[0] + 1, positions[1] + 1))
+
+    def _cell_name(self, index):
+        layout = self.board.layout
+        return "r%dc%d" % (layout.cell_row[index] + 1, layout.cell_column[index] + 1)
+
+    def _cell_list(self, cells):
+        return _join([self._cell_name(index) for index in cells])
+
+    def _unit_name(self, unit_index):
+        size = self.tables.size
+        kind = ("row", "column", "box")[unit_index // size]
+        return "%s %d" % (kind, unit_index % size + 1)
+
+
+def _values(mask):
+    """
+    Gets the values in a candidate mask, in order
+    """
+    values = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        values.append(bit.bit_length())
+    return values
+
+
+def _positions(mask):
+    return [value - 1 for value in _values(mask)]
+
+
+def _symbol(value):
+    return board.SYMBOLS[value - 1]
+
+
+def _value_list(values):
+    return _join([_symbol(value) for value in values])
+
+
+def _join(words):
+    if len(words) < 2:
+        return "".join(words)
+    return "%s and %s" % (", ".join(words[:-1]), words[-1])
@@ -0,0 +1,196 @@
+"""
+Frame timing for the game loop. A FrameProfiler times each phase of a
+frame, and how long it takes from a key press being picked up to the
+change being on screen. Its numbers can be drawn over the game and
+written out as a CSV or JSON trace.
+
+When instrumentation is off the game uses NULL_PROFILER, whose methods do
+nothing, so the loop is the same either way and the cost is a few empty
+calls a frame.
+"""
+__author__ = 'josh'
+
+import collections
+import csv
+import itertools
+import json
+import timeit
+
+import pygame
+
+import latency
+
+
+EVENTS = "events"
+UPDATE = "update"
+BLIT = "blit"
+DISPLAY = "display"
+PHASES = (EVENTS, UPDATE, BLIT, DISPLAY)
+
+# frames and key presses kept for the trace; older ones are dropped
+MAX_SAMPLES = 100000
+# frames averaged over for the overlay
+OVERLAY_FRAMES = 60
+
+CSV_FORMAT = "csv"
+JSON_FORMAT = "json"
+
+
+class FrameProfiler(object):
+    """
+    Times the phases of each frame of the game loop, and the latency from
+    key press to pixels
+    """
+    enabled = True
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        # (start, seconds for each phase, dirty rects) for each frame
+        self.frames = collections.deque(maxlen=MAX_SAMPLES)
+        self.key_latencies = collections.deque(maxlen=MAX_SAMPLES)
+        self.key_latency = latency.LatencyHistogram()
+        self.frame_count = 0
+        self._key_time = None
+        self._font = None
+        # the game may turn profiling on part way through a frame; that frame
+        # is timed from here
+        self.start_frame()
+
+    def start_frame(self):
+        """
+        Marks the start of a frame, just after its events have been fetched
+        """
+        self._start = self._last = timeit.default_timer()
+        self._phases = dict.fromkeys(PHASES, 0.0)
+        self._key_time = None
+
+    def mark(self, phase):
+        """
+        Records the time since the last mark as spent in a phase
+        :param phase: one of PHASES
+        """
+        now = timeit.default_timer()
+        self._phases[phase] += now - self._last
+        self._last = now
+
+    def key_pressed(self):
+        """
+        Notes that a key press was handled this frame; the latency is taken
+        from when the frame's events were fetched
+        """
+        if self._key_time is None:
+            self._key_time = self._start
+
+    def end_frame(self, rect_count):
+        """
+        Marks the end of a frame
+        :param rect_count: number of rects updated on the screen; key presses
+            are only counted as reaching the screen if there were some
+        """
+        phases = self._phases
+        self.frames.append((self._start,) + tuple(phases[phase] for phase in PHASES) + (rect_count,))
+        self.frame_count += 1
+        if self._key_time is not None and rect_count:
+            seconds = self._last - self._key_time
+            self.key_latencies.append(seconds)
+            self.key_latency.record(seconds)
+
+    def get_averages(self, frame_count=OVERLAY_FRAMES):
+        """
+        Gets the average time spent in each phase over the latest frames
+        :param frame_count: number of frames to average over
+        :return dict: seconds by phase
+        """
+        recent = list(itertools.islice(reversed(self.frames), frame_count))
+        averages = {}
+        for i, phase in enumerate(PHASES):
+            averages[phase] = sum(frame[i + 1] for frame in recent) / len(recent) if recent else 0.0
+        return averages
+
+    def get_summary_lines(self):
+        """
+        Gets the numbers shown in the overlay
+        :return list: of str
+        """
+        averages = self.get_averages()
+        lines = ["%-8s %s" % (phase, latency.format_seconds(averages[phase])) for phase in PHASES]
+        lines.append("key->px p50 %s" % latency.format_seconds(self.key_latency.percentile(50)))
+        lines.append("key->px p99 %s" % latency.format_seconds(self.key_latency.percentile(99)))
+        lines.append("frames   %d" % self.frame_count)
+        return lines
+
+    def draw_overlay(self, screen, position, background):
+        """
+        Draws the overlay onto the screen
+        :param screen: Surface to draw on
+        :param position: tuple of (x, y) for the overlay's top-left corner
+        :param background: color to clear the overlay's area with
+        :return Rect: the area drawn over
+        """
+        if self._font is None:
+            self._font = pygame.font.SysFont("Courier New Regular", 16)
+        line_height = self._font.get_linesize()
+        lines = self.get_summary_lines()
+        width = max(self._font.size(line)[0] for line in lines)
+        rect = pygame.Rect(position, (width, line_height * len(lines)))
+        screen.fill(background, rect)
+        x, y = position
+        for i, line in enumerate(lines):
+            screen.blit(self._font.render(line, 1, (0, 0, 0)), (x, y + i * line_height))
+        return rect
+
+    def export(self, path, format=None):
+        """
+        Writes the trace out to a file
+        :param path: path of the file
+        :param format: CSV_FORMAT or JSON_FORMAT; by default taken from the
+            file name, and JSON unless it ends with .csv
+        """
+        if format is None:
+            format = CSV_FORMAT if path.lower().endswith(".csv") else JSON_FORMAT
+        if format == CSV_FORMAT:
+            with open(path, "w") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(("start",) + PHASES + ("rects",))
+                writer.writerows(self.frames)
+        elif format == JSON_FORMAT:
+            with open(path, "w") as f:
+                json.dump(self.to_dict(), f)
+        else:
+            raise ValueError("Unknown trace format %r" % format)
+
+    def to_dict(self):
+        """
+        Gets the trace in a form which can be serialized
+        :return dict:
+        """
+        return {
+            "phases": list(PHASES),
+            "frames": [list(frame) for frame in self.frames],
+            "key_latencies": list(self.key_latencies),
+            "key_latency": self.key_latency.summary(),
+        }
+
+
+class NullProfiler(object):
+    """
+    Stands in for a FrameProfiler when instrumentation is off
+    """
+    enabled = False
+
+    def start_frame(self):
+        pass
+
+    def mark(self, phase):
+        pass
+
+    def key_pressed(self):
+        pass
+
+    def end_frame(self, rect_count):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,281 @@
+__author__ = 'josh'
+
+import json
+from array import array
+
+import board
+import geometry
+import puzzle_io
+
+
+# bits used for a value in a packed move; enough for the 25x25 board
+VALUE_BITS = 5
+VALUE_MASK = (1 << VALUE_BITS) - 1
+
+JOURNAL_VERSION = 1
+
+
+class Journal(object):
+    """
+    History of the edits made to a Board, for undo, redo, and replay.
+
+    Each move is packed into one integer holding the cell, its old value, and
+    its new value. Every snapshot_interval moves the board's cells are saved
+    as a snapshot, so jumping anywhere in the history restores the nearest
+    snapshot and replays at most snapshot_interval moves from it, however
+    long the session has been.
+
+    When the board prunes notes as values are placed, the cells whose notes
+    each move pruned are kept too, so taking the move back puts them back.
+    """
+    SNAPSHOT_INTERVAL = 64
+
+    def __init__(self, board, snapshot_interval=SNAPSHOT_INTERVAL):
+        """
+        Constructor; the board's current state is the start of the history
+        :param board: the Board whose edits to record
+        :param snapshot_interval: moves between snapshots
+        """
+        self.board = board
+        self.snapshot_interval = snapshot_interval
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the history, starting again from the board's current state
+        """
+        self.moves = array('L')
+        # moves currently applied; those after it can be redone
+        self.position = 0
+        # the board's cells after every snapshot_interval moves
+        self.snapshots = [self.board.cells.tobytes()]
+        # the cells whose notes lost the new value, by the index of the move
+        # which pruned them; only moves which pruned something are here
+        self.pruned = {}
+
+    def __len__(self):
+        return len(self.moves)
+
+    def can_undo(self):
+        return self.position > 0
+
+    def can_redo(self):
+        return self.position < len(self.moves)
+
+    def set_value(self, index, value):
+        """
+        Sets the value of a cell on the board, recording the move. Any moves
+        which had been undone are dropped.
+        :param index: index of the cell
+        :param value: the new value, or None to clear the cell
+        :return list: indexes of the cells which need redrawing
+        """
+        old = self.board.cells[index]
+        new = value or 0
+        if new == old:
+            return []
+        pruned = self._get_prunable(index, new)
+        changed = self.board.set_value(index, value)
+
+        del self.moves[self.position:]
+        del self.snapshots[self.position // self.snapshot_interval + 1:]
+        for position in [position for position in self.pruned if position >= self.position]:
+            del self.pruned[position]
+        if pruned:
+            self.pruned[self.position] = pruned
+        self.moves.append(_pack(index, old, new))
+        self.position += 1
+        if self.position % self.snapshot_interval == 0:
+            self.snapshots.append(self.board.cells.tobytes())
+        return [index] + changed
+
+    def undo(self):
+        """
+        Takes back the last move
+        :return list: indexes of the cells which need redrawing; empty if
+            there was nothing to undo
+        """
+        if not self.can_undo():
+            return []
+        return self._step_back()
+
+    def redo(self):
+        """
+        Makes the last move taken back again
+        :return list: indexes of the cells which need redrawing; empty if
+            there was nothing to redo
+        """
+        if not self.can_redo():
+            return []
+        return self._step_forward()
+
+    def jump_to(self, position):
+        """
+        Puts the board as it was after the given number of moves
+        :param position: 0 for the start, up to len(self) for the latest move
+        :return list: indexes of the cells which need redrawing
+        """
+        if position < 0 or position > len(self.moves):
+            raise ValueError("Position must be between 0 and %d, got %d" % (len(self.moves), position))
+        changed = []
+        if abs(position - self.position) > self.snapshot_interval:
+            changed.extend(self._restore(position // self.snapshot_interval))
+        while self.position < position:
+            changed.extend(self._step_forward())
+        while self.position > position:
+            changed.extend(self._step_back())
+        return sorted(set(changed))
+
+    def to_dict(self):
+        """
+        Gets the history in a form which can be serialized, to replay a
+        session later
+        :return dict:
+        """
+        layout = self.board.layout
+        return {
+            "version": JOURNAL_VERSION,
+            "box_width": layout.box_width,
+            "box_height": layout.box_height,
+            "start": puzzle_io.format_puzzle(array('B', self.snapshots[0])),
+            "moves": [list(_unpack(move)) for move in self.moves],
+            "position": self.position,
+        }
+
+    def dumps(self):
+        """
+        Gets the history as JSON
+        :return str:
+        """
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    @classmethod
+    def from_dict(cls, data, snapshot_interval=SNAPSHOT_INTERVAL):
+        """
+        Replays a serialized history onto a new board
+        :param data: dict, as from to_dict
+        :param snapshot_interval: moves between snapshots
+        :return Journal: at the position the history was saved at; its board
+            is the journal's board attribute
+        """
+        if data.get("version") != JOURNAL_VERSION:
+            raise ValueError("Unsupported journal version %r" % data.get("version"))
+        layout = geometry.get_layout(data["box_width"], data["box_height"])
+        journal = cls(board.Board(puzzle_io.parse_puzzle(data["start"], layout), layout), snapshot_interval)
+        for index, old, new in data["moves"]:
+            if journal.board.cells[index] != old:
+                raise ValueError("Move %d expects %d in cell %d, found %d" % (
+                    len(journal.moves) + 1, old, index, journal.board.cells[index]))
+            journal.set_value(index, new)
+        journal.jump_to(data["position"])
+        return journal
+
+    @classmethod
+    def loads(cls, text, snapshot_interval=SNAPSHOT_INTERVAL):
+        """
+        Replays a history saved as JSON
+        :param text: the JSON, as from dumps
+        :param snapshot_interval: moves between snapshots
+        :return Journal:
+        """
+        return cls.from_dict(json.loads(text), snapshot_interval)
+
+    def _step_forward(self):
+        index, old, new = _unpack(self.moves[self.position])
+        # the notes may have changed since the move was first made
+        self._record_pruned(self.position, index, new)
+        self.position += 1
+        return [index] + self.board.set_value(index, new)
+
+    def _step_back(self):
+        self.position -= 1
+        index, old, new = _unpack(self.moves[self.position])
+        # the notes the move pruned are put back; restoring the old value
+        # doesn't prune again, so notes added since the move are kept
+        return [index] + self.board.set_value(index, old, prune=False) + self._unprune(self.position, new)
+
+    def _get_prunable(self, index, value):
+        """
+        Gets the cells whose notes the board will prune when a value is
+        placed
+        :return tuple: indexes of the cells
+        """
+        if not value or not self.board.auto_prune_notes:
+            return ()
+        bit = 1 << (value - 1)
+        notes = self.board.notes
+        return tuple(peer for peer in self.board.layout.peers[index] if notes[peer] & bit)
+
+    def _record_pruned(self, position, index, value):
+        """
+        Records the cells whose notes a move is about to prune
+        :param position: index of the move
+        :param index: index of the cell the move sets
+        :param value: the value the move places
+        :return tuple: indexes of the cells
+        """
+        pruned = self._get_prunable(index, value)
+        if pruned:
+            self.pruned[position] = pruned
+        else:
+            self.pruned.pop(position, None)
+        return pruned
+
+    def _unprune(self, position, value):
+        """
+        Puts back the notes a move pruned
+        :param position: index of the move
+        :param value: the value the move placed
+        :return list: indexes of the cells whose notes changed
+        """
+        pruned = self.pruned.get(position, ())
+        if not pruned:
+            return []
+        bit = 1 << (value - 1)
+        notes = self.board.notes
+        for cell in pruned:
+            notes[cell] |= bit
+        return list(pruned)
+
+    def _restore(self, snapshot):
+        """
+        Puts the board as it was at a snapshot, touching only the cells which
+        differ from it
+        :param snapshot: index into snapshots
+        :return list: indexes of the cells which need redrawing
+        """
+        changed = []
+        position = snapshot * self.snapshot_interval
+        # going forward, the moves skipped over prune notes in turn, as redo
+        # would have; a value placed and then replaced still prunes
+        notes = self.board.notes
+        for skipped in range(self.position, position):
+            index, old, new = _unpack(self.moves[skipped])
+            pruned = self._record_pruned(skipped, index, new)
+            for cell in pruned:
+                notes[cell] &= ~(1 << (new - 1))
+            changed.extend(pruned)
+
+        # the notes are taken care of move by move, so restoring the cells
+        # doesn't prune them
+        cells = self.board.cells
+        for index, value in enumerate(array('B', self.snapshots[snapshot])):
+            if cells[index] != value:
+                changed.append(index)
+                changed.extend(self.board.set_value(index, value, prune=False))
+
+        # going back, the notes pruned by the moves skipped over are put back
+        # in the order undo would have
+        for skipped in range(self.position - 1, position - 1, -1):
+            index, old, new = _unpack(self.moves[skipped])
+            changed.extend(self._unprune(skipped, new))
+        self.position = position
+        return changed
+
+
+def _pack(index, old, new):
+    return (index << (2 * VALUE_BITS)) | (old << VALUE_BITS) | new
+
+
+def _unpack(move):
+    return move >> (2 * VALUE_BITS), (move >> VALUE_BITS) & VALUE_MASK, move & VALUE_MASK
@@ -0,0 +1,112 @@
+__author__ = 'josh'
+
+import math
+
+
+class LatencyHistogram(object):
+    """
+    Records durations into logarithmic buckets so percentiles can be reported
+    for any number of samples in constant memory. Each bucket is GROWTH times
+    wider than the one before it, so a percentile is accurate to within that
+    ratio (4% by default).
+    """
+    GROWTH = 1.04
+    MIN_SECONDS = 1e-6
+    MAX_SECONDS = 3600.0
+
+    def __init__(self):
+        """
+        Constructor
+        """
+        self._log_growth = math.log(LatencyHistogram.GROWTH)
+        bucket_count = int(math.log(LatencyHistogram.MAX_SECONDS / LatencyHistogram.MIN_SECONDS) /
+                           self._log_growth) + 1
+        self.buckets = [0] * bucket_count
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        """
+        Adds a sample
+        :param seconds: the duration to record
+        """
+        self.buckets[self._get_bucket(seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other):
+        """
+        Adds all the samples of another histogram to this one
+        :param other: LatencyHistogram
+        """
+        for i, count in enumerate(other.buckets):
+            self.buckets[i] += count
+        self.count += other.count
+        self.total += other.total
+        for sample in (other.min, other.max):
+            if sample is not None:
+                self.min = sample if self.min is None else min(self.min, sample)
+                self.max = sample if self.max is None else max(self.max, sample)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent):
+        """
+        Gets the duration below which the given percentage of samples fall
+        :param percent: 0 to 100
+        :return float: the duration in seconds, or 0.0 with no samples
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, int(math.ceil(self.count * percent / 100.0)))
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                # report the top of the bucket, but never past what was seen
+                upper = LatencyHistogram.MIN_SECONDS * LatencyHistogram.GROWTH ** (i + 1)
+                return max(self.min, min(upper, self.max))
+        return self.max
+
+    def summary(self, percents=(50, 90, 99)):
+        """
+        Gets the headline numbers as a dict, for reports and serialization
+        :param percents: the percentiles to include
+        :return dict:
+        """
+        result = {
+            "count": self.count,
+            "mean": self.mean,
+            "min": self.min or 0.0,
+            "max": self.max or 0.0,
+        }
+        for percent in percents:
+            result["p%g" % percent] = self.percentile(percent)
+        return result
+
+    def _get_bucket(self, seconds):
+        if seconds <= LatencyHistogram.MIN_SECONDS:
+            return 0
+        bucket = int(math.log(seconds / LatencyHistogram.MIN_SECONDS) / self._log_growth)
+        return min(bucket, len(self.buckets) - 1)
+
+
+def format_seconds(seconds):
+    """
+    Formats a duration with a sensible unit
+    :param seconds: the duration
+    :return str:
+    """
+    if seconds < 1e-3:
+        return "%.1fus" % (seconds * 1e6)
+    if seconds < 1.0:
+        return "%.2fms" % (seconds * 1e3)
+    return "%.2fs" % seconds
@@ -0,0 +1,324 @@
+"""
+A library of puzzles on disk, in a SQLite database. Each puzzle is stored
+with its difficulty, clue count, and a hash of its canonical form, all
+indexed, so a puzzle is fetched by id, by difficulty, or by clue count
+without reading anything else in the library:
+
+    python library.py import library.db puzzles.txt
+    python library.py import library.db quizzes.csv --difficulty hard
+    python library.py stats library.db
+    python library.py random library.db --difficulty expert
+
+Within each difficulty the puzzles are numbered from 0 as they are added,
+so a random puzzle of a difficulty is one lookup of a random number on the
+(difficulty, rank) index. Puzzles which are the same as one already in the
+library, up to relabelling and rearranging, are skipped when importing.
+"""
+__author__ = 'josh'
+
+import argparse
+import hashlib
+import io
+import random
+import sqlite3
+import sys
+
+import canonical
+import generator
+import geometry
+import puzzle_io
+import solver
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    id INTEGER PRIMARY KEY,
+    puzzle TEXT NOT NULL,
+    box_width INTEGER NOT NULL,
+    box_height INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    clues INTEGER NOT NULL,
+    canonical_hash TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS puzzles_difficulty ON puzzles (difficulty, rank);
+CREATE INDEX IF NOT EXISTS puzzles_clues ON puzzles (clues);
+CREATE UNIQUE INDEX IF NOT EXISTS puzzles_canonical_hash ON puzzles (canonical_hash);
+CREATE TABLE IF NOT EXISTS difficulty_counts (
+    difficulty TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+# puzzles added between commits when importing
+DEFAULT_BATCH_SIZE = 1000
+
+
+class LibraryEntry(object):
+    """
+    A puzzle from the library
+    """
+
+    def __init__(self, id, text, layout, difficulty, clues, canonical_hash):
+        """
+        Constructor
+        :param id: the puzzle's id in the library
+        :param text: the puzzle in its one-line text form
+        :param layout: board Layout of the puzzle
+        :param difficulty: one of generator.DIFFICULTIES
+        :param clues: number of values given
+        :param canonical_hash: hash of the puzzle's canonical form
+        """
+        self.id = id
+        self.text = text
+        self.layout = layout
+        self.difficulty = difficulty
+        self.clues = clues
+        self.canonical_hash = canonical_hash
+
+    @property
+    def puzzle(self):
+        """
+        The puzzle in the list format used by Grid.create_grid
+        """
+        return puzzle_io.parse_puzzle(self.text, self.layout)
+
+    def __repr__(self):
+        return "<LibraryEntry %d: %s, %d clues>" % (self.id, self.difficulty, self.clues)
+
+
+class PuzzleLibrary(object):
+    """
+    A library of puzzles in a SQLite database, created if it doesn't exist
+    """
+    _COLUMNS = "id, puzzle, box_width, box_height, difficulty, clues, canonical_hash"
+
+    def __init__(self, path):
+        """
+        Constructor
+        :param path: path of the database
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COALESCE(SUM(count), 0) FROM difficulty_counts").fetchone()[0]
+
+    def count(self, difficulty=None):
+        """
+        Counts the puzzles in the library
+        :param difficulty: only count puzzles of this difficulty, if given
+        :return int:
+        """
+        if difficulty is None:
+            return len(self)
+        row = self.connection.execute("SELECT count FROM difficulty_counts WHERE difficulty = ?",
+                                      (difficulty,)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, id):
+        """
+        Gets a puzzle by its id
+        :param id: the puzzle's id
+        :return LibraryEntry: or None if there's no such puzzle
+        """
+        return self._fetch_one("WHERE id = ?", (id,))
+
+    def get_random(self, difficulty=None, rng=None):
+        """
+        Gets a puzzle at random
+        :param difficulty: one of generator.DIFFICULTIES, or None for any
+        :param rng: random.Random to pick with; the module's by default
+        :return LibraryEntry: or None if there are no puzzles to pick from
+        """
+        rng = rng or random
+        if difficulty is not None:
+            count = self.count(difficulty)
+            if not count:
+                return None
+            return self._fetch_one("WHERE difficulty = ? AND rank = ?", (difficulty, rng.randrange(count)))
+        # ids are only ever added, so they run from 1 with no gaps
+        count = len(self)
+        if not count:
+            return None
+        return self.get(rng.randrange(count) + 1)
+
+    def get_by_clues(self, clues, limit=100):
+        """
+        Gets puzzles with a given number of clues
+        :param clues: number of values given
+        :param limit: most puzzles to get
+        :return list: of LibraryEntry, in the order they were added
+        """
+        cursor = self.connection.execute("SELECT %s FROM puzzles WHERE clues = ? ORDER BY id LIMIT ?" %
+                                         PuzzleLibrary._COLUMNS, (clues, limit))
+        return [self._make_entry(row) for row in cursor]
+
+    def find(self, puzzle, layout=None):
+        """
+        Looks for a puzzle, or any relabelled or rearranged copy of it
+        :param puzzle: list of values, None or 0 for blanks
+        :param layout: board Layout; worked out from the puzzle if not given
+        :return LibraryEntry: or None if it isn't in the library
+        """
+        return self._fetch_one("WHERE canonical_hash = ?", (get_canonical_hash(puzzle, layout),))
+
+    def add(self, puzzle, difficulty=None, layout=None):
+        """
+        Adds a puzzle, unless a copy of it is already in the library. The
+        change isn't committed; call commit, or use import_puzzles.
+        :param puzzle: list of values, None or 0 for blanks
+        :param difficulty: one of generator.DIFFICULTIES; graded if not given
+        :param layout: board Layout; worked out from the puzzle if not given
+        :return int: the new puzzle's id, or None if it was a copy
+        """
+        if layout is None:
+            layout = geometry.get_layout_for_cells(len(puzzle))
+        if difficulty is None:
+            difficulty = generator.grade(puzzle, layout)
+        elif difficulty not in generator.DIFFICULTIES:
+            raise ValueError("Unknown difficulty %r; choose from %s" %
+                             (difficulty, ", ".join(generator.DIFFICULTIES)))
+        canonical_hash = get_canonical_hash(puzzle, layout)
+        if self.connection.execute("SELECT 1 FROM puzzles WHERE canonical_hash = ?",
+                                   (canonical_hash,)).fetchone():
+            return None
+
+        rank = self.count(difficulty)
+        cursor = self.connection.execute(
+            "INSERT INTO puzzles (puzzle, box_width, box_height, difficulty, rank, clues, canonical_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (puzzle_io.format_puzzle(puzzle), layout.box_width, layout.box_height, difficulty, rank,
+             sum(1 for value in puzzle if value), canonical_hash))
+        self.connection.execute("INSERT OR REPLACE INTO difficulty_counts (difficulty, count) VALUES (?, ?)",
+                                (difficulty, rank + 1))
+        return cursor.lastrowid
+
+    def commit(self):
+        self.connection.commit()
+
+    def import_puzzles(self, puzzles, difficulty=None, check=False, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Adds puzzles in bulk, committing every batch_size puzzles
+        :param puzzles: iterable of (line_number, puzzle_text), as from
+            puzzle_io.read_puzzles
+        :param difficulty: difficulty of every puzzle; graded if not given
+        :param check: skip puzzles without exactly one solution
+        :param batch_size: puzzles added between commits
+        :return tuple: (puzzles added, copies skipped, puzzles rejected by
+            the check)
+        """
+        added = copies = rejected = 0
+        pending = 0
+        try:
+            for line_number, text in puzzles:
+                try:
+                    puzzle = puzzle_io.parse_puzzle(text)
+                except ValueError as e:
+                    raise ValueError("line %d: %s" % (line_number, e))
+                if check and solver.count_solutions(puzzle) != 1:
+                    rejected += 1
+                    continue
+                if self.add(puzzle, difficulty) is None:
+                    copies += 1
+                else:
+                    added += 1
+                pending += 1
+                if pending >= batch_size:
+                    self.commit()
+                    pending = 0
+        finally:
+            self.commit()
+        return added, copies, rejected
+
+    def _fetch_one(self, where, parameters):
+        row = self.connection.execute("SELECT %s FROM puzzles %s" % (PuzzleLibrary._COLUMNS, where),
+                                      parameters).fetchone()
+        return self._make_entry(row) if row else None
+
+    def _make_entry(self, row):
+        id, text, box_width, box_height, difficulty, clues, canonical_hash = row
+        return LibraryEntry(id, text, geometry.get_layout(box_width, box_height), difficulty, clues, canonical_hash)
+
+
+def get_canonical_hash(puzzle, layout=None):
+    """
+    Gets a hash of a puzzle's canonical form, the same for any relabelled or
+    rearranged copy of it
+    :param puzzle: list of values, None or 0 for blanks
+    :param layout: board Layout; worked out from the puzzle if not given
+    :return str: hex digest
+    """
+    form, transform = canonical.canonicalize(puzzle, layout)
+    return hashlib.sha1(form.encode("ascii")).hexdigest()
+
+
+def main(argv=None):
+    """
+    Entry point for the command line
+    :param argv: the arguments, without the program name
+    :return int: exit status
+    """
+    parser = argparse.ArgumentParser(description="Manage a library of sudoku puzzles.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    import_parser = commands.add_parser("import", help="add puzzles from a file")
+    import_parser.add_argument("library", help="library database, created if it doesn't exist")
+    import_parser.add_argument("input", help="puzzle file, or - for stdin")
+    import_parser.add_argument("-f", "--format", choices=puzzle_io.FORMATS,
+                               help="input format; by default guessed from the file name")
+    import_parser.add_argument("-d", "--difficulty", choices=generator.DIFFICULTIES,
+                               help="difficulty of every puzzle (default: grade each one)")
+    import_parser.add_argument("--check", action="store_true",
+                               help="skip puzzles without exactly one solution")
+
+    stats_parser = commands.add_parser("stats", help="count the puzzles of each difficulty")
+    stats_parser.add_argument("library", help="library database")
+
+    random_parser = commands.add_parser("random", help="print a puzzle at random")
+    random_parser.add_argument("library", help="library database")
+    random_parser.add_argument("-d", "--difficulty", choices=generator.DIFFICULTIES,
+                               help="difficulty of the puzzle (default: any)")
+    args = parser.parse_args(argv)
+
+    with PuzzleLibrary(args.library) as library:
+        if args.command == "import":
+            format = args.format or puzzle_io.guess_format(args.input)
+            stream = sys.stdin if args.input == "-" else io.open(args.input, "r", newline="")
+            try:
+                added, copies, rejected = library.import_puzzles(puzzle_io.read_puzzles(stream, format),
+                                                                 args.difficulty, args.check)
+            except ValueError as e:
+                sys.stderr.write("error: %s\n" % e)
+                return 1
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+            sys.stderr.write("added %d puzzles, skipped %d copies and %d without one solution\n" %
+                             (added, copies, rejected))
+        elif args.command == "stats":
+            for difficulty in generator.DIFFICULTIES:
+                print("%-8s %d" % (difficulty, library.count(difficulty)))
+            print("%-8s %d" % ("total", len(library)))
+        else:
+            entry = library.get_random(args.difficulty)
+            if entry is None:
+                sys.stderr.write("error: no puzzles to choose from\n")
+                return 1
+            print(entry.text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+__author__ = 'josh'
+
+import csv
+
+import board
+import geometry
+
+
+LINE_FORMAT = "line"
+CSV_FORMAT = "csv"
+FORMATS = (LINE_FORMAT, CSV_FORMAT)
+
+# characters which stand for an empty cell in the text formats
+BLANKS = ".0"
+
+
+def parse_puzzle(text, layout=None):
+    """
+    Parses a puzzle from its one-line text form, e.g. the common 81 character
+    format where each character is a value and "." or "0" is a blank. Values
+    above 9 are letters, as in board.SYMBOLS.
+    :param text: the puzzle text, without separators
+    :param layout: board Layout; worked out from the length if not given
+    :return list: the puzzle in the list format used by Grid.create_grid
+    """
+    if layout is None:
+        layout = geometry.get_layout_for_cells(len(text))
+    elif len(text) != layout.cell_count:
+        raise ValueError("Puzzle must have %d cells, got %d" % (layout.cell_count, len(text)))
+
+    puzzle = []
+    for character in text:
+        if character in BLANKS:
+            puzzle.append(None)
+            continue
+        value = board.SYMBOLS.find(character.upper()) + 1
+        if value < 1 or value > layout.size:
+            raise ValueError("Invalid character %r in puzzle" % character)
+        puzzle.append(value)
+    return puzzle
+
+
+def format_puzzle(puzzle):
+    """
+    Writes a puzzle or solution in its one-line text form
+    :param puzzle: list of values, None or 0 for blanks
+    :return str:
+    """
+    return "".join(board.SYMBOLS[value - 1] if value else "." for value in puzzle)
+
+
+def guess_format(path):
+    """
+    Works out the format of a puzzle file from its name
+    :param path: path to the file
+    :return str: one of FORMATS
+    """
+    return CSV_FORMAT if path.lower().endswith(".csv") else LINE_FORMAT
+
+
+def read_puzzles(lines, format=LINE_FORMAT):
+    """
+    Reads puzzles from an iterable of lines, such as an open file, one at a
+    time; nothing is held on to after it has been yielded, so files of any
+    size can be read in constant memory.
+
+    In the line format each non-blank line is a puzzle, and lines starting
+    with "#" are comments. In the CSV format the puzzle is the first field of
+    each row, and a header row is skipped.
+    :param lines: iterable of lines
+    :param format: one of FORMATS
+    :return generator: yields (line_number, puzzle_text) tuples
+    """
+    if format == LINE_FORMAT:
+        return _read_line_format(lines)
+    if format == CSV_FORMAT:
+        return _read_csv_format(lines)
+    raise ValueError("Unknown puzzle format %r; choose from %s" % (format, ", ".join(FORMATS)))
+
+
+def _read_line_format(lines):
+    for line_number, line in enumerate(lines, 1):
+        text = line.strip()
+        if text and not text.startswith("#"):
+            yield line_number, text
+
+
+def _read_csv_format(lines):
+    for line_number, row in enumerate(csv.reader(lines), 1):
+        if not row:
+            continue
+        text = row[0].strip()
+        if line_number == 1 and not _looks_like_puzzle(text):
+            # header row
+            continue
+        if text:
+            yield line_number, text
+
+
+def _looks_like_puzzle(text):
+    """
+    Checks that the text is made only of blanks and value symbols
+    """
+    symbols = BLANKS + board.SYMBOLS
+    return all(character.upper() in symbols for character in text)
@@ -2,5 +2,10 @@
 __author__ = 'josh'
 
 puzzles = [
-    [1,None,None,None,9,3,None,5,2,9,None,None,None,6,None,1,3,None,None,4,3,5,None,None,None,9,8,3,None,None,None,7,None,None,8,None,None,None,None,8,None,4,None,None,None,None,8,None,None,5,None,None,None,7,6,2,None,None,None,9,8,7,None,None,1,7,None,8,None,None,None,6,8,3,None,6,2,None,None,None,5]
+    [1,None,None,None,9,3,None,5,2,9,None,None,None,6,None,1,3,None,None,4,3,5,None,None,None,9,8,3,None,None,None,7,None,None,8,None,None,None,None,8,None,4,None,None,None,None,8,None,None,5,None,None,None,7,6,2,None,None,None,9,8,7,None,None,1,7,None,8,None,None,None,6,8,3,None,6,2,None,None,None,5],
+    [None,None,3,None,2,None,6,None,None,9,None,None,3,None,5,None,None,1,None,None,1,8,None,6,4,None,None,None,None,8,1,None,2,9,None,None,7,None,None,None,None,None,None,None,8,None,None,6,7,None,8,2,None,None,None,None,2,6,None,9,5,None,None,8,None,None,2,None,3,None,None,9,None,None,5,None,1,None,3,None,None],
+    [2,None,None,None,8,None,3,None,None,None,6,None,None,7,None,None,8,4,None,3,None,5,None,None,2,None,9,None,None,None,1,None,5,4,None,8,None,None,None,None,None,None,None,None,None,4,None,2,7,None,6,None,None,None,3,None,1,None,None,7,None,4,None,7,2,None,None,4,None,None,6,None,None,None,4,None,1,None,None,None,3],
+    [None,None,None,None,None,None,9,None,7,None,None,None,4,2,None,1,8,None,None,None,None,7,None,5,None,2,6,1,None,None,9,None,4,None,None,None,None,5,None,None,None,None,None,4,None,None,None,None,5,None,7,None,None,9,9,2,None,1,None,8,None,None,None,None,3,4,None,5,9,None,None,None,5,None,7,None,None,None,None,None,None],
+    [None,3,None,None,5,None,None,4,None,None,None,8,None,1,None,5,None,None,4,6,None,None,None,None,None,1,2,None,7,None,5,None,2,None,8,None,None,None,None,6,None,3,None,None,None,None,4,None,1,None,9,None,3,None,2,5,None,None,None,None,None,9,8,None,None,1,None,2,None,6,None,None,None,8,None,None,6,None,None,2,None],
+    [None,2,None,8,1,None,7,4,None,7,None,None,None,None,3,1,None,None,None,9,None,None,None,2,8,None,5,None,None,9,None,4,None,None,8,7,4,None,None,2,None,8,None,None,3,1,6,None,None,3,None,2,None,None,3,None,2,7,None,None,None,6,None,None,None,5,6,None,None,None,None,8,None,7,6,None,5,1,None,9,None]
 ]
\ No newline at end of file
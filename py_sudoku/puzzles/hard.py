@@ -0,0 +1,19 @@
+# coding=utf-8
+__author__ = 'josh'
+
+# 17-clue puzzles which need a fair amount of search, the last of them built
+# to make naive backtracking crawl
+
+puzzles = [
+    [4,None,None,None,None,None,8,None,5,None,3,None,None,None,None,None,None,None,None,None,None,7,None,None,None,None,None,None,2,None,None,None,None,None,6,None,None,None,None,None,8,None,4,None,None,None,None,None,None,1,None,None,None,None,None,None,None,6,None,3,None,7,None,5,None,None,2,None,None,None,None,None,1,None,4,None,None,None,None,None,None],
+    [5,2,None,None,None,6,None,None,None,None,None,None,None,None,None,7,None,1,3,None,None,None,None,None,None,None,None,None,None,None,4,None,None,8,None,None,6,None,None,None,None,None,None,5,None,None,None,None,None,None,None,None,None,None,None,4,1,8,None,None,None,None,None,None,None,None,None,3,None,None,2,None,None,None,8,7,None,None,None,None,None],
+    [6,None,None,None,None,None,8,None,3,None,4,None,7,None,None,None,None,None,None,None,None,None,None,None,None,None,None,None,None,None,5,None,4,None,7,None,3,None,None,2,None,None,None,None,None,1,None,6,None,None,None,None,None,None,None,2,None,None,None,None,None,5,None,None,None,None,None,8,None,6,None,None,None,None,None,None,1,None,None,None,None],
+    [4,8,None,3,None,None,None,None,None,None,None,None,None,None,None,None,7,1,None,2,None,None,None,None,None,None,None,7,None,5,None,None,None,None,6,None,None,None,None,2,None,None,8,None,None,None,None,None,None,None,None,None,None,None,None,None,1,None,7,6,None,None,None,3,None,None,None,None,None,4,None,None,None,None,None,None,5,None,None,None,None],
+    [None,None,None,None,1,4,None,None,None,None,3,None,None,None,None,2,None,None,None,7,None,None,None,None,None,None,None,None,None,None,9,None,None,None,3,None,6,None,1,None,None,None,None,None,None,None,None,None,None,None,None,None,8,None,2,None,None,None,None,None,1,None,4,None,None,None,None,5,None,6,None,None,None,None,None,7,None,8,None,None,None],
+    [None,None,None,None,None,None,5,2,None,None,8,None,4,None,None,None,None,None,None,3,None,None,None,9,None,None,None,5,None,1,None,None,None,6,None,None,2,None,None,7,None,None,None,None,None,None,None,None,3,None,None,None,None,None,6,None,None,None,1,None,None,None,None,None,None,None,None,None,None,7,None,4,None,None,None,None,None,None,None,3,None],
+    [6,None,2,None,5,None,None,None,None,None,None,None,None,None,3,None,4,None,None,None,None,None,None,None,None,None,None,4,3,None,None,None,8,None,None,None,None,1,None,None,None,None,2,None,None,None,None,None,None,None,None,7,None,None,5,None,None,2,7,None,None,None,None,None,None,None,None,None,None,None,8,1,None,None,None,6,None,None,None,None,None],
+    [None,5,2,4,None,None,None,None,None,None,None,None,None,7,None,1,None,None,None,None,None,None,None,None,None,None,None,None,None,None,8,None,2,None,None,None,3,None,None,None,None,None,6,None,None,None,9,None,5,None,None,None,None,None,1,None,6,None,3,None,None,None,None,None,None,None,None,None,None,None,8,9,7,None,None,None,None,None,None,None,None],
+    [6,None,2,None,5,None,None,None,None,None,None,None,None,None,4,None,3,None,None,None,None,None,None,None,None,None,None,4,3,None,None,None,8,None,None,None,None,1,None,None,None,None,2,None,None,None,None,None,None,None,None,7,None,None,5,None,None,2,7,None,None,None,None,None,None,None,None,None,None,None,8,1,None,None,None,6,None,None,None,None,None],
+    [None,9,2,3,None,None,None,None,None,None,None,None,None,8,None,1,None,None,None,None,None,None,None,None,None,None,None,1,None,7,None,4,None,None,None,None,None,None,None,None,None,None,None,6,5,8,None,None,None,None,None,None,None,None,None,6,None,5,None,2,None,None,None,4,None,None,None,None,None,7,None,None,None,None,None,9,None,None,None,None,None],
+    [None,None,None,None,None,None,None,None,None,None,None,None,None,None,3,None,8,5,None,None,1,None,2,None,None,None,None,None,None,None,5,None,7,None,None,None,None,None,4,None,None,None,1,None,None,None,9,None,None,None,None,None,None,None,5,None,None,None,None,None,None,7,3,None,None,2,None,1,None,None,None,None,None,None,None,None,4,None,None,None,9]
+]
\ No newline at end of file
@@ -0,0 +1,13 @@
+# coding=utf-8
+__author__ = 'josh'
+
+# Puzzles published as among the hardest for human solvers, including Arto
+# Inkala's 2012 puzzle, AI Escargot, and Easter Monster
+
+puzzles = [
+    [8,None,None,None,None,None,None,None,None,None,None,3,6,None,None,None,None,None,None,7,None,None,9,None,2,None,None,None,5,None,None,None,7,None,None,None,None,None,None,None,4,5,7,None,None,None,None,None,1,None,None,None,3,None,None,None,1,None,None,None,None,6,8,None,None,8,5,None,None,None,1,None,None,9,None,None,None,None,4,None,None],
+    [1,None,None,None,None,7,None,9,None,None,3,None,None,2,None,None,None,8,None,None,9,6,None,None,5,None,None,None,None,5,3,None,None,9,None,None,None,1,None,None,8,None,None,None,2,6,None,None,None,None,4,None,None,None,3,None,None,None,None,None,None,1,None,None,4,None,None,None,None,None,None,7,None,None,7,None,None,None,3,None,None],
+    [1,None,None,None,None,None,None,None,2,None,9,None,4,None,None,None,5,None,None,None,6,None,None,None,7,None,None,None,5,None,9,None,3,None,None,None,None,None,None,None,7,None,None,None,None,None,None,None,8,5,None,None,4,None,7,None,None,None,None,None,6,None,None,None,3,None,None,None,9,None,8,None,None,None,2,None,None,None,None,None,1],
+    [1,2,None,3,None,None,None,None,4,3,5,None,None,None,None,1,None,None,None,None,4,None,None,None,None,None,None,None,None,5,4,None,None,2,None,None,6,None,None,None,7,None,None,None,None,None,None,None,None,None,8,None,9,None,None,None,3,1,None,None,5,None,None,None,None,None,None,None,9,None,7,None,None,None,None,None,6,None,None,None,8],
+    [1,None,None,None,None,None,7,None,9,None,4,None,None,None,7,2,None,None,8,None,None,None,None,None,None,None,None,None,7,None,None,1,None,None,6,None,3,None,None,None,None,None,None,None,5,None,6,None,None,4,None,None,2,None,None,None,None,None,None,None,None,None,8,None,None,5,3,None,None,None,7,None,7,None,2,None,None,None,None,4,6]
+]
\ No newline at end of file
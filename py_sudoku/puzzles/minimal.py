@@ -0,0 +1,12 @@
+# coding=utf-8
+__author__ = 'josh'
+
+# 17-clue puzzles, the fewest clues a puzzle with a unique solution can have
+
+puzzles = [
+    [None,None,None,None,None,None,None,1,None,4,None,None,None,None,None,None,None,None,None,2,None,None,None,None,None,None,None,None,None,None,None,5,None,4,None,7,None,None,8,None,None,None,3,None,None,None,None,1,None,9,None,None,None,None,3,None,None,4,None,None,2,None,None,None,5,None,1,None,None,None,None,None,None,None,None,8,None,6,None,None,None],
+    [None,None,None,None,None,None,None,1,None,4,None,None,None,None,None,None,None,None,None,2,None,None,None,None,None,None,None,None,None,None,None,5,None,6,None,4,None,None,8,None,None,None,3,None,None,None,None,1,None,9,None,None,None,None,3,None,None,4,None,None,2,None,None,None,5,None,1,None,None,None,None,None,None,None,None,8,None,7,None,None,None],
+    [None,None,None,None,None,None,None,1,2,None,None,None,None,3,5,None,None,None,None,None,None,6,None,None,None,7,None,7,None,None,None,None,None,3,None,None,None,None,None,4,None,None,8,None,None,1,None,None,None,None,None,None,None,None,None,None,None,1,2,None,None,None,None,None,8,None,None,None,None,None,4,None,None,5,None,None,None,None,6,None,None],
+    [None,None,None,None,None,None,None,1,2,None,None,3,6,None,None,None,None,None,None,None,None,None,None,7,None,None,None,4,1,None,None,2,None,None,None,None,None,None,None,5,None,None,3,None,None,7,None,None,None,None,None,6,None,None,2,8,None,None,None,None,None,4,None,None,None,None,3,None,None,5,None,None,None,None,None,None,None,None,None,None,None],
+    [None,None,None,None,None,None,None,1,2,None,None,8,None,3,None,None,None,None,None,None,None,None,None,None,None,4,None,1,2,None,5,None,None,None,None,None,None,None,None,None,None,4,7,None,None,None,6,None,None,None,None,None,None,None,5,None,7,None,None,None,3,None,None,None,None,None,6,2,None,None,None,None,None,None,None,1,None,None,None,None,None]
+]
\ No newline at end of file
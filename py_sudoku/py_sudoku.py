@@ -2,15 +2,55 @@ __author__ = 'josh'
 
 import pygame
 import sys
+import autosolve
 import gameboard
+import instrumentation
+import library
 import os
+import savegame
 import time
 
 
 FPS = 60
+BACKGROUND_COLOR = (128,128,128)
 NUMBER_KEY_TYPE = "number"
 MOVEMENT_KEY_TYPE = "movement"
 EDIT_KEY_TYPE = "edit"
+HINT_KEY_TYPE = "hint"
+UNDO_KEY_TYPE = "undo"
+REDO_KEY_TYPE = "redo"
+NOTES_KEY_TYPE = "notes"
+AUTO_SOLVE_KEY_TYPE = "auto solve"
+
+# keys for values 1-9; values from 10 up are typed with the letter keys, so
+# a 16x16 grid uses 1-9 and A-G
+NUMBER_KEYS = (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4, pygame.K_5,
+               pygame.K_6, pygame.K_7, pygame.K_8, pygame.K_9)
+KEYPAD_KEYS = (pygame.K_KP1, pygame.K_KP2, pygame.K_KP3, pygame.K_KP4,
+               pygame.K_KP5, pygame.K_KP6, pygame.K_KP7, pygame.K_KP8,
+               pygame.K_KP9)
+MOVEMENT_KEYS = (pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT)
+# the game's own keys are function keys, which never stand for a value;
+# letters are values on the bigger grids, up to P on a 25x25 one
+HINT_KEY = pygame.K_F1
+NOTES_KEY = pygame.K_F2
+# S is past the letters used for values on even the biggest grid
+AUTO_SOLVE_KEY = pygame.K_s
+
+# F3 shows frame timings over the game; setting PY_SUDOKU_TRACE to a .csv or
+# .json path also records them all and writes them there on quitting
+OVERLAY_KEY = pygame.K_F3
+OVERLAY_MARGIN = 10
+TRACE_ENV = "PY_SUDOKU_TRACE"
+
+# the game in progress is saved here on quitting, and resumed on starting
+SAVE_PATH = os.path.join(os.path.expanduser("~"), ".py_sudoku.sav")
+
+# new games are picked from the puzzle library here, if there is one; see
+# library.py for filling it. PY_SUDOKU_LIBRARY points to another one.
+LIBRARY_PATH = os.path.join(os.path.expanduser("~"), ".py_sudoku.db")
+LIBRARY_ENV = "PY_SUDOKU_LIBRARY"
+LIBRARY_DIFFICULTY = "easy"
 
 def quit():
     """
@@ -18,28 +58,99 @@ def quit():
     """
     sys.exit()
 
+def shut_down(grid, playtime, profiler):
+    """
+    Saves the game and the trace, if one is being recorded, and quits
+    :param grid: the Grid being played
+    :param playtime: seconds played so far
+    :param profiler: the frame profiler in use
+    """
+    save_game(grid, playtime)
+    export_trace(profiler)
+    quit()
+
+def export_trace(profiler):
+    """
+    Writes out the frame trace, if one was asked for
+    :param profiler: the frame profiler in use
+    """
+    path = os.environ.get(TRACE_ENV)
+    if path and profiler.enabled:
+        profiler.export(path)
+
+def save_game(grid, playtime):
+    """
+    Saves the game in progress, to be resumed next time
+    :param grid: the Grid being played
+    :param playtime: seconds played so far
+    """
+    savegame.save(SAVE_PATH, grid.board, playtime)
+
+def load_game():
+    """
+    Loads the saved game, if there is one
+    :return tuple: (Board, playtime), or None if there's no game to resume
+    """
+    if not os.path.exists(SAVE_PATH):
+        return None
+    try:
+        return savegame.load(SAVE_PATH)
+    except (IOError, ValueError) as e:
+        print("can't resume the saved game: %s" % e)
+        return None
+
 def get_puzzle():
     """
-    Gets a puzzle definition
+    Gets a puzzle definition: one at random from the puzzle library, or the
+    built in one if there's no library
     :return list:
     """
+    path = os.environ.get(LIBRARY_ENV, LIBRARY_PATH)
+    if os.path.exists(path):
+        with library.PuzzleLibrary(path) as puzzle_library:
+            entry = puzzle_library.get_random(LIBRARY_DIFFICULTY) or puzzle_library.get_random()
+        if entry is not None:
+            return entry.puzzle
     import puzzles.easy
     return puzzles.easy.puzzles[0]
 
-def get_key_pressed_value(key):
+def get_key_pressed_value(key, max_value=9, mod=0):
     """
-    Gets the value of the key constant provided. If not between K_0 and K_9 or
-    K_KP0 and K_KP9 (inclusive), returns None.
+    Gets the value of the key constant provided. Number keys give their
+    value, and letter keys give 10 and up (A is 10), as long as the value is
+    no more than max_value. If the key isn't one we handle, returns None.
+    :param key: pygame key constant
+    :param max_value: the largest value on the grid
+    :param mod: pygame modifier flags held down with the key
     """
     type = None
     value = None
-    if key >= pygame.K_1 and key <= pygame.K_9:
+    # ctrl+z undoes, and ctrl+y or ctrl+shift+z redoes
+    if mod & pygame.KMOD_CTRL:
+        if key == pygame.K_z and not mod & pygame.KMOD_SHIFT:
+            return UNDO_KEY_TYPE, key
+        if key == pygame.K_y or key == pygame.K_z:
+            return REDO_KEY_TYPE, key
+        return type, value
+    if key == HINT_KEY:
+        type = HINT_KEY_TYPE
+        value = key
+    if key == NOTES_KEY:
+        type = NOTES_KEY_TYPE
+        value = key
+    if key == AUTO_SOLVE_KEY:
+        type = AUTO_SOLVE_KEY_TYPE
+        value = key
+    if key in NUMBER_KEYS:
         type = NUMBER_KEY_TYPE
-        value = key - pygame.K_0
-    if key >= pygame.K_KP1 and key <= pygame.K_KP9:
+        value = NUMBER_KEYS.index(key) + 1
+    if key in KEYPAD_KEYS:
         type = NUMBER_KEY_TYPE
-        value = key - pygame.K_KP0
-    if key >= pygame.K_UP and key <= pygame.K_LEFT:
+        value = KEYPAD_KEYS.index(key) + 1
+    if key >= pygame.K_a and key <= pygame.K_z and key - pygame.K_a + 10 <= max_value:
+        type = NUMBER_KEY_TYPE
+        value = key - pygame.K_a + 10
+    if key in MOVEMENT_KEYS:
         type = MOVEMENT_KEY_TYPE
         value = key
     if key == pygame.K_DELETE or key == pygame.K_BACKSPACE:
@@ -48,7 +159,10 @@ def get_key_pressed_value(key):
     return type, value
 
 def do_completion():
-    print "holy crap you're done!"
+    print("holy crap you're done!")
+    # a finished game isn't resumed
+    if os.path.exists(SAVE_PATH):
+        os.remove(SAVE_PATH)
     time.sleep(5)
     quit()
 
@@ -63,34 +177,120 @@ def main():
     playtime = 0
 
     screen = pygame.display.set_mode((1000,800))
-    screen.fill((128,128,128))
+    screen.fill(BACKGROUND_COLOR)
 
-    puzzle = get_puzzle()
+    saved = load_game()
+    if saved is not None:
+        board_state, playtime = saved
+        grid = gameboard.Grid.for_board(board_state)
+        grid.create_grid(screen)
+    else:
+        puzzle = get_puzzle()
+        grid = gameboard.Grid.for_puzzle(puzzle)
+        grid.create_grid(screen, puzzle)
+    # the whole screen is shown once; after that only tiles which changed
+    # are redrawn and updated
+    pygame.display.flip()
 
-    grid = gameboard.Grid()
-    grid.create_grid(screen, puzzle)
+    # mouse movement doesn't change anything, so don't wake up for it
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
 
     selected = None
+    redrawn = True
+    # shown in the caption, e.g. the last hint
+    status = ""
+    # in notes mode, number keys toggle notes rather than setting values
+    notes_mode = False
+    shown_caption = None
+
+    # instrumentation costs next to nothing until it's turned on, by asking
+    # for a trace or showing the overlay
+    if os.environ.get(TRACE_ENV):
+        profiler = instrumentation.FrameProfiler()
+    else:
+        profiler = instrumentation.NULL_PROFILER
+    show_overlay = False
+    overlay_rect = None
+
+    # solves the grid a little each frame while auto-solve is running
+    auto_solver = None
 
     while 1:
 
+        # the frame limiter sleeps before the events are fetched, so a key
+        # press isn't held up behind it and the sleep isn't timed as work
         milliseconds = clock.tick(FPS)  # milliseconds passed since last frame
         seconds = milliseconds / 1000.0 # seconds passed since last frame (float)
         playtime += seconds
 
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT: quit()
+        if redrawn or auto_solver is not None:
+            events = pygame.event.get()
+        else:
+            # nothing changed last frame, so there's nothing to do until
+            # something happens; sleep until then rather than spin
+            events = [pygame.event.wait()]
+            events.extend(pygame.event.get())
+        profiler.start_frame()
+
+        for event in events:
+            if event.type == pygame.QUIT:
+                shut_down(grid, playtime, profiler)
+            if event.type == pygame.VIDEOEXPOSE:
+                # the window was uncovered; show everything again
+                pygame.display.flip()
             if event.type == pygame.KEYDOWN:
                 # escape quits the game
                 if event.key == pygame.K_ESCAPE:
-                    quit()
+                    shut_down(grid, playtime, profiler)
 
-                # don't have anything selected, can't do anything
-                if selected is None:
+                profiler.key_pressed()
+                if event.key == OVERLAY_KEY:
+                    show_overlay = not show_overlay
+                    if show_overlay and not profiler.enabled:
+                        profiler = instrumentation.FrameProfiler()
+                    elif not show_overlay and not os.environ.get(TRACE_ENV):
+                        # nothing shows or records the timings any more
+                        profiler = instrumentation.NULL_PROFILER
                     continue
 
                 # handle some key strokes
-                key_type, key_val = get_key_pressed_value(event.key)
+                key_type, key_val = get_key_pressed_value(event.key, grid.board.size, event.mod)
+
+                # any other key stops auto-solve, leaving what it has filled in
+                if auto_solver is not None:
+                    auto_solver = None
+                    status = "auto-solve stopped"
+                    if key_type == AUTO_SOLVE_KEY_TYPE:
+                        continue
+                if key_type == AUTO_SOLVE_KEY_TYPE:
+                    grid.clear_hint()
+                    auto_solver = autosolve.AutoSolver(grid)
+                    status = "auto-solving"
+                    continue
+
+                if key_type == NOTES_KEY_TYPE:
+                    notes_mode = not notes_mode
+                    continue
+
+                # hints are for the whole grid, so don't need a selection
+                if key_type == HINT_KEY_TYPE:
+                    hint = grid.show_hint()
+                    status = hint.description if hint is not None else "no hint available"
+                    continue
+
+                # so is the move history
+                if key_type == UNDO_KEY_TYPE or key_type == REDO_KEY_TYPE:
+                    if key_type == UNDO_KEY_TYPE:
+                        grid.undo()
+                    else:
+                        grid.redo()
+                    grid.clear_hint()
+                    status = ""
+                    continue
+
+                # don't have anything selected, can't do anything
+                if selected is None:
+                    continue
 
                 # movements
                 if key_type == MOVEMENT_KEY_TYPE:
@@ -103,30 +303,64 @@ def main():
                     continue
 
                 # handle number key pressed
+                if key_type == NUMBER_KEY_TYPE and notes_mode:
+                    selected.toggle_note(key_val)
+                    continue
                 if key_type == NUMBER_KEY_TYPE:
                     selected.set_value(key_val)
                 elif key_type == EDIT_KEY_TYPE:
                     selected.on_edit(key_val)
 
+                # the last hint may not hold once something has changed
+                if key_type in (NUMBER_KEY_TYPE, EDIT_KEY_TYPE):
+                    grid.clear_hint()
+                    status = ""
+
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if pygame.mouse.get_pressed()[0]:
                     if selected is not None:
                         selected.on_deselect()
-                    pos = pygame.mouse.get_pos()
-                    clicked = [s for s in grid.tiles if s.rect.collidepoint(pos)]
-                    if len(clicked) > 1:
-                        raise Exception("Overlapping tiles at position %s" % pos)
-                    elif len(clicked) < 1:
+                    clicked = grid.get_tile_at_pos(event.pos)
+                    if clicked is None:
                         continue
-                    selected = clicked[0]
-                    print "tl: %s, br: %s" % (str(selected.rect.topleft), str(selected.rect.bottomright))
+                    selected = clicked
                     selected.on_click()
 
-        pygame.display.set_caption("[FPS]: %.2f" % clock.get_fps())
-        grid.tiles.update_all(grid)
-        screen.blit(grid.background, (0,0))
-        pygame.display.update()
+        profiler.mark(instrumentation.EVENTS)
+
+        if auto_solver is not None and not auto_solver.step():
+            status = "no solution" if auto_solver.failed else ""
+            auto_solver = None
+
+        # redraw only the tiles which changed, and copy only those areas to
+        # the screen
+        rects = grid.tiles.update_all(grid)
+        redrawn = len(rects) > 0
+        profiler.mark(instrumentation.UPDATE)
+        for rect in rects:
+            screen.blit(grid.background, rect, rect)
+        # the overlay is refreshed along with the tiles, so it doesn't keep
+        # an idle game awake
+        if overlay_rect is not None and (redrawn or not show_overlay):
+            screen.fill(BACKGROUND_COLOR, overlay_rect)
+            rects.append(overlay_rect)
+            overlay_rect = None
+        if show_overlay and overlay_rect is None:
+            overlay_rect = profiler.draw_overlay(screen, (grid.width + OVERLAY_MARGIN, OVERLAY_MARGIN),
+                                                 BACKGROUND_COLOR)
+            rects.append(overlay_rect)
+        profiler.mark(instrumentation.BLIT)
+        if rects:
+            pygame.display.update(rects)
+        profiler.mark(instrumentation.DISPLAY)
+        profiler.end_frame(len(rects))
+
+        caption = "%s%s" % ("[notes] " if notes_mode else "", status)
+        if redrawn or caption != shown_caption:
+            pygame.display.set_caption("[FPS]: %.2f %s" % (clock.get_fps(), caption))
+            shown_caption = caption
         if grid.is_complete():
+            export_trace(profiler)
             do_completion()
 
 
@@ -0,0 +1,133 @@
+__author__ = 'josh'
+
+import pygame
+
+import board
+
+
+class RenderCache(object):
+    """
+    Holds the fonts, rendered glyphs, and tint overlays that tiles are drawn
+    from, so that once they have been made, drawing a tile allocates nothing.
+    Everything in it is made for one tile size, and changing the tile size
+    throws it all away.
+    """
+    # height of a note as a fraction of its slot in the tile
+    NOTE_FONT_SCALE = 0.8
+
+    def __init__(self, tile_size, default_font, bold_font, font_scale):
+        """
+        Constructor
+        :param tile_size: tuple of (width, height) of a tile, in pixels
+        :param default_font: name of the font for ordinary text
+        :param bold_font: name of the font for bold text
+        :param font_scale: height of the text as a fraction of the tile height
+        """
+        self.tile_size = tile_size
+        self.default_font = default_font
+        self.bold_font = bold_font
+        self.font_scale = font_scale
+        self._fonts = {}
+        self._glyphs = {}
+        self._notes = {}
+        self._tints = {}
+
+    @property
+    def font_size(self):
+        return int(self.tile_size[1] * self.font_scale)
+
+    def set_tile_size(self, tile_size):
+        """
+        Changes the tile size, clearing everything made for the old one
+        :param tile_size: tuple of (width, height), in pixels
+        """
+        if tile_size == self.tile_size:
+            return
+        self.tile_size = tile_size
+        self.clear()
+
+    def clear(self):
+        """
+        Throws away everything in the cache
+        """
+        self._fonts.clear()
+        self._glyphs.clear()
+        self._notes.clear()
+        self._tints.clear()
+
+    def get_font(self, name, bold, size):
+        """
+        Gets a system font, loading it the first time it is asked for
+        :param name: name of the font
+        :param bold: Boolean
+        :param size: size of the font
+        :return Font:
+        """
+        key = (name, bold, size)
+        font = self._fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size, bold)
+            self._fonts[key] = font
+        return font
+
+    def get_glyph(self, text, color, bold):
+        """
+        Gets some text rendered at the size for a tile, and where to put it
+        so that it is centred on the tile
+        :param text: the text, usually a value's symbol
+        :param color: tuple of (r, g, b)
+        :param bold: Boolean
+        :return tuple: (Surface, (x, y))
+        """
+        key = (text, color, bold)
+        glyph = self._glyphs.get(key)
+        if glyph is None:
+            name = self.bold_font if bold else self.default_font
+            label = self.get_font(name, bold, self.font_size).render(text, 1, color)
+            label_rect = label.get_rect()
+            label_rect.center = (self.tile_size[0] // 2, self.tile_size[1] // 2)
+            glyph = label, label_rect.topleft
+            self._glyphs[key] = glyph
+        return glyph
+
+    def get_note_glyph(self, value, color, columns, rows):
+        """
+        Gets a value rendered small for a cell's notes, and where to put it:
+        the tile is split into columns x rows slots, and each value has its
+        own, filled left to right and top to bottom
+        :param value: the value, 1 up to columns * rows
+        :param color: tuple of (r, g, b)
+        :param columns: slots across the tile
+        :param rows: slots down the tile
+        :return tuple: (Surface, (x, y))
+        """
+        key = (value, color, columns, rows)
+        glyph = self._notes.get(key)
+        if glyph is None:
+            width = self.tile_size[0] // columns
+            height = self.tile_size[1] // rows
+            size = max(1, int(height * RenderCache.NOTE_FONT_SCALE))
+            label = self.get_font(self.default_font, False, size).render(board.SYMBOLS[value - 1], 1, color)
+            label_rect = label.get_rect()
+            slot = value - 1
+            label_rect.center = ((slot % columns) * width + width // 2,
+                                 (slot // columns) * height + height // 2)
+            glyph = label, label_rect.topleft
+            self._notes[key] = glyph
+        return glyph
+
+    def get_tint(self, color, alpha):
+        """
+        Gets a tile-sized overlay of a color, for tinting tiles with
+        :param color: tuple of (r, g, b)
+        :param alpha: opacity of the overlay, 0-255
+        :return Surface:
+        """
+        key = (color, alpha)
+        tint = self._tints.get(key)
+        if tint is None:
+            tint = pygame.Surface(self.tile_size)
+            tint.set_alpha(alpha)
+            tint.fill(color)
+            self._tints[key] = tint
+        return tint
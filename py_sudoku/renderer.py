@@ -0,0 +1,112 @@
+__author__ = 'josh'
+
+import pygame
+
+import board
+import colors
+import render_cache
+
+
+class BoardRenderer(object):
+    """
+    Draws the whole grid into one board surface. The static layer, the
+    borders and each cell's background, is drawn once when the renderer is
+    made; after that only the dynamic layer, a cell's tint and its value or
+    notes, is drawn, and only for cells which change. Cells are cleared back
+    to the static layer from the one cell background shared by all of them,
+    so tiles need no surfaces of their own and the grid holds only the board
+    surface, however many cells it has.
+    """
+    TILE_IMAGE = "assets/tile.png"
+
+    DEFAULT_FONT = "Courier New Regular"
+    BOLD_FONT = "Courier New Bold"
+    FONT_SCALE = 0.4
+
+    # fonts, glyphs, and tints shared by every renderer; made again if the
+    # tile size changes
+    cache = render_cache.RenderCache((0, 0), DEFAULT_FONT, BOLD_FONT, FONT_SCALE)
+    # the cell background for the cache's tile size
+    _cell_background = None
+
+    def __init__(self, layout, tile_size, size, cell_rects, border_color=colors.BLACK):
+        """
+        Constructor; draws the static layer
+        :param layout: board Layout of the grid
+        :param tile_size: tuple of (width, height) of a cell, in pixels
+        :param size: tuple of (width, height) of the whole board, in pixels
+        :param cell_rects: Rect of each cell on the board, by cell index
+        :param border_color: color of the borders between boxes
+        """
+        self.layout = layout
+        self.tile_size = tile_size
+        self.cell_rects = cell_rects
+        if BoardRenderer.cache.tile_size != tile_size:
+            BoardRenderer.cache.set_tile_size(tile_size)
+            BoardRenderer._cell_background = None
+        if BoardRenderer._cell_background is None:
+            image = pygame.image.load(BoardRenderer.TILE_IMAGE).convert()
+            BoardRenderer._cell_background = pygame.transform.scale(image, tile_size)
+
+        self.surface = pygame.Surface(size).convert()
+        self.surface.fill(border_color)
+        for rect in cell_rects:
+            self.surface.blit(BoardRenderer._cell_background, rect)
+
+    def draw_tile(self, tile):
+        """
+        Draws a cell's dynamic layer from the state of its tile
+        :param tile: the Tile to draw
+        :return Rect: the area of the board drawn over
+        """
+        surface = self.surface
+        rect = self.cell_rects[tile.id]
+        surface.blit(BoardRenderer._cell_background, rect)
+
+        color, alpha = self.get_tint(tile)
+        if color is not None:
+            surface.blit(BoardRenderer.cache.get_tint(color, alpha), rect)
+
+        value = tile.value
+        if value is None:
+            self._draw_notes(tile, rect)
+            return rect
+        conflicted = tile.conflicted
+        bold = tile.immutable or conflicted
+        color = colors.MEDIUM_GREY if not tile.immutable else colors.BLACK
+        color = color if not conflicted else colors.RED
+        label, (x, y) = BoardRenderer.cache.get_glyph(board.SYMBOLS[value - 1], color, bold)
+        surface.blit(label, (rect.left + x, rect.top + y))
+        return rect
+
+    def get_tint(self, tile):
+        """
+        Gets the tint showing a tile's state, most important first
+        :param tile: the Tile
+        :return tuple: (color, alpha), or (None, None) for no tint
+        """
+        if tile.conflicted:
+            return colors.RED, 64
+        if tile.selected:
+            return colors.YELLOW, 128
+        if tile.hinted:
+            return colors.PURPLE, 96
+        if tile.group_selected:
+            return colors.BLUE, 64
+        if tile.group_completed:
+            return colors.GREEN, 64
+        return None, None
+
+    def _draw_notes(self, tile, rect):
+        """
+        Draws a cell's notes, each value in its own slot of a grid shaped
+        like a box
+        """
+        notes = tile.board.notes[tile.id]
+        layout = self.layout
+        while notes:
+            bit = notes & -notes
+            notes ^= bit
+            label, (x, y) = BoardRenderer.cache.get_note_glyph(bit.bit_length(), colors.DARK_GREY,
+                                                               layout.box_width, layout.box_height)
+            self.surface.blit(label, (rect.left + x, rect.top + y))
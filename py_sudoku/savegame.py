@@ -0,0 +1,158 @@
+"""
+Saves games in a compact, versioned binary format. A saved game is:
+
+    header      magic, format version, box width and height, bits per
+                cell, and the playtime in milliseconds
+    cells       each cell's value (0 for empty) packed into the given bits;
+                4 bits for boards up to 15x15, 5 bits up to 25x25
+    givens      a bitmap of the cells given by the puzzle
+    noted       a bitmap of the cells which have notes
+    notes       for each noted cell, its notes bitmask in as few whole
+                bytes as hold the values (2 for a 9x9 board)
+
+All multi-byte numbers are little-endian. A 9x9 game without notes takes
+75 bytes.
+"""
+__author__ = 'josh'
+
+import os
+import struct
+
+import board
+import geometry
+
+
+MAGIC = b"PSDK"
+VERSION = 1
+
+HEADER = struct.Struct("<4sBBBBI")
+
+# the largest playtime the header can hold, in milliseconds
+MAX_PLAYTIME = 0xffffffff
+
+
+def encode(board_state, playtime=0.0):
+    """
+    Encodes a game
+    :param board_state: the Board being played
+    :param playtime: seconds played so far
+    :return bytes:
+    """
+    layout = board_state.layout
+    bits = _get_cell_bits(layout.size)
+    milliseconds = min(int(round(playtime * 1000)), MAX_PLAYTIME)
+    notes = board_state.notes
+    note_bytes = _get_note_bytes(layout.size)
+
+    parts = [
+        HEADER.pack(MAGIC, VERSION, layout.box_width, layout.box_height, bits, milliseconds),
+        _pack(board_state.cells, bits),
+        _pack(board_state.givens, 1),
+        _pack([1 if mask else 0 for mask in notes], 1),
+    ]
+    for mask in notes:
+        if mask:
+            parts.append(mask.to_bytes(note_bytes, "little"))
+    return b"".join(parts)
+
+
+def decode(data):
+    """
+    Decodes a game straight into a headless Board; nothing is drawn until
+    the board is shown
+    :param data: bytes, as from encode
+    :return tuple: (Board, playtime in seconds)
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Saved game is too short")
+    magic, version, box_width, box_height, bits, milliseconds = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a saved game")
+    if version != VERSION:
+        raise ValueError("Unsupported saved game version %d" % version)
+    layout = geometry.get_layout(box_width, box_height)
+    if bits != _get_cell_bits(layout.size):
+        raise ValueError("Saved game has %d bits per cell, expected %d" % (bits, _get_cell_bits(layout.size)))
+
+    count = layout.cell_count
+    offset = HEADER.size
+    cells, offset = _unpack(data, offset, count, bits)
+    givens, offset = _unpack(data, offset, count, 1)
+    noted, offset = _unpack(data, offset, count, 1)
+    note_bytes = _get_note_bytes(layout.size)
+    if len(data) != offset + sum(noted) * note_bytes:
+        raise ValueError("Saved game is the wrong length")
+
+    for value in cells:
+        if value > layout.size:
+            raise ValueError("Saved game has a value of %d on a %dx%d board" % (value, layout.size, layout.size))
+    board_state = board.Board(layout=layout)
+    board_state.load([value if given else None for value, given in zip(cells, givens)])
+    for index, value in enumerate(cells):
+        if value and not givens[index]:
+            board_state.set_value(index, value)
+    for index, flag in enumerate(noted):
+        if flag:
+            board_state.notes[index] = int.from_bytes(data[offset:offset + note_bytes], "little") & layout.full_mask
+            offset += note_bytes
+    return board_state, milliseconds / 1000.0
+
+
+def save(path, board_state, playtime=0.0):
+    """
+    Saves a game to a file. The file is replaced in one step, so a crash
+    while saving leaves the previous save intact.
+    :param path: path of the file
+    :param board_state: the Board being played
+    :param playtime: seconds played so far
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(encode(board_state, playtime))
+    os.replace(temp_path, path)
+
+
+def load(path):
+    """
+    Loads a game from a file
+    :param path: path of the file
+    :return tuple: (Board, playtime in seconds)
+    """
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def _get_cell_bits(size):
+    # enough bits for every value and 0
+    return size.bit_length()
+
+
+def _get_note_bytes(size):
+    return (size + 7) // 8
+
+
+def _pack(values, bits):
+    """
+    Packs small numbers into bytes, bits apiece, the first in the lowest bits
+    """
+    packed = 0
+    for value in reversed(values):
+        packed = (packed << bits) | value
+    return packed.to_bytes((len(values) * bits + 7) // 8, "little")
+
+
+def _unpack(data, offset, count, bits):
+    """
+    Unpacks count numbers of bits apiece from data at offset
+    :return tuple: (list of the numbers, offset just after them)
+    """
+    end = offset + (count * bits + 7) // 8
+    if len(data) < end:
+        raise ValueError("Saved game is too short")
+    packed = int.from_bytes(data[offset:end], "little")
+    mask = (1 << bits) - 1
+    values = []
+    for i in range(count):
+        values.append(packed & mask)
+        packed >>= bits
+    return values, end
@@ -0,0 +1,431 @@
+"""
+Serves the rules of the game to other programs over a local TCP socket,
+without pygame. Start it with:
+
+    python server.py --port 8765 --workers 4
+
+The protocol is one JSON object per line each way. Every request has an
+"op" and may have an "id", which is echoed back in its response:
+
+    {"id": 1, "op": "validate", "puzzle": "53..7...."}
+    {"id": 2, "op": "solve", "puzzle": "53..7....", "engine": "dlx"}
+    {"id": 3, "op": "hint", "puzzle": "53..7...."}
+    {"id": 4, "op": "generate", "difficulty": "hard", "seed": 7}
+    {"id": 5, "op": "stats"}
+
+Responses look like {"id": 1, "ok": true, "result": {...}}, or
+{"id": 1, "ok": false, "error": "..."} when a request fails. Requests may be
+pipelined: a client can send many without waiting, and the responses come
+back in the order the requests were sent. Solving, hints, and generating
+run in a pool of worker processes, so the event loop is never held up.
+Solutions are cached by the puzzle's canonical form, so a puzzle which is
+a relabelled or rearranged copy of one already solved is answered without
+solving it again; one which comes in while a copy of it is being solved
+waits for that solve rather than starting another.
+"""
+__author__ = 'josh'
+
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import multiprocessing
+import signal
+import sys
+import timeit
+
+import board
+import canonical
+import engines
+import generator
+import geometry
+import hints
+import latency
+import puzzle_io
+import solution_cache
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# requests a connection may have in flight before the server stops reading
+# from it
+MAX_PIPELINE = 64
+# most puzzles one generate request may ask for
+MAX_GENERATE = 100
+
+VALIDATE = "validate"
+SOLVE = "solve"
+HINT = "hint"
+GENERATE = "generate"
+STATS = "stats"
+OPERATIONS = (VALIDATE, SOLVE, HINT, GENERATE, STATS)
+
+
+def validate_request(request):
+    """
+    Checks a puzzle or solution for clashing values
+    :param request: dict with the puzzle text
+    :return dict: whether it's valid and complete, and which cells clash
+    """
+    b = board.Board(_get_puzzle(request))
+    conflicts = [i for i, flag in enumerate(b.conflicts) if flag]
+    return {"valid": not conflicts, "complete": b.is_complete(), "conflicts": conflicts}
+
+
+def solve_request(request):
+    """
+    Solves a puzzle
+    :param request: dict with the puzzle text, and optionally the engine
+    :return dict: the solution text, or None if there isn't one
+    """
+    engine = engines.get_engine(request.get("engine", engines.DEFAULT_ENGINE))
+    solution = engine.solve(_get_puzzle(request))
+    if solution is not None:
+        solution = puzzle_io.format_puzzle(solution)
+    return {"solution": solution, "nodes": engine.stats.nodes}
+
+
+def canonical_request(request):
+    """
+    Works out the canonical form of a puzzle, which its solution is cached
+    under
+    :param request: dict with the puzzle text
+    :return tuple: (canonical form as text, Transform taking the puzzle to it)
+    """
+    return canonical.canonicalize(_get_puzzle(request))
+
+
+def solve_canonical_request(request, transform):
+    """
+    Solves a puzzle, giving the solution in canonical form for the cache
+    :param request: dict with the puzzle text, and optionally the engine
+    :param transform: the Transform from the puzzle to its canonical form
+    :return tuple: (the solution in canonical form, or None; nodes searched)
+    """
+    engine = engines.get_engine(request.get("engine", engines.DEFAULT_ENGINE))
+    solution = engine.solve(_get_puzzle(request))
+    if solution is not None:
+        solution = transform.apply(solution)
+    return solution, engine.stats.nodes
+
+
+def hint_request(request):
+    """
+    Finds the next logical step for a puzzle
+    :param request: dict with the puzzle text
+    :return dict: the hint, or None if there isn't one
+    """
+    hint = hints.HintEngine(board.Board(_get_puzzle(request))).next_hint()
+    return {"hint": hint.to_dict() if hint is not None else None}
+
+
+def generate_request(request):
+    """
+    Generates puzzles
+    :param request: dict with optional count, difficulty, seed, and box_size
+    :return dict: the puzzles as text
+    """
+    count = request.get("count", 1)
+    if not isinstance(count, int) or count < 1 or count > MAX_GENERATE:
+        raise ValueError("count must be between 1 and %d" % MAX_GENERATE)
+    box_size = request.get("box_size", geometry.BOX_WIDTH)
+    if not isinstance(box_size, int):
+        raise ValueError("box_size must be an integer")
+    layout = geometry.get_layout(box_size, box_size)
+    try:
+        puzzles = generator.generate(count, request.get("difficulty"), request.get("seed"), layout=layout)
+    except generator.GenerationError as e:
+        raise ValueError(str(e))
+    return {"puzzles": [puzzle_io.format_puzzle(puzzle) for puzzle in puzzles]}
+
+
+def _get_puzzle(request):
+    text = request.get("puzzle")
+    if not isinstance(text, str):
+        raise ValueError("puzzle must be given as text")
+    return puzzle_io.parse_puzzle(text.strip())
+
+
+def _init_worker():
+    # ctrl+c reaches the workers too; leave it to the server to shut them down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+# operations cheap enough to answer on the event loop; the rest go to the
+# worker pool
+_INLINE_HANDLERS = {
+    VALIDATE: validate_request,
+}
+_POOL_HANDLERS = {
+    SOLVE: solve_request,
+    HINT: hint_request,
+    GENERATE: generate_request,
+}
+
+
+class SudokuServer(object):
+    """
+    Answers requests from any number of connections, keeping latency
+    statistics for each operation
+    """
+
+    def __init__(self, workers=1, max_pipeline=MAX_PIPELINE, cache_size=solution_cache.SolutionCache.CAPACITY):
+        """
+        Constructor
+        :param workers: number of worker processes for the expensive requests
+        :param max_pipeline: requests a connection may have in flight
+        :param cache_size: most solutions to cache; 0 to not cache them
+        """
+        self.workers = workers
+        self.max_pipeline = max_pipeline
+        self.executor = None
+        self.cache = solution_cache.SolutionCache(cache_size) if cache_size else None
+        # solves under way, by canonical form, and the requests which waited
+        # on one rather than solving again
+        self.solving = {}
+        self.joined = 0
+        self.latency = dict((op, latency.LatencyHistogram()) for op in OPERATIONS)
+        self.errors = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.started = timeit.default_timer()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts the worker pool and listens for connections
+        :return asyncio.Server:
+        """
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=_init_worker)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        """
+        Shuts the worker pool down
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    async def handle_connection(self, reader, writer):
+        """
+        Reads requests from a connection as they come, starting each one
+        straight away, while the responses are written in request order
+        """
+        self.connections += 1
+        pending = asyncio.Queue(self.max_pipeline)
+        responder = asyncio.ensure_future(self._write_responses(pending, writer))
+        try:
+            while not responder.done():
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await pending.put(asyncio.ensure_future(self.handle_line(line)))
+        except (ConnectionError, ValueError):
+            # ValueError is a line longer than the stream's limit
+            pass
+        finally:
+            await pending.put(None)
+            await responder
+            writer.close()
+            self.connections -= 1
+
+    async def _write_responses(self, pending, writer):
+        while True:
+            task = await pending.get()
+            if task is None:
+                return
+            response = await task
+            try:
+                writer.write((json.dumps(response) + "\n").encode("utf-8"))
+                await writer.drain()
+            except ConnectionError:
+                # the client went away; let the rest of its requests finish
+                # without writing them anywhere
+                pass
+
+    async def handle_line(self, line):
+        """
+        Answers one request
+        :param line: the request, as a line of JSON bytes
+        :return dict: the response
+        """
+        start = timeit.default_timer()
+        request_id = None
+        op = None
+        self.in_flight += 1
+        try:
+            request = json.loads(line.decode("utf-8"))
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+            request_id = request.get("id")
+            op = request.get("op")
+            if op not in OPERATIONS:
+                raise ValueError("unknown op %r; choose from %s" % (op, ", ".join(OPERATIONS)))
+            result = await self.dispatch(op, request)
+            response = {"id": request_id, "ok": True, "result": result}
+        except ValueError as e:
+            self.errors += 1
+            response = {"id": request_id, "ok": False, "error": str(e)}
+        except Exception as e:
+            # anything else is the server's fault, but shouldn't stop the
+            # connection's other responses
+            self.errors += 1
+            response = {"id": request_id, "ok": False, "error": "internal error: %s" % e}
+        finally:
+            self.in_flight -= 1
+        if op in self.latency:
+            self.latency[op].record(timeit.default_timer() - start)
+        return response
+
+    async def dispatch(self, op, request):
+        """
+        Runs an operation, in the worker pool if it's an expensive one
+        :param op: one of OPERATIONS
+        :param request: the request dict
+        :return dict: the result
+        """
+        if op == STATS:
+            return self.get_stats()
+        if op in _INLINE_HANDLERS:
+            return _INLINE_HANDLERS[op](request)
+        if op == SOLVE and self.cache is not None:
+            return await self.solve_cached(request)
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, _POOL_HANDLERS[op], request)
+
+    async def solve_cached(self, request):
+        """
+        Solves a puzzle from the solution cache, or in the worker pool and
+        then caches it
+        :param request: the request dict
+        :return dict: as from solve_request, and whether it came from the cache
+        """
+        # working out the canonical form can take longer than solving, so it
+        # is done in the pool too; only the cache is used on the event loop
+        loop = asyncio.get_event_loop()
+        key, transform = await loop.run_in_executor(self.executor, canonical_request, request)
+        found, solution = self.cache.get(key)
+        if found:
+            if solution is not None:
+                solution = puzzle_io.format_puzzle(transform.invert(solution))
+            return {"solution": solution, "nodes": 0, "cached": True}
+
+        task = self.solving.get(key)
+        if task is not None:
+            self.joined += 1
+            # shielded, so a waiter going away doesn't cancel the others' solve
+            solution, nodes = await asyncio.shield(task)
+            if solution is not None:
+                solution = puzzle_io.format_puzzle(transform.invert(solution))
+            return {"solution": solution, "nodes": 0, "cached": True}
+
+        task = asyncio.ensure_future(self._solve_into_cache(key, transform, request))
+        self.solving[key] = task
+        solution, nodes = await asyncio.shield(task)
+        if solution is not None:
+            solution = puzzle_io.format_puzzle(transform.invert(solution))
+        return {"solution": solution, "nodes": nodes, "cached": False}
+
+    async def _solve_into_cache(self, key, transform, request):
+        """
+        Solves a puzzle in the worker pool and caches its solution
+        :param key: the puzzle's canonical form
+        :param transform: the Transform from the puzzle to its canonical form
+        :param request: the request dict
+        :return tuple: (the solution in canonical form, or None; nodes searched)
+        """
+        try:
+            loop = asyncio.get_event_loop()
+            solution, nodes = await loop.run_in_executor(self.executor, solve_canonical_request, request, transform)
+            self.cache.put(key, solution)
+            return solution, nodes
+        finally:
+            del self.solving[key]
+
+    def get_stats(self):
+        """
+        Gets the server's statistics
+        :return dict: uptime, connection and error counts, and latency
+            percentiles for each operation
+        """
+        return {
+            "uptime": timeit.default_timer() - self.started,
+            "connections": self.connections,
+            "in_flight": self.in_flight,
+            "errors": self.errors,
+            "latency": dict((op, histogram.summary()) for op, histogram in self.latency.items()),
+            "cache": self.cache.get_stats() if self.cache is not None else None,
+            "joined": self.joined,
+        }
+
+    def format_stats(self):
+        """
+        Gets the latency statistics as text
+        :return str:
+        """
+        lines = []
+        for op in OPERATIONS:
+            histogram = self.latency[op]
+            if histogram.count:
+                lines.append("%-8s %6d requests, p50 %s, p99 %s, max %s" % (
+                    op, histogram.count,
+                    latency.format_seconds(histogram.percentile(50)),
+                    latency.format_seconds(histogram.percentile(99)),
+                    latency.format_seconds(histogram.max)))
+        lines.append("errors: %d" % self.errors)
+        if self.cache is not None:
+            stats = self.cache.get_stats()
+            lines.append("cache: %d hits, %d misses, %d evictions, %d joined a solve under way" % (
+                stats["hits"], stats["misses"], stats["evictions"], self.joined))
+        return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Entry point for the command line
+    :param argv: the arguments, without the program name
+    :return int: exit status
+    """
+    parser = argparse.ArgumentParser(description="Serve sudoku validation, solving, hints, and generation.")
+    parser.add_argument("-H", "--host", default=DEFAULT_HOST, help="address to listen on (default: %(default)s)")
+    parser.add_argument("-p", "--port", type=int, default=DEFAULT_PORT, help="port to listen on (default: %(default)s)")
+    parser.add_argument("-w", "--workers", type=int, default=0,
+                        help="number of worker processes; 0 for one per CPU (default: %(default)s)")
+    parser.add_argument("-c", "--cache", type=int, default=solution_cache.SolutionCache.CAPACITY,
+                        help="most solutions to cache; 0 to not cache them (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.workers < 0:
+        parser.error("--workers can't be negative")
+    if args.cache < 0:
+        parser.error("--cache can't be negative")
+
+    server = SudokuServer(args.workers or multiprocessing.cpu_count(), cache_size=args.cache)
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        listener = loop.run_until_complete(server.start(args.host, args.port))
+    except OSError as e:
+        server.close()
+        loop.close()
+        sys.stderr.write("error: %s\n" % e)
+        return 1
+
+    sys.stderr.write("listening on %s:%d\n" % (args.host, args.port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # a second ctrl+c would interrupt waiting on the workers to exit
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        listener.close()
+        loop.run_until_complete(listener.wait_closed())
+        server.close()
+        loop.close()
+        sys.stderr.write(server.format_stats() + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
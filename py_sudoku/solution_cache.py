@@ -0,0 +1,105 @@
+__author__ = 'josh'
+
+import collections
+
+import canonical
+import geometry
+
+
+class SolutionCache(object):
+    """
+    Least recently used cache of solutions, keyed by the canonical form of
+    the puzzle, so a puzzle which is a relabelled or rearranged copy of one
+    already solved is answered from the cache. Solutions are stored in
+    canonical form and moved back onto each puzzle as it is looked up.
+    """
+    CAPACITY = 4096
+
+    def __init__(self, capacity=CAPACITY):
+        """
+        Constructor
+        :param capacity: most solutions kept; the least recently used are
+            dropped to make room
+        """
+        if capacity < 1:
+            raise ValueError("Cache capacity must be at least 1, got %d" % capacity)
+        self.capacity = capacity
+        self._solutions = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._solutions)
+
+    def get(self, key):
+        """
+        Looks up a solution, counting the hit or miss
+        :param key: the puzzle's canonical form
+        :return tuple: (found, solution in canonical form or None if the
+            puzzle has no solution)
+        """
+        try:
+            solution = self._solutions[key]
+        except KeyError:
+            self.misses += 1
+            return False, None
+        self._solutions.move_to_end(key)
+        self.hits += 1
+        return True, solution
+
+    def put(self, key, solution):
+        """
+        Stores a solution, dropping the least recently used if full
+        :param key: the puzzle's canonical form
+        :param solution: the solution in canonical form, or None if the
+            puzzle has no solution
+        """
+        self._solutions[key] = solution
+        self._solutions.move_to_end(key)
+        while len(self._solutions) > self.capacity:
+            self._solutions.popitem(last=False)
+            self.evictions += 1
+
+    def solve(self, puzzle, engine, layout=None):
+        """
+        Solves a puzzle, from the cache if an equivalent puzzle is in it
+        :param puzzle: list of values, None or 0 for blanks
+        :param engine: the solver Engine to use on a miss
+        :param layout: board Layout; worked out from the puzzle if not given
+        :return tuple: (the solved puzzle or None if it has no solution,
+            whether it came from the cache)
+        """
+        if layout is None:
+            layout = geometry.get_layout_for_cells(len(puzzle))
+        key, transform = canonical.canonicalize(puzzle, layout)
+        found, solution = self.get(key)
+        if not found:
+            solution = engine.solve(puzzle, layout)
+            if solution is not None:
+                solution = transform.apply(solution)
+            self.put(key, solution)
+        if solution is None:
+            return None, found
+        return transform.invert(solution), found
+
+    def clear(self):
+        """
+        Empties the cache; the counters are kept
+        """
+        self._solutions.clear()
+
+    def get_stats(self):
+        """
+        Gets the cache's counters
+        :return dict:
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._solutions),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": float(self.hits) / lookups if lookups else 0.0,
+        }
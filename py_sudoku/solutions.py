@@ -0,0 +1,256 @@
+"""
+Enumerates every solution of a puzzle, one at a time. The search is the
+same as the propagation solver's, but runs on an explicit stack instead of
+recursion, so it can stop after any solution and pick up again later:
+
+    solutions = SolutionIterator(puzzle, max_count=1000, time_budget=5.0)
+    for solution in solutions:
+        ...
+    if not solutions.exhausted:
+        saved = solutions.dumps()
+    ...
+    solutions = SolutionIterator.loads(saved, max_count=1000)
+
+Memory stays flat however many solutions there are: the stack holds one
+board state for each branch taken, never more than one per cell, and the
+solutions themselves are handed out and forgotten.
+
+A cursor holds the puzzle and the branches taken and still to take at each
+level of the stack, not the board states, which are rebuilt from the puzzle
+when the search is resumed.
+"""
+__author__ = 'josh'
+
+import json
+import timeit
+
+import geometry
+import puzzle_io
+import solver
+
+
+CURSOR_VERSION = 1
+
+
+class _Frame(object):
+    """
+    One level of the search: a board state, the cell being branched on, the
+    value being tried in it, and the values still to try
+    """
+    __slots__ = ("cells", "candidates", "cell", "value", "remaining")
+
+    def __init__(self, cells, candidates, cell, remaining):
+        self.cells = cells
+        self.candidates = candidates
+        self.cell = cell
+        self.value = 0
+        self.remaining = remaining
+
+
+class SolutionIterator(object):
+    """
+    Yields the solutions of a puzzle, in the list format used by
+    Grid.create_grid, until there are no more or a limit is reached
+    """
+
+    def __init__(self, puzzle, layout=None, max_count=None, time_budget=None):
+        """
+        Constructor
+        :param puzzle: list of values, None or 0 for blanks
+        :param layout: board Layout; worked out from the puzzle if not given
+        :param max_count: most solutions to yield before stopping, or None
+        :param time_budget: most seconds to search before stopping, or None;
+            counted from the first solution asked for
+        """
+        if layout is None:
+            layout = geometry.get_layout_for_cells(len(puzzle))
+        self.tables = solver.get_tables(layout)
+        if len(puzzle) != self.tables.cell_count:
+            raise ValueError("Puzzle must have %d values, got %d" % (self.tables.cell_count, len(puzzle)))
+        self.puzzle = [value or None for value in puzzle]
+        self.layout = layout
+        self.max_count = max_count
+        self.time_budget = time_budget
+        self.stats = solver.SolveStats()
+        # solutions found in this run, and in every run before it
+        self.count = 0
+        self.total = 0
+        self.exhausted = False
+        self._stack = []
+        self._deadline = None
+
+        state = solver.initial_state(self.puzzle, self.tables, self.stats)
+        if state is None:
+            self.exhausted = True
+            self._solved = None
+        else:
+            # set if propagating the givens alone solves the puzzle
+            self._solved = self._push(state[0], state[1])
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.max_count is not None and self.count >= self.max_count:
+            raise StopIteration
+        if self.time_budget is not None and self._deadline is None:
+            self._deadline = timeit.default_timer() + self.time_budget
+        solution = self._advance()
+        if solution is None:
+            raise StopIteration
+        self.count += 1
+        self.total += 1
+        return solution
+
+    def find_next(self, time_budget=None):
+        """
+        Searches on for the next solution, for at most time_budget seconds,
+        so that a long search can be spread over many short slices
+        :param time_budget: most seconds to search this time, or None
+        :return list: the solution, or None if the search stopped; exhausted
+            is set if that's because there are no more solutions
+        """
+        self._deadline = timeit.default_timer() + time_budget if time_budget is not None else None
+        solution = self._advance()
+        if solution is not None:
+            self.count += 1
+            self.total += 1
+        return solution
+
+    def _push(self, cells, candidates):
+        """
+        Adds a level to the stack for a board state, branching on the cell
+        with the fewest candidates
+        :return list: the cells, if the state is a solution; otherwise None
+        """
+        bit_count = self.tables.bit_count
+        best = -1
+        best_count = self.tables.size + 1
+        for i in range(self.tables.cell_count):
+            mask = candidates[i]
+            if mask:
+                count = bit_count[mask]
+                if count < best_count:
+                    best = i
+                    best_count = count
+                    if count == 2:
+                        break
+        if best < 0:
+            return cells
+        self._stack.append(_Frame(cells, candidates, best, candidates[best]))
+        return None
+
+    def _advance(self):
+        """
+        Searches on to the next solution
+        :return list: the solution, or None if the search stopped
+        """
+        if self._solved is not None:
+            solution, self._solved = self._solved, None
+            self.exhausted = True
+            return solution
+        stack = self._stack
+        tables = self.tables
+        stats = self.stats
+        while stack:
+            if self._deadline is not None and timeit.default_timer() > self._deadline:
+                return None
+            frame = stack[-1]
+            if not frame.remaining:
+                stack.pop()
+                continue
+            bit = frame.remaining & -frame.remaining
+            frame.remaining ^= bit
+            frame.value = bit.bit_length()
+            stats.nodes += 1
+            cells = frame.cells[:]
+            candidates = frame.candidates[:]
+            if solver.propagate(cells, candidates, [(frame.cell, frame.value)], tables, stats):
+                solution = self._push(cells, candidates)
+                if solution is not None:
+                    return solution
+        self.exhausted = True
+        return None
+
+    def get_cursor(self):
+        """
+        Gets where the search has got to, to resume it later
+        :return dict: which can be serialized as JSON; None once the search
+            is exhausted
+        """
+        if self.exhausted:
+            return None
+        return {
+            "version": CURSOR_VERSION,
+            "box_width": self.layout.box_width,
+            "box_height": self.layout.box_height,
+            "puzzle": puzzle_io.format_puzzle(self.puzzle),
+            "found": self.total,
+            "stack": [[frame.cell, frame.value, frame.remaining] for frame in self._stack],
+        }
+
+    def dumps(self):
+        """
+        Gets the cursor as JSON
+        :return str:
+        """
+        return json.dumps(self.get_cursor(), sort_keys=True)
+
+    @classmethod
+    def from_cursor(cls, cursor, max_count=None, time_budget=None):
+        """
+        Resumes a search from a cursor, rebuilding the stack's board states
+        from the puzzle
+        :param cursor: dict, as from get_cursor
+        :param max_count: most solutions to yield before stopping, or None
+        :param time_budget: most seconds to search before stopping, or None
+        :return SolutionIterator:
+        """
+        if cursor.get("version") != CURSOR_VERSION:
+            raise ValueError("Unsupported cursor version %r" % cursor.get("version"))
+        layout = geometry.get_layout(cursor["box_width"], cursor["box_height"])
+        iterator = cls(puzzle_io.parse_puzzle(cursor["puzzle"], layout), layout, max_count, time_budget)
+        iterator.total = cursor["found"]
+        stack = iterator._stack
+        levels = cursor["stack"]
+        if bool(stack) != bool(levels):
+            raise ValueError("Cursor doesn't match its puzzle")
+        for depth, (cell, value, remaining) in enumerate(levels):
+            frame = stack[-1]
+            if frame.cell != cell:
+                raise ValueError("Cursor doesn't match its puzzle at depth %d" % depth)
+            frame.value = value
+            frame.remaining = remaining
+            if depth == len(levels) - 1:
+                break
+            cells = frame.cells[:]
+            candidates = frame.candidates[:]
+            if (not solver.propagate(cells, candidates, [(cell, value)], iterator.tables, iterator.stats) or
+                    iterator._push(cells, candidates) is not None):
+                raise ValueError("Cursor doesn't match its puzzle at depth %d" % depth)
+        return iterator
+
+    @classmethod
+    def loads(cls, text, max_count=None, time_budget=None):
+        """
+        Resumes a search from a cursor saved as JSON
+        :param text: the JSON, as from dumps
+        :param max_count: most solutions to yield before stopping, or None
+        :param time_budget: most seconds to search before stopping, or None
+        :return SolutionIterator:
+        """
+        return cls.from_cursor(json.loads(text), max_count, time_budget)
+
+
+def iter_solutions(puzzle, max_count=None, time_budget=None, layout=None):
+    """
+    Yields the solutions of a puzzle one at a time
+    :param puzzle: list of values, None or 0 for blanks; the same format used
+        by Grid.create_grid
+    :param max_count: most solutions to yield, or None for all of them
+    :param time_budget: most seconds to search, or None
+    :param layout: board Layout; worked out from the puzzle if not given
+    :return SolutionIterator: iterate over it for the solutions, then use
+        its cursor to carry on if it isn't exhausted
+    """
+    return SolutionIterator(puzzle, layout, max_count, time_budget)
@@ -0,0 +1,243 @@
+__author__ = 'josh'
+
+import timeit
+
+import geometry
+
+
+# largest board for which the bit counts of every candidate mask are kept in
+# a table; bigger boards count bits as they go
+BIT_COUNT_TABLE_MAX_SIZE = 16
+
+
+class _BitCounter(object):
+    """
+    Stands in for a bit count table on boards too big to have one
+    """
+
+    def __getitem__(self, mask):
+        return bin(mask).count('1')
+
+
+class Tables(object):
+    """
+    Tables the solver needs for one board Layout: its units and peers, from
+    the layout, and the bit count of every candidate mask.
+    """
+
+    def __init__(self, layout):
+        """
+        Constructor
+        :param layout: the board Layout to build tables for
+        """
+        self.layout = layout
+        self.size = layout.size
+        self.cell_count = layout.cell_count
+        self.full_mask = layout.full_mask
+        # shared with everything else working on boards of this shape
+        self.units = layout.units
+        self.peers = layout.peers
+
+        if layout.size <= BIT_COUNT_TABLE_MAX_SIZE:
+            self.bit_count = tuple(bin(m).count('1') for m in range(layout.full_mask + 1))
+        else:
+            self.bit_count = _BitCounter()
+
+
+_tables = {}
+
+
+def get_tables(layout):
+    """
+    Gets the shared solver Tables for a board Layout
+    :param layout: board Layout
+    :return Tables:
+    """
+    tables = _tables.get(layout)
+    if tables is None:
+        tables = _tables[layout] = Tables(layout)
+    return tables
+
+
+class SolveStats(object):
+    """
+    Counters describing how much work a solve took
+    """
+
+    def __init__(self):
+        self.nodes = 0          # search nodes visited
+        self.propagations = 0   # values placed by propagation
+        self.elapsed = 0.0      # wall time, in seconds
+
+    def __repr__(self):
+        return "SolveStats(nodes=%d, propagations=%d, elapsed=%.6f)" % (
+            self.nodes, self.propagations, self.elapsed)
+
+
+def solve(puzzle, stats=None, layout=None):
+    """
+    Solves a puzzle
+    :param puzzle: list of values, None or 0 for blanks; the same format used
+        by Grid.create_grid
+    :param stats: optional SolveStats to record the cost of the solve into
+    :param layout: board Layout; worked out from the puzzle's length if not given
+    :return list: the solved puzzle, or None if it has no solution
+    """
+    solutions = _run(puzzle, 1, stats, layout)
+    return solutions[0] if solutions else None
+
+
+def count_solutions(puzzle, limit=2, layout=None):
+    """
+    Counts the solutions of a puzzle, stopping as soon as limit is reached.
+    With the default limit this answers "does this puzzle have a unique
+    solution" as cheaply as possible.
+    :param puzzle: list of values, None or 0 for blanks
+    :param limit: the most solutions to look for
+    :param layout: board Layout; worked out from the puzzle's length if not given
+    :return int: number of solutions found, at most limit
+    """
+    return len(_run(puzzle, limit, None, layout))
+
+
+def _run(puzzle, limit, stats, layout):
+    """
+    Sets up the search for a puzzle and runs it
+    :return list: the solutions found, at most limit of them
+    """
+    if layout is None:
+        layout = geometry.get_layout_for_cells(len(puzzle))
+    tables = get_tables(layout)
+    if len(puzzle) != tables.cell_count:
+        raise ValueError("Puzzle must have %d values, got %d" % (tables.cell_count, len(puzzle)))
+    if stats is None:
+        stats = SolveStats()
+    start = timeit.default_timer()
+
+    solutions = []
+    state = initial_state(puzzle, tables, stats)
+    if state is not None:
+        _search(state[0], state[1], tables, stats, limit, solutions)
+
+    stats.elapsed += timeit.default_timer() - start
+    return solutions
+
+
+def initial_state(puzzle, tables, stats):
+    """
+    Builds the cell and candidate lists for a puzzle and propagates its givens
+    :return tuple: (cells, candidates), or None if the givens contradict
+    """
+    cells = [0] * tables.cell_count
+    candidates = [tables.full_mask] * tables.cell_count
+    pending = []
+    for i, value in enumerate(puzzle):
+        if value:
+            if value < 1 or value > tables.size:
+                raise ValueError("Value at index %d must be between 1 and %d, got %s" % (i, tables.size, value))
+            pending.append((i, value))
+    if not propagate(cells, candidates, pending, tables, stats):
+        return None
+    return cells, candidates
+
+
+def propagate(cells, candidates, pending, tables, stats):
+    """
+    Places the pending values and everything that follows from them through
+    naked and hidden singles. Modifies cells and candidates in place.
+    :param cells: list of cell values, 0 for empty
+    :param candidates: list of candidate bitmasks; 0 for filled cells
+    :param pending: list of (index, value) placements to make
+    :param tables: solver Tables for the board
+    :param stats: SolveStats to record into
+    :return Boolean: False if a contradiction was found
+    """
+    peers = tables.peers
+    units = tables.units
+    full_mask = tables.full_mask
+    while True:
+        while pending:
+            index, value = pending.pop()
+            current = cells[index]
+            if current:
+                if current != value:
+                    return False
+                continue
+            bit = 1 << (value - 1)
+            if not candidates[index] & bit:
+                return False
+            cells[index] = value
+            candidates[index] = 0
+            stats.propagations += 1
+
+            # naked singles: remove the value from the peers, queueing any
+            # peer that is left with only one candidate
+            for peer in peers[index]:
+                mask = candidates[peer]
+                if mask & bit:
+                    mask ^= bit
+                    candidates[peer] = mask
+                    if not mask:
+                        return False
+                    if not mask & (mask - 1):
+                        pending.append((peer, mask.bit_length()))
+
+        # hidden singles: a value with only one possible cell in a unit
+        for unit in units:
+            once = twice = placed = 0
+            for index in unit:
+                mask = candidates[index]
+                if mask:
+                    twice |= once & mask
+                    once |= mask
+                else:
+                    placed |= 1 << (cells[index] - 1)
+            if (once | placed) != full_mask:
+                return False
+            hidden = once & ~twice
+            while hidden:
+                bit = hidden & -hidden
+                hidden ^= bit
+                for index in unit:
+                    if candidates[index] & bit:
+                        pending.append((index, bit.bit_length()))
+                        break
+
+        if not pending:
+            return True
+
+
+def _search(cells, candidates, tables, stats, limit, solutions):
+    """
+    Depth-first search, branching on the cell with the fewest candidates
+    :return Boolean: True once limit solutions have been found
+    """
+    stats.nodes += 1
+
+    bit_count = tables.bit_count
+    best = -1
+    best_count = tables.size + 1
+    for i in range(tables.cell_count):
+        mask = candidates[i]
+        if mask:
+            count = bit_count[mask]
+            if count < best_count:
+                best = i
+                best_count = count
+                if count == 2:
+                    break
+
+    if best < 0:
+        solutions.append(list(cells))
+        return len(solutions) >= limit
+
+    mask = candidates[best]
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        next_cells = cells[:]
+        next_candidates = candidates[:]
+        if propagate(next_cells, next_candidates, [(best, bit.bit_length())], tables, stats):
+            if _search(next_cells, next_candidates, tables, stats, limit, solutions):
+                return True
+    return False
@@ -1 +1,10 @@
 __author__ = 'josh'
+
+import os
+import sys
+
+# the game's modules import each other by their plain names, so the tests
+# need the py_sudoku directory on the path wherever they are run from
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, PACKAGE_DIR)
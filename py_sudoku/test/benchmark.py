@@ -0,0 +1,329 @@
+"""
+Benchmarks for the solver engines and the board validation path, run over
+the puzzle corpora in the puzzles package. Run from the py_sudoku directory:
+
+    python -m test.benchmark -o results.json
+    python -m test.benchmark --save-baseline baseline.json
+    python -m test.benchmark --baseline baseline.json --threshold 0.25
+
+Each case records wall time, search nodes, and peak memory, and the
+savegame case also checks that games round-trip and records their encoded
+size. Results are written as JSON, and when a baseline is given the run
+fails (exit status 1) if any case got slower than the baseline by more than
+the threshold.
+"""
+__author__ = 'josh'
+
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PACKAGE_DIR not in sys.path:
+    sys.path.insert(0, PACKAGE_DIR)
+
+import board
+import engines
+import savegame
+import solver
+import puzzles.easy
+import puzzles.hard
+import puzzles.hardest
+import puzzles.minimal
+
+
+CORPORA = (
+    ("easy", puzzles.easy.puzzles),
+    ("hard", puzzles.hard.puzzles),
+    ("minimal", puzzles.minimal.puzzles),
+    ("hardest", puzzles.hardest.puzzles),
+)
+
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+
+
+class BenchmarkResult(object):
+    """
+    Measurements for one benchmark case
+    """
+
+    def __init__(self, name, puzzle_count):
+        """
+        Constructor
+        :param name: the case's name, e.g. "dlx/hard"
+        :param puzzle_count: number of puzzles in the case
+        """
+        self.name = name
+        self.puzzle_count = puzzle_count
+        self.seconds = None
+        self.nodes = 0
+        self.peak_memory = None
+        # average encoded size, for cases which encode something
+        self.bytes_per_puzzle = None
+
+    def to_dict(self):
+        return {
+            "puzzles": self.puzzle_count,
+            "seconds": self.seconds,
+            "seconds_per_puzzle": self.seconds / self.puzzle_count,
+            "nodes": self.nodes,
+            "peak_memory": self.peak_memory,
+            "bytes_per_puzzle": self.bytes_per_puzzle,
+        }
+
+
+def run_case(name, corpus, action, repeat):
+    """
+    Times an action over every puzzle in a corpus, keeping the best of
+    several runs. Memory is measured on a separate run so that tracing
+    doesn't slow down the timed ones.
+    :param name: the case's name
+    :param corpus: list of puzzles
+    :param action: called with each puzzle; returns the search nodes used
+    :param repeat: number of timed runs
+    :return BenchmarkResult:
+    """
+    result = BenchmarkResult(name, len(corpus))
+    for i in range(repeat):
+        nodes = 0
+        start = timeit.default_timer()
+        for puzzle in corpus:
+            nodes += action(puzzle)
+        seconds = timeit.default_timer() - start
+        if result.seconds is None or seconds < result.seconds:
+            result.seconds = seconds
+        result.nodes = nodes
+
+    if tracemalloc is not None:
+        tracemalloc.start()
+        for puzzle in corpus:
+            action(puzzle)
+        result.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def make_solve_action(engine):
+    """
+    Solves a puzzle with the engine, checking the answer
+    """
+    def action(puzzle):
+        solution = engine.solve(puzzle)
+        if solution is None or not board.Board(solution).is_complete():
+            raise AssertionError("%s engine gave a bad solution" % engine.name)
+        return engine.stats.nodes
+    return action
+
+
+def make_board_action(solutions):
+    """
+    Fills in a headless Board from the puzzle and checks it is complete
+    """
+    def action(puzzle):
+        solution = solutions[id(puzzle)]
+        b = board.Board(puzzle)
+        for i, value in enumerate(solution):
+            if puzzle[i] is None:
+                b.set_value(i, value)
+        if not b.is_complete():
+            raise AssertionError("board not complete after filling in the solution")
+        return 0
+    return action
+
+
+def make_grid_action(solutions):
+    """
+    Fills in a Grid through Tile.set_value and checks Grid.is_complete. Needs
+    pygame, which is started with a dummy display.
+    :return function: the action, or None if pygame isn't available
+    """
+    try:
+        import pygame
+    except ImportError:
+        return None
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # tiles load their image relative to the package
+    os.chdir(PACKAGE_DIR)
+    pygame.init()
+    screen = pygame.display.set_mode((1000, 800))
+    import gameboard
+
+    def action(puzzle):
+        solution = solutions[id(puzzle)]
+        grid = gameboard.Grid.for_puzzle(puzzle)
+        grid.create_grid(screen, puzzle)
+        for i, value in enumerate(solution):
+            if puzzle[i] is None:
+                grid.tiles.get_by_index(i).set_value(value)
+        if not grid.is_complete():
+            raise AssertionError("grid not complete after filling in the solution")
+        return 0
+    return action
+
+
+def make_games(puzzles, solutions):
+    """
+    Builds a game in progress for each puzzle, with half the blanks filled
+    in from the solution and notes in the rest
+    :return dict: Board by puzzle id
+    """
+    games = {}
+    for puzzle in puzzles:
+        solution = solutions[id(puzzle)]
+        game = board.Board(puzzle)
+        blanks = [i for i, value in enumerate(puzzle) if value is None]
+        for n, index in enumerate(blanks):
+            if n % 2:
+                game.set_value(index, solution[index])
+            else:
+                game.notes[index] = game.get_candidates(index)
+        games[id(puzzle)] = game
+    return games
+
+
+def make_savegame_action(games, playtime=1234.5):
+    """
+    Encodes and decodes a game in progress, checking it comes back the same
+    """
+    def action(puzzle):
+        game = games[id(puzzle)]
+        restored, restored_playtime = savegame.decode(savegame.encode(game, playtime))
+        if (restored.cells != game.cells or restored.givens != game.givens or
+                restored.notes != game.notes or restored_playtime != playtime):
+            raise AssertionError("saved game didn't round-trip")
+        return 0
+    return action
+
+
+def run(repeat=DEFAULT_REPEAT, engine_names=None):
+    """
+    Runs every benchmark case
+    :param repeat: number of timed runs per case
+    :param engine_names: engines to benchmark; all of them by default
+    :return list: BenchmarkResult for each case
+    """
+    results = []
+    for engine_name in engine_names or sorted(engines.ENGINES):
+        action = make_solve_action(engines.get_engine(engine_name))
+        for corpus_name, corpus in CORPORA:
+            results.append(run_case("%s/%s" % (engine_name, corpus_name), corpus, action, repeat))
+
+    solutions = {}
+    for corpus_name, corpus in CORPORA:
+        for puzzle in corpus:
+            solutions[id(puzzle)] = solver.solve(puzzle)
+    everything = [puzzle for corpus_name, corpus in CORPORA for puzzle in corpus]
+    results.append(run_case("validation/board", everything, make_board_action(solutions), repeat))
+    games = make_games(everything, solutions)
+    result = run_case("savegame/roundtrip", everything, make_savegame_action(games), repeat)
+    result.bytes_per_puzzle = sum(len(savegame.encode(game)) for game in games.values()) / float(len(games))
+    results.append(result)
+    grid_action = make_grid_action(solutions)
+    if grid_action is not None:
+        results.append(run_case("validation/grid", everything, grid_action, repeat))
+    else:
+        sys.stderr.write("pygame is not installed; skipping validation/grid\n")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against a baseline
+    :param results: dict of case name to result dict, as written by to_json
+    :param baseline: the same, for the baseline run
+    :param threshold: allowed slowdown, as a fraction (0.25 is 25% slower)
+    :return list: (name, ratio) for each case over the threshold
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None or not previous["seconds"]:
+            continue
+        ratio = result["seconds"] / previous["seconds"]
+        if ratio > 1.0 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def to_json(results):
+    """
+    Gets the results in their machine-readable form
+    :param results: list of BenchmarkResult
+    :return dict:
+    """
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": dict((result.name, result.to_dict()) for result in results),
+    }
+
+
+def format_results(results):
+    """
+    Gets the results as a table
+    :param results: list of BenchmarkResult
+    :return str:
+    """
+    lines = ["%-22s %8s %12s %12s %10s %12s %10s" % (
+        "case", "puzzles", "seconds", "per puzzle", "nodes", "peak KiB", "bytes")]
+    for result in results:
+        peak = "%.1f" % (result.peak_memory / 1024.0) if result.peak_memory is not None else "-"
+        size = "%.1f" % result.bytes_per_puzzle if result.bytes_per_puzzle is not None else "-"
+        lines.append("%-22s %8d %12.4f %12.6f %10d %12s %10s" % (
+            result.name, result.puzzle_count, result.seconds,
+            result.seconds / result.puzzle_count, result.nodes, peak, size))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Entry point for the command line
+    :param argv: the arguments, without the program name
+    :return int: exit status
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the sudoku solvers and board validation.")
+    parser.add_argument("-o", "--output", help="file to write the JSON results to")
+    parser.add_argument("-b", "--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="file to write these results to as the new baseline")
+    parser.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline, as a fraction (default: %(default)s)")
+    parser.add_argument("-r", "--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="timed runs per case, best is kept (default: %(default)s)")
+    parser.add_argument("-e", "--engine", action="append", choices=sorted(engines.ENGINES),
+                        help="engine to benchmark; may be repeated (default: all)")
+    args = parser.parse_args(argv)
+    # the grid benchmark changes directory, so pin the paths down first
+    for name in ("output", "baseline", "save_baseline"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    results = run(args.repeat, args.engine)
+    print(format_results(results))
+    data = to_json(results)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(data["results"], baseline["results"], args.threshold)
+        for name, ratio in regressions:
+            print("REGRESSION %s: %.2fx the baseline time" % (name, ratio))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
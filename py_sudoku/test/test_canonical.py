@@ -0,0 +1,82 @@
+__author__ = 'josh'
+
+import random
+import unittest
+
+import canonical
+import puzzle_io
+import solver
+import puzzles.easy
+import puzzles.hard
+import puzzles.hardest
+
+
+def shuffle_puzzle(puzzle, rng, box_size=3):
+    """
+    Rearranges and relabels a puzzle the ways which keep it the same puzzle
+    """
+    size = box_size * box_size
+
+    def shuffled_lines():
+        bands = list(range(box_size))
+        rng.shuffle(bands)
+        lines = []
+        for band in bands:
+            rows = list(range(band * box_size, (band + 1) * box_size))
+            rng.shuffle(rows)
+            lines.extend(rows)
+        return lines
+
+    rows = shuffled_lines()
+    columns = shuffled_lines()
+    labels = list(range(1, size + 1))
+    rng.shuffle(labels)
+    relabel = [None] + labels
+    transpose = rng.random() < 0.5
+    shuffled = []
+    for row in rows:
+        for column in columns:
+            index = column * size + row if transpose else row * size + column
+            shuffled.append(relabel[puzzle[index] or 0])
+    return shuffled
+
+
+class CanonicalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rng = random.Random(42)
+        self.puzzles = puzzles.easy.puzzles + puzzles.hard.puzzles + puzzles.hardest.puzzles
+
+    def test_copies_share_a_form(self):
+        for puzzle in self.puzzles:
+            form, transform = canonical.canonicalize(puzzle)
+            for attempt in range(3):
+                copy = shuffle_puzzle(puzzle, self.rng)
+                self.assertEqual(canonical.canonicalize(copy)[0], form)
+
+    def test_transform_gives_the_form(self):
+        for puzzle in self.puzzles:
+            form, transform = canonical.canonicalize(puzzle)
+            self.assertEqual(puzzle_io.format_puzzle(transform.apply(puzzle)), form)
+
+    def test_invert_undoes_apply(self):
+        for puzzle in self.puzzles:
+            copy = shuffle_puzzle(puzzle, self.rng)
+            form, transform = canonical.canonicalize(copy)
+            self.assertEqual(transform.invert(transform.apply(copy)), [value or None for value in copy])
+
+    def test_solution_moves_back(self):
+        # a solution of the canonical form, inverted, solves the original
+        for puzzle in self.puzzles:
+            copy = shuffle_puzzle(puzzle, self.rng)
+            form, transform = canonical.canonicalize(copy)
+            solution = transform.invert(solver.solve(puzzle_io.parse_puzzle(form)))
+            self.assertEqual(solution, solver.solve(copy))
+
+    def test_different_puzzles_differ(self):
+        forms = set(canonical.canonicalize(puzzle)[0] for puzzle in self.puzzles)
+        self.assertEqual(len(forms), len(self.puzzles))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+__author__ = 'josh'
+
+import unittest
+
+import board
+import dlx
+import engines
+import geometry
+import solver
+import puzzles.easy
+import puzzles.hard
+import puzzles.hardest
+import puzzles.minimal
+
+
+def is_solution(solution, puzzle, layout=None):
+    """
+    Checks that a solution is complete and correct, and keeps the givens
+    """
+    if solution is None or not board.Board(solution, layout).is_complete():
+        return False
+    return all(not given or given == value for given, value in zip(puzzle, solution))
+
+
+class EngineTest(unittest.TestCase):
+    """
+    The same cases, run against every engine
+    """
+
+    def engines(self):
+        for name in sorted(engines.ENGINES):
+            yield engines.get_engine(name)
+
+    def test_solves_corpora(self):
+        corpora = (puzzles.easy.puzzles[:3], puzzles.hard.puzzles[:3],
+                   puzzles.hardest.puzzles[:3], puzzles.minimal.puzzles[:3])
+        for engine in self.engines():
+            for corpus in corpora:
+                for puzzle in corpus:
+                    solution = engine.solve(puzzle)
+                    self.assertTrue(is_solution(solution, puzzle), "%r failed a puzzle" % engine)
+                    self.assertEqual(engine.count_solutions(puzzle), 1)
+
+    def test_engines_agree(self):
+        # a puzzle with one solution has the same one whichever engine finds it
+        for puzzle in puzzles.hardest.puzzles:
+            self.assertEqual(solver.solve(puzzle), dlx.solve(puzzle))
+
+    def test_larger_board(self):
+        layout = geometry.get_layout(4, 4)
+        puzzle = [None] * layout.cell_count
+        puzzle[:layout.size] = range(1, layout.size + 1)
+        for engine in self.engines():
+            self.assertTrue(is_solution(engine.solve(puzzle, layout), puzzle, layout))
+
+    def test_no_solution(self):
+        puzzle = list(puzzles.easy.puzzles[0])
+        # a second 1 in the first row
+        puzzle[puzzle.index(None)] = 1
+        for engine in self.engines():
+            self.assertIsNone(engine.solve(puzzle))
+            self.assertEqual(engine.count_solutions(puzzle), 0)
+
+    def test_many_solutions(self):
+        puzzle = [None] * 81
+        for engine in self.engines():
+            self.assertTrue(is_solution(engine.solve(puzzle), puzzle))
+            self.assertEqual(engine.count_solutions(puzzle), 2)
+            self.assertEqual(engine.count_solutions(puzzle, limit=5), 5)
+
+    def test_counts_nodes(self):
+        for engine in self.engines():
+            engine.solve(puzzles.hardest.puzzles[0])
+            self.assertGreater(engine.stats.nodes, 0)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            engines.get_engine("guesswork")
+
+
+if __name__ == "__main__":
+    unittest.main()
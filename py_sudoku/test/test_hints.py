@@ -0,0 +1,105 @@
+__author__ = 'josh'
+
+import random
+import unittest
+
+import board
+import hints
+import solver
+import puzzles.easy
+import puzzles.hard
+
+
+def fresh_candidates(board_state):
+    return [0 if board_state.cells[index] else board_state.get_candidates(index)
+            for index in range(board_state.cell_count)]
+
+
+class HintEngineTest(unittest.TestCase):
+
+    def follow_hints(self, puzzle):
+        """
+        Takes hints until there are none, checking each against the solution
+        :return Board: as the hints left it
+        """
+        solution = solver.solve(puzzle)
+        board_state = board.Board(puzzle)
+        engine = hints.HintEngine(board_state)
+        hint = engine.next_hint()
+        while hint is not None:
+            self.assertNotEqual(hint.technique, hints.CONFLICT)
+            self.assertTrue(hint.placements or hint.eliminations)
+            for index, value in hint.placements:
+                self.assertEqual(value, solution[index], hint.description)
+                board_state.set_value(index, value)
+            for index, value in hint.eliminations:
+                self.assertNotEqual(value, solution[index], hint.description)
+            hint = engine.next_hint()
+        return board_state
+
+    def test_solves_easy_puzzles(self):
+        for puzzle in puzzles.easy.puzzles:
+            self.assertTrue(self.follow_hints(puzzle).is_complete())
+
+    def test_hard_puzzles_stay_correct(self):
+        for puzzle in puzzles.hard.puzzles:
+            self.follow_hints(puzzle)
+
+    def test_naked_single(self):
+        puzzle = solver.solve(puzzles.easy.puzzles[0])
+        value = puzzle[40]
+        puzzle[40] = None
+        hint = hints.HintEngine(board.Board(puzzle)).next_hint([hints.NAKED_SINGLE])
+        self.assertEqual(hint.technique, hints.NAKED_SINGLE)
+        self.assertEqual(hint.placements, [(40, value)])
+        self.assertEqual(hint.affected_cells, [40])
+        self.assertEqual(hint.description, "r5c5 can only be %d" % value)
+
+    def test_conflict_comes_first(self):
+        board_state = board.Board(puzzles.easy.puzzles[0])
+        board_state.set_value(1, 1)
+        hint = hints.HintEngine(board_state).next_hint()
+        self.assertEqual(hint.technique, hints.CONFLICT)
+        self.assertIn(1, hint.cells)
+
+    def test_nothing_to_hint(self):
+        self.assertIsNone(hints.HintEngine(board.Board(solver.solve(puzzles.easy.puzzles[0]))).next_hint())
+
+    def test_eliminations_are_remembered(self):
+        board_state = board.Board(puzzles.hard.puzzles[0])
+        engine = hints.HintEngine(board_state)
+        techniques = [technique for technique in hints.TECHNIQUES
+                      if technique not in (hints.HIDDEN_SINGLE, hints.NAKED_SINGLE)]
+        first = engine.next_hint(techniques)
+        self.assertIsNotNone(first)
+        candidates = engine.get_candidates()
+        for index, value in first.eliminations:
+            self.assertFalse(candidates[index] & 1 << (value - 1))
+        second = engine.next_hint(techniques)
+        self.assertNotEqual(second and second.to_dict(), first.to_dict())
+
+    def test_candidates_follow_the_board(self):
+        rng = random.Random(8)
+        puzzle = puzzles.easy.puzzles[1]
+        board_state = board.Board(puzzle)
+        engine = hints.HintEngine(board_state)
+        blanks = [index for index, value in enumerate(puzzle) if not value]
+        for step in range(200):
+            board_state.set_value(rng.choice(blanks), rng.choice([None, rng.randint(1, 9)]))
+            if step % 3 == 0:
+                self.assertEqual(engine.get_candidates(), fresh_candidates(board_state))
+
+    def test_removal_forgets_eliminations(self):
+        board_state = board.Board(puzzles.hard.puzzles[0])
+        engine = hints.HintEngine(board_state)
+        hint = engine.next_hint([hints.POINTING, hints.CLAIMING, hints.NAKED_PAIR, hints.HIDDEN_PAIR])
+        self.assertIsNotNone(hint)
+        self.assertNotEqual(engine.get_candidates(), fresh_candidates(board_state))
+        index = next(index for index in range(board_state.cell_count) if not board_state.cells[index])
+        board_state.set_value(index, 1)
+        board_state.clear_value(index)
+        self.assertEqual(engine.get_candidates(), fresh_candidates(board_state))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,141 @@
+__author__ = 'josh'
+
+import random
+import unittest
+
+import board
+import journal
+import puzzles.easy
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        puzzle = puzzles.easy.puzzles[0]
+        self.board = board.Board(puzzle)
+        self.blanks = [index for index, value in enumerate(puzzle) if not value]
+        self.journal = journal.Journal(self.board, snapshot_interval=8)
+
+    def play(self, count, rng):
+        """
+        Makes random moves, recording the board after each
+        :return list: the cells after each number of moves, from 0
+        """
+        states = [self.board.cells.tobytes()]
+        while len(self.journal) < count:
+            self.journal.set_value(rng.choice(self.blanks), rng.randint(0, self.board.size) or None)
+            if len(states) <= len(self.journal):
+                states.append(self.board.cells.tobytes())
+        return states
+
+    def test_undo_and_redo(self):
+        self.journal.set_value(self.blanks[0], 6)
+        self.journal.set_value(self.blanks[0], 7)
+        self.assertEqual(self.journal.undo(), [self.blanks[0]])
+        self.assertEqual(self.board.get_value(self.blanks[0]), 6)
+        self.journal.undo()
+        self.assertIsNone(self.board.get_value(self.blanks[0]))
+        self.assertEqual(self.journal.undo(), [])
+        self.journal.redo()
+        self.assertEqual(self.board.get_value(self.blanks[0]), 6)
+
+    def test_move_drops_redo(self):
+        self.journal.set_value(self.blanks[0], 6)
+        self.journal.undo()
+        self.journal.set_value(self.blanks[1], 2)
+        self.assertFalse(self.journal.can_redo())
+        self.assertEqual(len(self.journal), 1)
+
+    def test_unchanged_value_isnt_a_move(self):
+        self.assertEqual(self.journal.set_value(0, self.board.get_value(0)), [])
+        self.assertEqual(len(self.journal), 0)
+
+    def test_jump_to(self):
+        rng = random.Random(3)
+        states = self.play(100, rng)
+        # near and far, forwards and backwards, past several snapshots
+        for position in [0, 100, 3, 7, 8, 9, 57, 56, 99, 1, 100, 64, 65] + [rng.randint(0, 100) for i in range(50)]:
+            self.journal.jump_to(position)
+            self.assertEqual(self.journal.position, position)
+            self.assertEqual(self.board.cells.tobytes(), states[position], "at position %d" % position)
+
+    def test_jump_to_redraws_changed_cells(self):
+        rng = random.Random(4)
+        self.play(40, rng)
+        before = self.board.cells.tobytes()
+        changed = self.journal.jump_to(5)
+        after = self.board.cells.tobytes()
+        moved = [index for index in range(self.board.cell_count) if before[index] != after[index]]
+        self.assertTrue(set(moved) <= set(changed))
+        self.assertEqual(changed, sorted(set(changed)))
+
+    def test_jump_out_of_range(self):
+        self.play(5, random.Random(5))
+        for position in (-1, 6):
+            with self.assertRaises(ValueError):
+                self.journal.jump_to(position)
+
+    def test_undo_restores_pruned_notes(self):
+        self.board.auto_prune_notes = True
+        peer, other = self.board.layout.peers[self.blanks[0]][:2]
+        self.board.toggle_note(peer, 5)
+        self.board.toggle_note(other, 5)
+        self.board.toggle_note(other, 5)
+        self.journal.set_value(self.blanks[0], 5)
+        self.assertFalse(self.board.notes[peer] & 1 << 4)
+        self.assertIn(peer, self.journal.undo())
+        self.assertTrue(self.board.notes[peer] & 1 << 4)
+        self.assertFalse(self.board.notes[other])
+        self.journal.redo()
+        self.assertFalse(self.board.notes[peer] & 1 << 4)
+
+    def test_undo_keeps_notes_added_since(self):
+        self.board.auto_prune_notes = True
+        cell = self.blanks[0]
+        peer = self.board.layout.peers[cell][0]
+        self.journal.set_value(cell, 5)
+        self.journal.set_value(cell, 6)
+        # with 6 in the cell, 5 can be noted next to it again
+        self.board.toggle_note(peer, 5)
+        self.journal.undo()
+        self.assertEqual(self.board.get_value(cell), 5)
+        self.assertTrue(self.board.notes[peer] & 1 << 4)
+        self.journal.redo()
+        self.journal.jump_to(0)
+        self.assertTrue(self.board.notes[peer] & 1 << 4)
+
+    def test_jump_to_restores_pruned_notes(self):
+        self.board.auto_prune_notes = True
+        for index in self.blanks:
+            self.board.notes[index] = self.board.get_candidates(index)
+        rng = random.Random(6)
+        states = [list(self.board.notes)]
+        while len(self.journal) < 60:
+            self.journal.set_value(rng.choice(self.blanks), rng.randint(1, self.board.size))
+            if len(states) <= len(self.journal):
+                states.append(list(self.board.notes))
+        for position in (0, 60, 30, 2, 59, 17, 40, 0):
+            self.journal.jump_to(position)
+            self.assertEqual(self.board.notes, states[position], "at position %d" % position)
+
+    def test_round_trip(self):
+        self.play(30, random.Random(7))
+        self.journal.jump_to(20)
+        copy = journal.Journal.loads(self.journal.dumps())
+        self.assertEqual(copy.board.cells.tobytes(), self.board.cells.tobytes())
+        self.assertEqual(copy.position, 20)
+        self.assertEqual(list(copy.moves), list(self.journal.moves))
+        copy.jump_to(30)
+        self.journal.jump_to(30)
+        self.assertEqual(copy.board.cells.tobytes(), self.board.cells.tobytes())
+
+    def test_replay_checks_moves(self):
+        self.journal.set_value(self.blanks[0], 6)
+        data = self.journal.to_dict()
+        data["moves"][0][1] = 2
+        with self.assertRaises(ValueError):
+            journal.Journal.from_dict(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
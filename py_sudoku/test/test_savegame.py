@@ -0,0 +1,139 @@
+__author__ = 'josh'
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import board
+import geometry
+import savegame
+import puzzles.easy
+
+
+def make_solution(layout):
+    """
+    Makes a solved grid for any layout, by shifting each row of a pattern
+    """
+    size = layout.size
+    return [((row % layout.box_height) * layout.box_width + row // layout.box_height + column) % size + 1
+            for row in range(size) for column in range(size)]
+
+
+def make_game(layout):
+    """
+    Makes a game in progress: every third cell given, some of the rest
+    filled in, and notes in others
+    """
+    solution = make_solution(layout)
+    puzzle = [value if index % 3 == 0 else None for index, value in enumerate(solution)]
+    board_state = board.Board(puzzle, layout)
+    for index in range(layout.cell_count):
+        if index % 3 == 1:
+            board_state.set_value(index, solution[index])
+        elif index % 3 == 2 and index % 2:
+            # the highest value needs every byte of the notes
+            board_state.notes[index] = (1 << (layout.size - 1)) | (1 << (index % layout.size))
+    return board_state
+
+
+class RoundTripTest(unittest.TestCase):
+
+    def assert_round_trips(self, board_state, playtime=0.0):
+        decoded, decoded_playtime = savegame.decode(savegame.encode(board_state, playtime))
+        self.assertEqual(decoded.layout, board_state.layout)
+        self.assertEqual(list(decoded.cells), list(board_state.cells))
+        self.assertEqual(list(decoded.givens), list(board_state.givens))
+        self.assertEqual(decoded.notes, board_state.notes)
+        self.assertEqual(list(decoded.conflicts), list(board_state.conflicts))
+        self.assertAlmostEqual(decoded_playtime, playtime, places=3)
+
+    def test_standard_board(self):
+        board_state = board.Board(puzzles.easy.puzzles[0])
+        board_state.set_value(1, 6)
+        board_state.notes[2] = (1 << 3) | (1 << 6)
+        self.assert_round_trips(board_state, 83.25)
+
+    def test_empty_board_size(self):
+        # 12 header bytes, 41 for the cells, and 11 for each bitmap
+        self.assertEqual(len(savegame.encode(board.Board())), 75)
+
+    def test_conflicts_survive(self):
+        board_state = board.Board(puzzles.easy.puzzles[0])
+        board_state.set_value(1, 1)
+        self.assertTrue(any(board_state.conflicts))
+        self.assert_round_trips(board_state)
+
+    def test_larger_boards(self):
+        # 16x16 and 25x25 take 5 bits a cell, and notes in 2 and 4 bytes
+        for box_size in (2, 3, 4, 5):
+            layout = geometry.get_layout(box_size, box_size)
+            self.assert_round_trips(make_game(layout), 1.5)
+
+    def test_full_playtime(self):
+        board_state = board.Board()
+        self.assert_round_trips(board_state, savegame.MAX_PLAYTIME / 1000.0)
+        decoded, playtime = savegame.decode(savegame.encode(board_state, 1e12))
+        self.assertEqual(playtime, savegame.MAX_PLAYTIME / 1000.0)
+
+    def test_save_and_load(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "game.sav")
+            board_state = make_game(geometry.get_layout(4, 4))
+            savegame.save(path, board_state, 12.0)
+            savegame.save(path, board_state, 13.0)
+            self.assertEqual(os.listdir(directory), ["game.sav"])
+            loaded, playtime = savegame.load(path)
+            self.assertEqual(list(loaded.cells), list(board_state.cells))
+            self.assertEqual(playtime, 13.0)
+        finally:
+            shutil.rmtree(directory)
+
+
+class DecodeErrorTest(unittest.TestCase):
+
+    def setUp(self):
+        board_state = board.Board(puzzles.easy.puzzles[0])
+        board_state.notes[2] = 1 << 3
+        self.data = savegame.encode(board_state)
+
+    def assert_rejected(self, data, message):
+        with self.assertRaises(ValueError) as context:
+            savegame.decode(data)
+        self.assertIn(message, str(context.exception))
+
+    def test_bad_magic(self):
+        self.assert_rejected(b"XXXX" + self.data[4:], "Not a saved game")
+
+    def test_bad_version(self):
+        data = bytearray(self.data)
+        data[4] = savegame.VERSION + 1
+        self.assert_rejected(bytes(data), "Unsupported saved game version")
+
+    def test_bad_cell_bits(self):
+        data = bytearray(self.data)
+        data[7] = 5
+        self.assert_rejected(bytes(data), "bits per cell")
+
+    def test_truncated_header(self):
+        self.assert_rejected(self.data[:savegame.HEADER.size - 1], "too short")
+
+    def test_truncated_cells(self):
+        self.assert_rejected(self.data[:savegame.HEADER.size + 10], "too short")
+
+    def test_missing_notes(self):
+        self.assert_rejected(self.data[:-1], "wrong length")
+
+    def test_trailing_bytes(self):
+        self.assert_rejected(self.data + b"\0", "wrong length")
+
+    def test_value_out_of_range(self):
+        data = bytearray(self.data)
+        # the first cell is in the low bits of the first byte after the header
+        data[savegame.HEADER.size] |= 0x0f
+        self.assert_rejected(bytes(data), "value of 15")
+
+
+if __name__ == "__main__":
+    unittest.main()
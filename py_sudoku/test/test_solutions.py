@@ -0,0 +1,83 @@
+__author__ = 'josh'
+
+import unittest
+
+import solutions
+import puzzles.easy
+
+
+def make_puzzle(removed):
+    """
+    Makes a puzzle with many solutions, by blanking the first few givens of
+    an easy one; 7 leaves it 72 solutions
+    """
+    puzzle = list(puzzles.easy.puzzles[0])
+    givens = [index for index, value in enumerate(puzzle) if value]
+    for index in givens[:removed]:
+        puzzle[index] = None
+    return puzzle
+
+
+class SolutionIteratorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.puzzle = make_puzzle(7)
+        self.everything = list(solutions.SolutionIterator(self.puzzle))
+
+    def test_enumerates_distinct_solutions(self):
+        self.assertEqual(len(self.everything), 72)
+        self.assertEqual(len(set(tuple(solution) for solution in self.everything)), 72)
+        for solution in self.everything:
+            for index, value in enumerate(self.puzzle):
+                if value:
+                    self.assertEqual(solution[index], value)
+
+    def test_resume_after_each_count(self):
+        for count in (1, 2, 10, 35, 71):
+            first = solutions.SolutionIterator(self.puzzle, max_count=count)
+            found = list(first)
+            self.assertEqual(len(found), count)
+            self.assertFalse(first.exhausted)
+            rest = solutions.SolutionIterator.loads(first.dumps())
+            found.extend(rest)
+            self.assertEqual(found, self.everything, "resumed after %d" % count)
+            self.assertEqual(rest.total, 72)
+            self.assertTrue(rest.exhausted)
+            self.assertIsNone(rest.get_cursor())
+
+    def test_resume_more_than_once(self):
+        found = []
+        iterator = solutions.SolutionIterator(self.puzzle, max_count=5)
+        while True:
+            found.extend(iterator)
+            if iterator.exhausted:
+                break
+            iterator = solutions.SolutionIterator.loads(iterator.dumps(), max_count=5)
+        self.assertEqual(found, self.everything)
+
+    def test_resume_time_budgeted_slices(self):
+        found = []
+        interruptions = 0
+        iterator = solutions.SolutionIterator(self.puzzle)
+        while not iterator.exhausted:
+            solution = iterator.find_next(0.001)
+            if solution is not None:
+                found.append(solution)
+            elif not iterator.exhausted:
+                # stopped mid-search: carry on from the cursor, as after a restart
+                interruptions += 1
+                iterator = solutions.SolutionIterator.loads(iterator.dumps())
+        self.assertGreater(interruptions, 0)
+        self.assertEqual(found, self.everything)
+
+    def test_cursor_for_another_puzzle(self):
+        iterator = solutions.SolutionIterator(self.puzzle, max_count=3)
+        list(iterator)
+        cursor = iterator.get_cursor()
+        cursor["puzzle"] = cursor["puzzle"].replace(".", "5", 1)
+        with self.assertRaises(ValueError):
+            solutions.SolutionIterator.from_cursor(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()